@@ -3,17 +3,14 @@ from rest_framework.response import Response
 from .models import Asset, AssetDocument, AssetServiceDue
 from .serializers import AssetSerializer, AssetDocumentSerializer, AssetServiceDueSerializer
 from rest_framework.permissions import IsAuthenticated
+from igen.tenancy import TenantScopedMixin
 
-class AssetViewSet(viewsets.ModelViewSet):
+class AssetViewSet(TenantScopedMixin, viewsets.ModelViewSet):
     serializer_class = AssetSerializer
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        user = self.request.user
-        base_queryset = Asset.objects.filter(is_active=True)
-        if user.role == 'SUPER_USER':
-            return base_queryset.order_by('-created_at')
-        return base_queryset.filter(company__in=user.companies.all()).order_by('-created_at')
+        return self.scope_to_tenant(Asset.objects.filter(is_active=True)).order_by('-created_at')
 
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
@@ -4,8 +4,9 @@ from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
 from .models import BankAccount
 from .serializers import BankAccountSerializer
+from igen.tenancy import TenantScopedMixin
 
-class BankAccountViewSet(viewsets.ModelViewSet):
+class BankAccountViewSet(TenantScopedMixin, viewsets.ModelViewSet):
     """
     Handles CRUD for BankAccount, with soft delete
     and optional inclusion of inactive records via query params.
@@ -25,11 +26,8 @@ class BankAccountViewSet(viewsets.ModelViewSet):
             base_queryset = BankAccount.objects.filter(is_active=True)
 
         # ✅ Role-based filtering
-        if user.role == 'SUPER_USER':
-            return base_queryset
-
-        elif user.role == 'ACCOUNTANT':
-            return base_queryset.filter(company__in=user.companies.all())
+        if user.role in ('SUPER_USER', 'ACCOUNTANT'):
+            return self.scope_to_tenant(base_queryset)
 
         return BankAccount.objects.none()
 
@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from benchmarks import synthetic
+
+
+class Command(BaseCommand):
+    help = "Generates synthetic companies, reference data, transactions and cash ledger entries for benchmarking."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--companies', type=int, default=5)
+        parser.add_argument('--transactions', type=int, default=100000)
+        parser.add_argument('--cash-entries', type=int, default=20000)
+        parser.add_argument('--classified', type=float, default=0.6,
+                            help='Fraction of transactions to classify (default 0.6).')
+        parser.add_argument('--years', type=int, default=3, help='Date range ending today (default 3 years).')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=synthetic.BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        counts = synthetic.generate(
+            companies=options['companies'],
+            transactions=options['transactions'],
+            cash_entries=options['cash_entries'],
+            classified_ratio=options['classified'],
+            seed=options['seed'],
+            batch_size=options['batch_size'],
+            years=options['years'],
+            log=self.stdout.write,
+        )
+        for label, count in sorted(counts.items()):
+            self.stdout.write(f"{label}: {count}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Synthetic data generated in {time.monotonic() - started:.1f}s. "
+            f"Log in as {synthetic.ADMIN_USER_ID} / {synthetic.PASSWORD}."
+        ))
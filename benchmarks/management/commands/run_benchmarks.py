@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks import suite
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = "Times the hot API endpoints and writes latency and query counts as a JSON baseline."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', help='Write the results to this JSON file.')
+        parser.add_argument('--compare', help='Baseline JSON file to compare the results with.')
+        parser.add_argument('--max-regression', type=float,
+                            help='Fail if any p50 grows by more than this ratio over --compare (e.g. 0.2).')
+        parser.add_argument('--only', action='append', choices=[b.name for b in suite.BENCHMARKS],
+                            help='Benchmark to run (repeatable). Defaults to all.')
+        parser.add_argument('--iterations', type=int, default=10)
+        parser.add_argument('--warmup', type=int, default=1)
+        parser.add_argument('--upload-rows', type=int, default=500)
+        parser.add_argument('--user', help='user_id to run as. Defaults to the first active SUPER_USER.')
+
+    def handle(self, *args, **options):
+        user = None
+        if options['user']:
+            user = User.objects.filter(user_id=options['user']).first()
+            if user is None:
+                raise CommandError(f"No user {options['user']!r}.")
+
+        try:
+            results = suite.run(
+                user=user, names=options['only'], iterations=options['iterations'],
+                warmup=options['warmup'], upload_rows=options['upload_rows'], log=self.stdout.write,
+            )
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        if options['output']:
+            suite.save(results, options['output'])
+            self.stdout.write(f"Results written to {options['output']}.")
+
+        if options['compare']:
+            lines, regressions = suite.compare(suite.load(options['compare']), results, options['max_regression'])
+            for line in lines:
+                self.stdout.write(line)
+            if regressions:
+                raise CommandError(f"Regressions: {', '.join(regressions)}")
+
+        self.stdout.write(self.style.SUCCESS("Benchmarks complete."))
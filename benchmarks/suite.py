@@ -0,0 +1,249 @@
+"""
+Endpoint benchmark suite.
+
+Each benchmark issues one request against the configured database through
+the full middleware and JWT authentication stack. The suite records latency
+percentiles, query counts and response size, and writes them as a JSON
+baseline. `compare()` diffs two baselines so a change can be checked
+against the previous run.
+
+Write benchmarks (cash-ledger create, bulk upload) run inside a transaction
+that is rolled back, so repeated runs see the same data.
+"""
+import csv
+import io
+import json
+import platform
+import statistics
+import time
+
+import django
+from django.db import connection, transaction as db_transaction
+from django.db.models import Count
+from django.conf import settings
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from users.models import User
+from users.serializers import CustomTokenObtainPairSerializer
+from companies.models import Company
+from banks.models import BankAccount
+from cost_centres.models import CostCentre
+from entities.models import Entity
+from transaction_types.models import TransactionType
+from transactions.models import Transaction, ClassifiedTransaction
+from cash_ledger.models import CashLedgerRegister
+from reports.models import LedgerEntry
+
+BASELINE_VERSION = 1
+COUNTED_TABLES = (Company, Transaction, ClassifiedTransaction, CashLedgerRegister, LedgerEntry)
+
+
+class Benchmark:
+    """
+    One timed request. `build(context)` returns (path, data) for the request;
+    `writes` marks benchmarks whose effects must be rolled back.
+    """
+
+    def __init__(self, name, method, build, writes=False):
+        self.name = name
+        self.method = method
+        self.build = build
+        self.writes = writes
+
+
+def _cash_entry(context):
+    return '/api/cash-ledger/', {
+        'company': context['company'].pk,
+        'date': timezone.localdate().isoformat(),
+        'cost_centre': context['cost_centre'].pk,
+        'entity': context['entity'].pk,
+        'transaction_type': context['transaction_type'].pk,
+        'amount': '1250.00',
+        'remarks': 'benchmark',
+    }
+
+
+def _bulk_upload(context):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(['company', 'bank_account', 'cost_centre', 'transaction_type', 'direction', 'amount', 'date', 'notes'])
+    for i in range(context['upload_rows']):
+        writer.writerow([
+            context['company'].name, context['bank_account'].account_name, context['cost_centre'].name,
+            context['transaction_type'].name, 'DEBIT', f'{100 + i}.00', timezone.localdate().isoformat(),
+            f'benchmark row {i}',
+        ])
+    upload = io.BytesIO(buffer.getvalue().encode('utf-8'))
+    upload.name = 'benchmark.csv'
+    return '/api/bulk-upload/', {'file': upload}
+
+
+BENCHMARKS = [
+    Benchmark('transaction_list', 'get', lambda c: ('/api/transactions/', None)),
+    Benchmark('transaction_list_all', 'get', lambda c: ('/api/transactions/?show_all=true', None)),
+    Benchmark('entity_report_list', 'get', lambda c: ('/api/reports/entity-report/', None)),
+    Benchmark('entity_report_summary', 'get',
+              lambda c: ('/api/reports/entity-report/summary/?breakdown=entity,cost_centre,month', None)),
+    Benchmark('entity_report_export', 'get',
+              lambda c: (f"/api/reports/entity-report/export/?company={c['company'].pk}", None)),
+    Benchmark('cash_ledger_create', 'post', _cash_entry, writes=True),
+    Benchmark('cash_ledger_balance', 'get', lambda c: ('/api/cash-ledger/balance/', None)),
+    Benchmark('bulk_upload', 'post', _bulk_upload, writes=True),
+    Benchmark('dashboard', 'get', lambda c: ('/api/dashboard-stats/', None)),
+]
+
+
+def build_context(user, upload_rows=500):
+    """
+    Picks the busiest company and its reference rows to aim requests at.
+    """
+    busiest = Transaction.objects.order_by().values('company_id').annotate(n=Count('pk')).order_by('-n').first()
+    company = Company.objects.filter(pk=busiest['company_id']).first() if busiest else Company.objects.order_by('pk').first()
+    if company is None:
+        raise ValueError("No companies found; run `manage.py generate_data` first.")
+
+    def first(model):
+        row = model.objects.filter(company=company).first()
+        if row is None:
+            raise ValueError(f"{company.name} has no {model._meta.verbose_name}.")
+        return row
+
+    return {
+        'user': user,
+        'company': company,
+        'bank_account': first(BankAccount),
+        'cost_centre': first(CostCentre),
+        'entity': first(Entity),
+        'transaction_type': first(TransactionType),
+        'upload_rows': upload_rows,
+    }
+
+
+def client_for(user):
+    """
+    An APIClient authenticating with a real access token, so the auth path
+    is part of every measurement.
+    """
+    client = APIClient()
+    token = CustomTokenObtainPairSerializer.get_token(user).access_token
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    return client
+
+
+def _run_once(client, benchmark, context):
+    path, data = benchmark.build(context)
+    with CaptureQueriesContext(connection) as queries:
+        started = time.perf_counter()
+        if benchmark.method == 'get':
+            response = client.get(path)
+        else:
+            response = client.post(path, data, format='multipart')
+        # Streaming responses are only produced as they are consumed.
+        if response.streaming:
+            size = sum(len(chunk) for chunk in response.streaming_content)
+        else:
+            size = len(response.content)
+        elapsed = time.perf_counter() - started
+    return elapsed * 1000, len(queries), response.status_code, size
+
+
+def run_benchmark(client, benchmark, context, iterations=10, warmup=1):
+    timings, query_counts, statuses, size = [], [], set(), 0
+    for i in range(warmup + iterations):
+        if benchmark.writes:
+            with db_transaction.atomic():
+                result = _run_once(client, benchmark, context)
+                db_transaction.set_rollback(True)
+        else:
+            result = _run_once(client, benchmark, context)
+        if i < warmup:
+            continue
+        elapsed, queries, status, size = result
+        timings.append(elapsed)
+        query_counts.append(queries)
+        statuses.add(status)
+
+    timings.sort()
+    return {
+        'method': benchmark.method.upper(),
+        'path': benchmark.build(context)[0],
+        'iterations': iterations,
+        'status': sorted(statuses),
+        'p50_ms': round(statistics.median(timings), 3),
+        'p95_ms': round(timings[min(len(timings) - 1, int(round(0.95 * (len(timings) - 1))))], 3),
+        'mean_ms': round(statistics.fmean(timings), 3),
+        'min_ms': round(timings[0], 3),
+        'max_ms': round(timings[-1], 3),
+        'queries': int(statistics.median(query_counts)),
+        'response_bytes': size,
+    }
+
+
+def run(user=None, names=None, iterations=10, warmup=1, upload_rows=500, log=None):
+    """
+    Runs the selected benchmarks (all by default) and returns a baseline dict.
+    """
+    log = log or (lambda message: None)
+    user = user or User.objects.filter(role='SUPER_USER', is_active=True).order_by('pk').first()
+    if user is None:
+        raise ValueError("No active SUPER_USER to benchmark as.")
+    context = build_context(user, upload_rows=upload_rows)
+    client = client_for(user)
+
+    results = {}
+    # The test client's requests are addressed to "testserver".
+    with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+        for benchmark in BENCHMARKS:
+            if names and benchmark.name not in names:
+                continue
+            result = results[benchmark.name] = run_benchmark(client, benchmark, context, iterations, warmup)
+            log(f"{benchmark.name}: p50 {result['p50_ms']} ms, {result['queries']} queries")
+
+    return {
+        'version': BASELINE_VERSION,
+        'created_at': timezone.now().isoformat(),
+        'environment': {
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'user': user.user_id,
+            'company': context['company'].pk,
+        },
+        'rows': {model._meta.label: model.objects.count() for model in COUNTED_TABLES},
+        'results': results,
+    }
+
+
+def compare(baseline, current, max_regression=None):
+    """
+    Returns (lines, regressions): a per-benchmark report of p50 and query
+    changes, and the names whose p50 grew by more than `max_regression`
+    (a ratio, e.g. 0.2 for 20%) or whose query count went up.
+    """
+    lines, regressions = [], []
+    for name, now in current['results'].items():
+        before = baseline.get('results', {}).get(name)
+        if before is None:
+            lines.append(f"{name}: new ({now['p50_ms']} ms, {now['queries']} queries)")
+            continue
+        change = (now['p50_ms'] - before['p50_ms']) / before['p50_ms'] if before['p50_ms'] else 0
+        lines.append(
+            f"{name}: p50 {before['p50_ms']} -> {now['p50_ms']} ms ({change:+.1%}), "
+            f"queries {before['queries']} -> {now['queries']}"
+        )
+        if now['queries'] > before['queries'] or (max_regression is not None and change > max_regression):
+            regressions.append(name)
+    return lines, regressions
+
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def save(baseline, path):
+    with open(path, 'w') as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+        f.write('\n')
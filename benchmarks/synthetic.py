@@ -0,0 +1,305 @@
+"""
+Synthetic data for benchmarks.
+
+`generate()` writes companies with bank accounts, cost centres, transaction
+types, entities, vendors, contracts with milestones, properties with
+documents, users, and any number of transactions, classifications and cash
+ledger entries. Rows are built in memory and written with batched
+bulk_create. Each batch sends post_bulk_create, so the ledger, dashboard
+counters and is_classified flags stay current. Cash balances are recomputed
+per company at the end.
+
+Output is deterministic for a given seed. Companies are numbered after any
+earlier synthetic ones, so the command can be run repeatedly to grow a
+dataset.
+"""
+import datetime
+import random
+from decimal import Decimal
+
+from django.db import transaction as db_transaction
+
+from igen.signals import post_bulk_create
+from companies.models import Company
+from banks.models import BankAccount
+from cost_centres.models import CostCentre
+from transaction_types.models import TransactionType
+from entities.models import Entity
+from vendors.models import Vendor
+from contracts.models import Contract, ContractMilestone
+from properties.models import Property, PropertyDocument
+from transactions.models import Transaction, ClassifiedTransaction
+from cash_ledger.models import CashLedgerRegister
+from cash_ledger import balances
+from users.models import User
+
+COMPANY_PREFIX = 'Synthetic Company'
+ADMIN_USER_ID = 'bench-admin'
+PASSWORD = 'bench-password'
+BATCH_SIZE = 5000
+
+COST_CENTRES = ['Administration', 'Maintenance', 'Utilities', 'Payroll', 'Marketing',
+                'Legal', 'Travel', 'IT', 'Security', 'Housekeeping']
+TRANSACTION_TYPES = [('Rent Received', 'Credit'), ('Service Charge', 'Credit'), ('Sale Proceeds', 'Credit'),
+                     ('Interest', 'Credit'), ('Electricity', 'Debit'), ('Water', 'Debit'),
+                     ('Salary', 'Debit'), ('Repairs', 'Debit'), ('Property Tax', 'Debit'),
+                     ('Insurance', 'Debit'), ('Consulting', 'Debit'), ('Office Supplies', 'Debit')]
+NOTE_WORDS = ['neft', 'imps', 'upi', 'rtgs', 'chq', 'rent', 'kseb', 'water', 'salary', 'repair',
+              'tax', 'insurance', 'fee', 'refund', 'transfer', 'invoice', 'advance', 'deposit']
+CITIES = ['Kochi', 'Thrissur', 'Kozhikode', 'Trivandrum', 'Kannur', 'Kollam']
+
+SIZES = {
+    'bank_accounts': 3,
+    'entities': 20,
+    'vendors': 10,
+    'contracts': 25,
+    'properties': 15,
+}
+
+
+class Generator:
+
+    def __init__(self, seed=0, batch_size=BATCH_SIZE, years=3, log=None):
+        self.random = random.Random(seed)
+        self.batch_size = batch_size
+        self.end = datetime.date.today()
+        self.start = self.end - datetime.timedelta(days=365 * years)
+        self.log = log or (lambda message: None)
+        self.counts = {}
+
+    # -- helpers -----------------------------------------------------------
+
+    def insert(self, model, rows):
+        """
+        Writes an iterable of unsaved instances in batches. Returns them.
+        """
+        created, batch = [], []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                created += self._flush(model, batch)
+                batch = []
+        created += self._flush(model, batch)
+        return created
+
+    def stream(self, model, rows, total):
+        """
+        Like insert() for very large tables: batches are committed one by one
+        and not kept in memory.
+        """
+        batch, written = [], 0
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                written += len(self._flush(model, batch))
+                batch = []
+                self.log(f"  {model._meta.verbose_name_plural}: {written}/{total}")
+        written += len(self._flush(model, batch))
+        return written
+
+    def _flush(self, model, batch):
+        if not batch:
+            return []
+        with db_transaction.atomic():
+            created = model.objects.bulk_create(batch)
+            post_bulk_create.send(sender=model, instances=created)
+        self.counts[model._meta.label] = self.counts.get(model._meta.label, 0) + len(created)
+        return created
+
+    def date(self):
+        return self.start + datetime.timedelta(days=self.random.randrange((self.end - self.start).days + 1))
+
+    def amount(self, low=100, high=250000):
+        # Log-uniform: mostly small amounts with a long tail, like real statements.
+        value = low * (high / low) ** self.random.random()
+        return Decimal(value).quantize(Decimal('0.01'))
+
+    def notes(self):
+        return ' '.join(self.random.choices(NOTE_WORDS, k=3)) + f' {self.random.randrange(10 ** 6):06d}'
+
+    # -- reference data ------------------------------------------------------
+
+    def companies(self, count):
+        offset = Company.objects.filter(name__startswith=COMPANY_PREFIX).count()
+        numbers = range(offset + 1, offset + count + 1)
+        return self.insert(Company, (
+            Company(name=f'{COMPANY_PREFIX} {n:05d}', pan=f'SYNTH{n:05d}',
+                    address=f'{n} Main Road, {self.random.choice(CITIES)}')
+            for n in numbers
+        ))
+
+    def users(self, companies):
+        admin, created = User.objects.get_or_create(
+            user_id=ADMIN_USER_ID, defaults={'full_name': 'Benchmark Admin', 'role': 'SUPER_USER'}
+        )
+        if created:
+            admin.set_password(PASSWORD)
+            admin.save()
+        for company in companies:
+            accountant = User.objects.create_user(
+                user_id=f'bench-accountant-{company.pk}', password=PASSWORD,
+                role='ACCOUNTANT', full_name=f'Accountant {company.name}'
+            )
+            accountant.companies.add(company)
+        return admin
+
+    def references(self, company):
+        """
+        Creates one company's reference tables. Returns a dict of lists.
+        """
+        refs = {'company': company}
+        refs['banks'] = self.insert(BankAccount, (
+            BankAccount(company=company, account_name=f'Account {i + 1}',
+                        account_number=f'9{company.pk:07d}{i:03d}', bank_name=self.random.choice(['SBI', 'HDFC', 'Federal Bank']),
+                        ifsc='SBIN0000001')
+            for i in range(SIZES['bank_accounts'])
+        ))
+        refs['cost_centres'] = self.insert(CostCentre, (
+            CostCentre(company=company, name=name) for name in COST_CENTRES
+        ))
+        refs['transaction_types'] = self.insert(TransactionType, (
+            TransactionType(company=company, name=name, direction=direction, is_credit=direction == 'Credit',
+                            cost_centre=self.random.choice(refs['cost_centres']))
+            for name, direction in TRANSACTION_TYPES
+        ))
+        refs['properties'] = self.insert(Property, (
+            Property(company=company, name=f'Property {i + 1}', location=self.random.choice(CITIES),
+                     purchase_date=self.date(), purchase_price=self.amount(10 ** 6, 10 ** 8),
+                     purpose=self.random.choice(['rental', 'sale', 'care']),
+                     property_type=self.random.choice(['apartment', 'villa', 'plot']),
+                     monthly_rent=self.amount(5000, 100000))
+            for i in range(SIZES['properties'])
+        ))
+        self.insert(PropertyDocument, (
+            PropertyDocument(property=prop, file_name=f'{kind}.pdf', file_url=f'property_docs/{prop.pk}-{kind}.pdf')
+            for prop in refs['properties'] for kind in ('deed', 'tax-receipt')
+        ))
+        refs['entities'] = self.insert(Entity, (
+            Entity(company=company, name=f'Entity {i + 1}', entity_type='Property' if i < len(refs['properties']) else 'Internal',
+                   linked_property=refs['properties'][i] if i < len(refs['properties']) else None)
+            for i in range(SIZES['entities'])
+        ))
+        refs['vendors'] = self.insert(Vendor, (
+            Vendor(company=company, vendor_name=f'Vendor {i + 1}',
+                   vendor_type=self.random.choice(['Contractor', 'Supplier', 'Consultant']),
+                   pan_number=f'ABCDE{self.random.randrange(10000):04d}F', contact_person=f'Contact {i + 1}',
+                   phone_number=f'9{self.random.randrange(10 ** 9):09d}', bank_name='SBI',
+                   bank_account=f'{self.random.randrange(10 ** 11):011d}', ifsc_code='SBIN0000001',
+                   address=self.random.choice(CITIES))
+            for i in range(SIZES['vendors'])
+        ))
+        refs['contracts'] = self.insert(Contract, (
+            self._contract(refs, i) for i in range(SIZES['contracts'])
+        ))
+        self.insert(ContractMilestone, (
+            ContractMilestone(contract=contract, milestone_name=f'Milestone {m + 1}',
+                              due_date=contract.start_date + datetime.timedelta(days=90 * m),
+                              amount=self.amount(10000, 500000),
+                              status=self.random.choice(['Pending', 'Completed', 'Paid']))
+            for contract in refs['contracts'] for m in range(self.random.randint(3, 5))
+        ))
+        return refs
+
+    def _contract(self, refs, i):
+        start = self.date()
+        return Contract(
+            company=refs['company'], vendor=self.random.choice(refs['vendors']),
+            cost_centre=self.random.choice(refs['cost_centres']), entity=self.random.choice(refs['entities']),
+            description=f'Contract {i + 1}', contract_date=start, start_date=start,
+            end_date=start + datetime.timedelta(days=365),
+        )
+
+    # -- volume tables -------------------------------------------------------
+
+    def transactions(self, all_refs, total, classified_ratio):
+        """
+        Writes `total` bank transactions spread over the companies, of which
+        `classified_ratio` are split into one to three classifications.
+        """
+        def rows():
+            for _ in range(total):
+                refs = self.random.choice(all_refs)
+                transaction_type = self.random.choice(refs['transaction_types'])
+                yield Transaction(
+                    company=refs['company'], bank_account=self.random.choice(refs['banks']),
+                    cost_centre=self.random.choice(refs['cost_centres']), transaction_type=transaction_type,
+                    direction='CREDIT' if transaction_type.direction == 'Credit' else 'DEBIT',
+                    amount=self.amount(), date=self.date(), notes=self.notes(),
+                    is_classified=self.random.random() < classified_ratio,
+                )
+
+        written = 0
+        refs_by_company = {refs['company'].pk: refs for refs in all_refs}
+        batch = []
+        for row in rows():
+            batch.append(row)
+            if len(batch) >= self.batch_size:
+                written += self._transaction_batch(batch, refs_by_company)
+                batch = []
+                self.log(f"  transactions: {written}/{total}")
+        return written + self._transaction_batch(batch, refs_by_company)
+
+    def _transaction_batch(self, batch, refs_by_company):
+        created = self._flush(Transaction, batch)
+        self._flush(ClassifiedTransaction, [
+            split for txn in created if txn.is_classified
+            for split in self._splits(txn, refs_by_company[txn.company_id])
+        ])
+        return len(created)
+
+    def _splits(self, txn, refs):
+        count = self.random.choice([1, 1, 1, 2, 3])
+        remaining = txn.amount
+        for i in range(count):
+            amount = remaining if i == count - 1 else (remaining * Decimal(self.random.uniform(0.2, 0.7))).quantize(Decimal('0.01'))
+            remaining -= amount
+            yield ClassifiedTransaction(
+                transaction=txn, company_id=txn.company_id, bank_account_id=txn.bank_account_id,
+                transaction_type_id=txn.transaction_type_id, direction=txn.direction,
+                cost_centre=self.random.choice(refs['cost_centres']), entity=self.random.choice(refs['entities']),
+                contract=self.random.choice(refs['contracts']) if self.random.random() < 0.1 else None,
+                amount=amount, value_date=txn.date,
+                parent_transaction_reference=txn.notes, parent_transaction_date=txn.date,
+            )
+
+    def cash_entries(self, all_refs, total, spent_by):
+        rows = (
+            self._cash_entry(self.random.choice(all_refs), spent_by) for _ in range(total)
+        )
+        written = self.stream(CashLedgerRegister, rows, total)
+        for refs in all_refs:
+            balances.rebalance(refs['company'].pk)
+        return written
+
+    def _cash_entry(self, refs, spent_by):
+        chargeable = self.random.random() < 0.2
+        return CashLedgerRegister(
+            company=refs['company'], date=self.date(), spent_by=spent_by, created_by=spent_by,
+            cost_centre=self.random.choice(refs['cost_centres']), entity=self.random.choice(refs['entities']),
+            transaction_type=self.random.choice(refs['transaction_types']),
+            amount=self.amount(50, 50000), chargeable=chargeable,
+            margin=self.amount(10, 1000) if chargeable else None,
+            remarks=self.notes(), balance_amount=0,
+        )
+
+
+def generate(companies=5, transactions=100000, cash_entries=20000, classified_ratio=0.6,
+             seed=0, batch_size=BATCH_SIZE, years=3, log=None):
+    """
+    Generates a dataset and returns {model label: rows written}.
+    """
+    generator = Generator(seed=seed, batch_size=batch_size, years=years, log=log)
+    log = generator.log
+
+    log(f"Creating {companies} companies and their reference data...")
+    created = generator.companies(companies)
+    admin = generator.users(created)
+    all_refs = [generator.references(company) for company in created]
+
+    log(f"Creating {transactions} transactions...")
+    generator.transactions(all_refs, transactions, classified_ratio)
+
+    log(f"Creating {cash_entries} cash ledger entries...")
+    generator.cash_entries(all_refs, cash_entries, admin)
+
+    return generator.counts
@@ -0,0 +1,43 @@
+import io
+import json
+import tempfile
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from transactions.models import Transaction, ClassifiedTransaction
+from cash_ledger.models import CashBalanceHead
+from dashboard import counters
+from . import suite, synthetic
+
+
+class SyntheticDataTests(TestCase):
+
+    def test_generated_data_is_consistent(self):
+        synthetic.generate(companies=2, transactions=300, cash_entries=50, batch_size=100)
+
+        self.assertEqual(Transaction.objects.count(), 300)
+        classified = Transaction.objects.filter(is_classified=True)
+        self.assertEqual(
+            ClassifiedTransaction.objects.values('transaction').distinct().count(), classified.count()
+        )
+        for txn in classified[:20]:
+            self.assertEqual(sum(split.amount for split in txn.classifications.all()), txn.amount)
+        self.assertEqual(counters.read()['transactions']['total'], 300)
+        self.assertEqual(CashBalanceHead.objects.exclude(last_entry=None).count(), 2)
+
+    def test_benchmarks_write_a_baseline(self):
+        synthetic.generate(companies=1, transactions=100, cash_entries=20, batch_size=50)
+
+        with tempfile.NamedTemporaryFile(suffix='.json') as output:
+            call_command('run_benchmarks', iterations=1, warmup=0, upload_rows=5, output=output.name, stdout=io.StringIO())
+            baseline = json.load(open(output.name))
+
+        self.assertEqual(set(baseline['results']), {benchmark.name for benchmark in suite.BENCHMARKS})
+        for name, result in baseline['results'].items():
+            self.assertTrue(all(status < 400 for status in result['status']), name)
+        # Write benchmarks are rolled back.
+        self.assertEqual(Transaction.objects.count(), 100)
+
+        lines, regressions = suite.compare(baseline, baseline, max_regression=0.1)
+        self.assertEqual(regressions, [])
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import CashLedgerRegister
+from .models import CashLedgerRegister, CashBalanceHead
 
 @admin.register(CashLedgerRegister)
 class CashLedgerRegisterAdmin(admin.ModelAdmin):
@@ -18,3 +18,9 @@ class CashLedgerRegisterAdmin(admin.ModelAdmin):
         Disable hard delete from admin to preserve soft delete policy.
         """
         return False
+
+
+@admin.register(CashBalanceHead)
+class CashBalanceHeadAdmin(admin.ModelAdmin):
+    list_display = ('company', 'balance', 'last_date', 'last_entry', 'updated_on')
+    readonly_fields = ('company', 'balance', 'last_date', 'last_entry', 'updated_on')
@@ -0,0 +1,144 @@
+"""
+Running balances for the cash ledger.
+
+balance_amount on each active entry is the company's opening balance (0)
+minus the effective amounts of every active entry up to and including it,
+in (date, id) order. Appends at the tail are O(1) against CashBalanceHead;
+back-dated entries, edits and deactivations re-flow only the rows from the
+changed date onward with a single window-function UPDATE.
+"""
+from django.db import connection, transaction as db_transaction
+
+from .models import CashLedgerRegister, CashBalanceHead
+
+REBALANCE_SQL = """
+    WITH opening AS (
+        SELECT balance_amount
+        FROM {table}
+        WHERE company_id = %(company)s AND is_active AND date < %(from_date)s
+        ORDER BY date DESC, id DESC
+        LIMIT 1
+    ),
+    running AS (
+        SELECT
+            id,
+            COALESCE((SELECT balance_amount FROM opening), 0) - SUM(
+                CASE WHEN chargeable THEN amount - COALESCE(margin, 0) ELSE amount END
+            ) OVER (ORDER BY date, id ROWS UNBOUNDED PRECEDING) AS balance
+        FROM {table}
+        WHERE company_id = %(company)s AND is_active AND date >= %(from_date)s
+    )
+    UPDATE {table} AS entry
+    SET balance_amount = running.balance
+    FROM running
+    WHERE entry.id = running.id AND entry.balance_amount IS DISTINCT FROM running.balance
+"""
+
+
+def effective_amount(amount, chargeable, margin):
+    return amount - margin if chargeable and margin else amount
+
+
+def lock_head(company_id):
+    """
+    Returns the company's balance head locked for update, creating it from
+    the current tail entry the first time.
+    """
+    head, _ = CashBalanceHead.objects.select_for_update().get_or_create(
+        company_id=company_id, defaults=_tail_values(company_id)
+    )
+    return head
+
+
+@db_transaction.atomic
+def record_entry(serializer, company, **fields):
+    """
+    Saves a new entry with its running balance while holding the company's
+    head lock.
+    """
+    head = lock_head(company.pk)
+    data = serializer.validated_data
+    amount = effective_amount(data['amount'], data.get('chargeable', False), data.get('margin'))
+
+    entry = serializer.save(company=company, balance_amount=head.balance - amount, **fields)
+
+    if head.last_date is None or entry.date >= head.last_date:
+        head.balance = entry.balance_amount
+        head.last_date = entry.date
+        head.last_entry = entry
+        head.save()
+    else:
+        # Back-dated: every later entry moves by the same amount.
+        rebalance(company.pk, entry.date)
+        entry.refresh_from_db(fields=['balance_amount'])
+    return entry
+
+
+@db_transaction.atomic
+def update_entry(serializer):
+    """
+    Saves an edit and re-flows balances from the earlier of the old and new
+    dates, in the old and new company if the entry moved.
+    """
+    entry = serializer.instance
+    before = {entry.company_id: entry.date}
+    for company_id in sorted(before.keys() | {serializer.validated_data.get('company', entry.company).pk}):
+        lock_head(company_id)
+
+    entry = serializer.save()
+    before[entry.company_id] = min(before.get(entry.company_id, entry.date), entry.date)
+    for company_id, from_date in before.items():
+        rebalance(company_id, from_date)
+    entry.refresh_from_db(fields=['balance_amount'])
+    return entry
+
+
+@db_transaction.atomic
+def deactivate_entry(entry):
+    """
+    Soft-deletes an entry and re-flows the balances after it.
+    """
+    lock_head(entry.company_id)
+    entry.is_active = False
+    entry.save()
+    rebalance(entry.company_id, entry.date)
+
+
+def rebalance(company_id, from_date=None):
+    """
+    Recomputes balance_amount for the company's active entries dated on or
+    after `from_date` (all entries if None) and refreshes the head.
+
+    Returns the number of rows whose balance changed.
+    """
+    with db_transaction.atomic():
+        head = lock_head(company_id)
+        if from_date is None:
+            from_date = CashLedgerRegister.objects.filter(company_id=company_id).order_by('date').values_list('date', flat=True).first()
+
+        changed = 0
+        if from_date is not None:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    REBALANCE_SQL.format(table=connection.ops.quote_name(CashLedgerRegister._meta.db_table)),
+                    {'company': company_id, 'from_date': from_date}
+                )
+                changed = cursor.rowcount
+
+        for name, value in _tail_values(company_id).items():
+            setattr(head, name, value)
+        head.save()
+    return changed
+
+
+def _tail_values(company_id):
+    last = (
+        CashLedgerRegister.objects
+        .filter(company_id=company_id, is_active=True)
+        .order_by('-date', '-id')
+        .values('id', 'date', 'balance_amount')
+        .first()
+    )
+    if not last:
+        return {'balance': 0, 'last_date': None, 'last_entry_id': None}
+    return {'balance': last['balance_amount'], 'last_date': last['date'], 'last_entry_id': last['id']}
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from cash_ledger import balances
+from cash_ledger.models import CashLedgerRegister
+
+
+class Command(BaseCommand):
+    help = "Recomputes cash ledger running balances and balance heads."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--company', type=int, action='append',
+                            help='Company id to rebalance (repeatable). Defaults to every company with entries.')
+
+    def handle(self, *args, **options):
+        company_ids = options['company'] or (
+            CashLedgerRegister.objects.order_by().values_list('company_id', flat=True).distinct()
+        )
+        for company_id in company_ids:
+            changed = balances.rebalance(company_id)
+            self.stdout.write(f"company={company_id}: {changed} balances corrected.")
+        self.stdout.write(self.style.SUCCESS("Cash ledger balances are up to date."))
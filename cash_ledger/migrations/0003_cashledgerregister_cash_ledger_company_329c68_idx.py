@@ -0,0 +1,25 @@
+# Generated by Django 5.2.4 on 2026-10-18 10:43
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0001_initial'),
+        ('cash_ledger', '0002_cashledgerregister_document'),
+        ('companies', '0002_company_is_active'),
+        ('contracts', '0003_remove_contract_asset'),
+        ('cost_centres', '0001_initial'),
+        ('entities', '0001_initial'),
+        ('transaction_types', '0002_transactiontype_is_credit'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cashledgerregister',
+            index=models.Index(fields=['company', 'is_active', '-date', '-id'], name='cash_ledger_company_329c68_idx'),
+        ),
+    ]
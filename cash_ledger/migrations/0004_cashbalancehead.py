@@ -0,0 +1,52 @@
+# Generated by Django 5.2.4 on 2026-10-18 10:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def create_heads(apps, schema_editor):
+    """
+    Seeds one head per company from its current last active entry. Existing
+    balances are left as they are; run rebalance_cash_ledger to re-flow them.
+    """
+    CashLedgerRegister = apps.get_model('cash_ledger', 'CashLedgerRegister')
+    CashBalanceHead = apps.get_model('cash_ledger', 'CashBalanceHead')
+
+    tails = (
+        CashLedgerRegister.objects
+        .filter(is_active=True)
+        .order_by('company_id', '-date', '-id')
+        .distinct('company_id')
+        .values('company_id', 'id', 'date', 'balance_amount')
+    )
+    CashBalanceHead.objects.bulk_create([
+        CashBalanceHead(
+            company_id=tail['company_id'],
+            balance=tail['balance_amount'],
+            last_date=tail['date'],
+            last_entry_id=tail['id'],
+        )
+        for tail in tails
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cash_ledger', '0003_cashledgerregister_cash_ledger_company_329c68_idx'),
+        ('companies', '0002_company_is_active'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CashBalanceHead',
+            fields=[
+                ('company', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='cash_balance_head', serialize=False, to='companies.company')),
+                ('balance', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('last_date', models.DateField(blank=True, null=True)),
+                ('updated_on', models.DateTimeField(auto_now=True)),
+                ('last_entry', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='cash_ledger.cashledgerregister')),
+            ],
+        ),
+        migrations.RunPython(create_heads, migrations.RunPython.noop),
+    ]
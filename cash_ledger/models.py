@@ -29,5 +29,28 @@ class CashLedgerRegister(models.Model):
     company = models.ForeignKey(Company, on_delete=models.CASCADE)
     is_active = models.BooleanField(default=True) 
 
+    class Meta:
+        indexes = [
+            # Keyset pagination and "last entry" lookups per company.
+            models.Index(fields=['company', 'is_active', '-date', '-id']),
+        ]
+
     def __str__(self):
         return f"Cash Entry on {self.date} - ₹{self.amount}"
+
+
+class CashBalanceHead(models.Model):
+    """
+    Running cash balance per company, as of the latest active entry.
+
+    Writers lock this row with select_for_update, so concurrent entries for
+    one company are serialized while other companies proceed in parallel.
+    """
+    company = models.OneToOneField(Company, on_delete=models.CASCADE, primary_key=True, related_name='cash_balance_head')
+    balance = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    last_date = models.DateField(null=True, blank=True)
+    last_entry = models.ForeignKey(CashLedgerRegister, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    updated_on = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.company} cash balance ₹{self.balance}"
@@ -11,6 +11,8 @@ class CashLedgerRegisterSerializer(serializers.ModelSerializer):
     class Meta:
         model = CashLedgerRegister
         fields = '__all__'  # Includes all model fields + computed fields
+        # Maintained by cash_ledger.balances, never taken from the client.
+        read_only_fields = ['balance_amount']
 
     def get_document_url(self, obj):
         """
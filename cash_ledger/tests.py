@@ -1,3 +1,155 @@
+import csv
+import datetime
+import importlib.util
+import io
+import unittest
+from decimal import Decimal
+
+from django.core.management import call_command
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from companies.models import Company
+from cost_centres.models import CostCentre
+from entities.models import Entity
+from transaction_types.models import TransactionType
+from users.models import User
+from .models import CashLedgerRegister, CashBalanceHead
+
+
+class CashLedgerTestCase(TestCase):
+
+    def setUp(self):
+        self.company = Company.objects.create(name='Acme', pan='AAAAA0000A')
+        self.other_company = Company.objects.create(name='Globex', pan='BBBBB0000B')
+        self.user = User.objects.create_user(user_id='admin', password='x', role='SUPER_USER', full_name='Admin')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def post(self, day, amount, company=None, **fields):
+        company = company or self.company
+        cost_centre, _ = CostCentre.objects.get_or_create(company=company, name='Admin')
+        entity, _ = Entity.objects.get_or_create(company=company, name='Office', entity_type='Internal')
+        transaction_type, _ = TransactionType.objects.get_or_create(company=company, name='Petty cash')
+        response = self.client.post('/api/cash-ledger/', {
+            'company': company.pk, 'date': datetime.date(2025, 4, day), 'amount': amount,
+            'cost_centre': cost_centre.pk, 'entity': entity.pk, 'transaction_type': transaction_type.pk,
+            **fields,
+        }, format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        return CashLedgerRegister.objects.get(pk=response.data['id'])
+
+
+class RunningBalanceTests(CashLedgerTestCase):
+    """
+    Stored balances are compared with the running sum recomputed in Python.
+    """
+
+    def assertBalancesAreRunningSums(self, company=None):
+        company = company or self.company
+        balance, expected, last = Decimal('0'), {}, None
+        for entry in CashLedgerRegister.objects.filter(company=company, is_active=True).order_by('date', 'id'):
+            balance -= entry.amount - entry.margin if entry.chargeable and entry.margin else entry.amount
+            expected[entry.pk] = balance
+            last = entry
+        stored = dict(
+            CashLedgerRegister.objects.filter(company=company, is_active=True).values_list('id', 'balance_amount')
+        )
+        self.assertEqual(stored, expected)
+
+        head = CashBalanceHead.objects.get(company=company)
+        self.assertEqual((head.balance, head.last_entry_id), (balance, last.pk if last else None))
+
+    def test_appended_and_back_dated_entries(self):
+        for day, amount in [(1, '100.00'), (3, '50.00'), (5, '25.00')]:
+            self.post(day, amount)
+        self.post(2, '40.00', chargeable=True, margin='10.00')
+        self.post(2, '5.00', company=self.other_company)
+
+        self.assertBalancesAreRunningSums()
+        self.assertBalancesAreRunningSums(self.other_company)
+        self.assertEqual(CashBalanceHead.objects.get(company=self.company).balance, Decimal('-205.00'))
+
+    def test_back_dated_edit(self):
+        entries = [self.post(day, '10.00') for day in (1, 2, 3, 4)]
+
+        response = self.client.patch(
+            f'/api/cash-ledger/{entries[3].pk}/', {'date': '2025-04-01', 'amount': '70.00'}, format='json'
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertBalancesAreRunningSums()
+
+        # Moving an entry to another company re-flows both ledgers.
+        self.post(1, '1.00', company=self.other_company)
+        response = self.client.patch(
+            f'/api/cash-ledger/{entries[1].pk}/', {'company': self.other_company.pk}, format='json'
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertBalancesAreRunningSums()
+        self.assertBalancesAreRunningSums(self.other_company)
+
+    def test_deactivation(self):
+        entries = [self.post(day, '10.00') for day in (1, 2, 3)]
+
+        self.assertEqual(self.client.delete(f'/api/cash-ledger/{entries[1].pk}/').status_code, 204)
+        self.assertBalancesAreRunningSums()
+
+        self.client.delete(f'/api/cash-ledger/{entries[2].pk}/')
+        self.assertBalancesAreRunningSums()
+        self.assertEqual(CashBalanceHead.objects.get(company=self.company).last_entry, entries[0])
+
+    def test_rebalance_command_repairs_drifted_balances(self):
+        for day in (1, 2, 3):
+            self.post(day, '10.00')
+        self.post(1, '3.00', company=self.other_company)
+        CashLedgerRegister.objects.update(balance_amount=0)
+        CashBalanceHead.objects.update(balance=0)
+
+        out = io.StringIO()
+        call_command('rebalance_cash_ledger', '--company', str(self.company.pk), stdout=out)
+
+        self.assertIn(f'company={self.company.pk}: 3 balances corrected.', out.getvalue())
+        self.assertBalancesAreRunningSums()
+        self.assertEqual(CashLedgerRegister.objects.get(company=self.other_company).balance_amount, 0)
+
+        call_command('rebalance_cash_ledger', stdout=out)
+        self.assertBalancesAreRunningSums(self.other_company)
+
+
+class ExportTests(CashLedgerTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.post(1, '100.00', remarks='Stationery')
+        self.post(2, '40.00', chargeable=True, margin='10.00')
+
+    def export(self, **params):
+        response = self.client.get('/api/cash-ledger/export/', params)
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content)
+
+    def test_csv_header_and_rows(self):
+        header, *rows = csv.reader(io.StringIO(self.export().decode()))
+
+        self.assertEqual(header, [
+            'Date', 'Spent By', 'Cost Centre', 'Entity', 'Transaction Type',
+            'Amount', 'Chargeable', 'Margin', 'Balance', 'Remarks',
+        ])
+        self.assertEqual(sorted(rows), [
+            ['2025-04-01', '', 'Admin', 'Office', 'Petty cash', '100.00', 'No', '', '-100.00', 'Stationery'],
+            ['2025-04-02', '', 'Admin', 'Office', 'Petty cash', '40.00', 'Yes', '10.00', '-130.00', ''],
+        ])
+
+    @unittest.skipUnless(importlib.util.find_spec('pyarrow'), 'pyarrow is not installed')
+    def test_parquet_keeps_dates_and_decimals(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        table = pq.read_table(io.BytesIO(self.export(format='parquet')))
 
-# Create your tests here.
+        self.assertEqual(table.schema.field('date').type, pa.date32())
+        self.assertEqual(table.schema.field('amount').type, pa.decimal128(12, 2))
+        self.assertEqual(table.schema.field('chargeable').type, pa.bool_())
+        self.assertEqual(
+            sorted(table.column('balance').to_pylist()), [Decimal('-130.00'), Decimal('-100.00')]
+        )
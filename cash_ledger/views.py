@@ -2,31 +2,27 @@ from rest_framework import viewsets, permissions, filters, status, serializers
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
-from django.http import HttpResponse
-import csv
 
-from .models import CashLedgerRegister
+from igen.exports import stream_csv, columnar_export, ColumnarRenderer, EXPORT_RENDERERS, EXPORT_CHUNK_SIZE
+
+from companies.models import Company
+from igen.tenancy import TenantScopedMixin
+
+from . import balances
+from .models import CashLedgerRegister, CashBalanceHead
 from .serializers import CashLedgerRegisterSerializer
 
-class CashLedgerRegisterViewSet(viewsets.ModelViewSet):
+class CashLedgerRegisterViewSet(TenantScopedMixin, viewsets.ModelViewSet):
     serializer_class = CashLedgerRegisterSerializer
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['company', 'cost_centre', 'entity', 'transaction_type', 'spent_by', 'chargeable', 'is_active']
     search_fields = ['remarks']
     ordering_fields = ['date', 'amount']
+    cursor_ordering = ('-date', '-id')
 
     def get_queryset(self):
-        user = self.request.user
-
-        if user.role == 'SUPER_USER':
-            return CashLedgerRegister.objects.filter(is_active=True).order_by('-date', '-id')
-
-        company = user.companies.first()
-        if not company:
-            return CashLedgerRegister.objects.none()
-
-        return CashLedgerRegister.objects.filter(company=company, is_active=True).order_by('-date', '-id')
+        return self.scope_to_tenant(CashLedgerRegister.objects.filter(is_active=True)).order_by('-date', '-id')
 
     def get_serializer_context(self):
         context = super().get_serializer_context()
@@ -41,76 +37,86 @@ class CashLedgerRegisterViewSet(viewsets.ModelViewSet):
             if not company:
                 raise serializers.ValidationError("Super User must specify company explicitly.")
         else:
-            company = user.companies.first()
+            company = Company.objects.filter(pk=self.default_company_id).first()
             if not company:
                 raise serializers.ValidationError("User is not linked to any company.")
 
-        last_entry = CashLedgerRegister.objects.filter(company=company, is_active=True).order_by('-date', '-id').first()
-        previous_balance = last_entry.balance_amount if last_entry else 0
-
-        amount = serializer.validated_data['amount']
-        chargeable = serializer.validated_data.get('chargeable', False)
-        margin = serializer.validated_data.get('margin') or 0
+        balances.record_entry(serializer, company, created_by=user, is_active=True)
 
-        effective_amount = amount - margin if chargeable and margin else amount
-        new_balance = previous_balance - effective_amount
-
-        serializer.save(
-            created_by=user,
-            company=company,
-            balance_amount=new_balance,
-            is_active=True
-        )
+    def perform_update(self, serializer):
+        balances.update_entry(serializer)
 
     def destroy(self, request, *args, **kwargs):
         """
         Soft delete (deactivate) a cash ledger entry.
         """
         entry = self.get_object()
-        entry.is_active = False
-        entry.save()
+        balances.deactivate_entry(entry)
         return Response({"detail": "Entry deactivated successfully."}, status=status.HTTP_204_NO_CONTENT)
 
     @action(detail=False, methods=['get'], url_path='balance')
     def get_current_balance(self, request):
-        user = request.user
-
-        if user.role == 'SUPER_USER':
-            last_entry = CashLedgerRegister.objects.filter(is_active=True).order_by('-date', '-id').first()
+        # One indexed row per company instead of scanning the ledger.
+        if self.company_ids is None:
+            head = CashBalanceHead.objects.filter(last_date__isnull=False).order_by('-last_date', '-last_entry_id').first()
         else:
-            company = user.companies.first()
-            if not company:
+            company_id = self.default_company_id
+            if not company_id:
                 return Response({"current_balance": 0})
-            last_entry = CashLedgerRegister.objects.filter(company=company, is_active=True).order_by('-date', '-id').first()
+            head = CashBalanceHead.objects.filter(company_id=company_id).first()
 
-        balance = last_entry.balance_amount if last_entry else 0
+        balance = head.balance if head else 0
         return Response({"current_balance": balance})
 
-    @action(detail=False, methods=['get'], url_path='export')
+    @action(detail=False, methods=['get'], url_path='export', renderer_classes=EXPORT_RENDERERS)
     def export_to_csv(self, request):
+        """
+        Streams the filtered cash ledger as CSV from a server-side cursor,
+        joining spent_by/cost centre/entity/type names in the same query.
+        ?format=parquet or ?format=arrow returns a typed columnar file instead.
+        """
         queryset = self.filter_queryset(self.get_queryset())
 
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = 'attachment; filename="cash_ledger_export.csv"'
-
-        writer = csv.writer(response)
-        writer.writerow([
-            'Date', 'Spent By', 'Cost Centre', 'Entity', 'Transaction Type',
-            'Amount', 'Chargeable', 'Margin', 'Balance', 'Remarks'
-        ])
-
-        for obj in queryset:
-            writer.writerow([
-                obj.date,
-                obj.spent_by.full_name if obj.spent_by else '',
-                obj.cost_centre.name if obj.cost_centre else '',
-                obj.entity.name if obj.entity else '',
-                obj.transaction_type.name if obj.transaction_type else '',
-                obj.amount,
-                'Yes' if obj.chargeable else 'No',
-                obj.margin or '',
-                obj.balance_amount,
-                obj.remarks or ''
-            ])
-
-        return response
+        if isinstance(request.accepted_renderer, ColumnarRenderer):
+            return columnar_export(queryset, [
+                ('date', 'date'),
+                ('spent_by', 'spent_by__full_name'),
+                ('cost_centre', 'cost_centre__name'),
+                ('entity', 'entity__name'),
+                ('transaction_type', 'transaction_type__name'),
+                ('amount', 'amount'),
+                ('chargeable', 'chargeable'),
+                ('margin', 'margin'),
+                ('balance', 'balance_amount'),
+                ('remarks', 'remarks'),
+            ], request.accepted_renderer, 'cash_ledger_export')
+
+        rows = queryset.values_list(
+            'date', 'spent_by__full_name', 'cost_centre__name', 'entity__name',
+            'transaction_type__name', 'amount', 'chargeable', 'margin',
+            'balance_amount', 'remarks'
+        ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+        return stream_csv(
+            [
+                'Date', 'Spent By', 'Cost Centre', 'Entity', 'Transaction Type',
+                'Amount', 'Chargeable', 'Margin', 'Balance', 'Remarks'
+            ],
+            (
+                [
+                    date,
+                    spent_by or '',
+                    cost_centre or '',
+                    entity or '',
+                    transaction_type or '',
+                    amount,
+                    'Yes' if chargeable else 'No',
+                    margin or '',
+                    balance_amount,
+                    remarks or ''
+                ]
+                for date, spent_by, cost_centre, entity, transaction_type, amount,
+                chargeable, margin, balance_amount, remarks in rows
+            ),
+            'cash_ledger_export.csv',
+        )
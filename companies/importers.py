@@ -0,0 +1,19 @@
+from import_jobs.results import collect_row_results
+from .serializers import CompanySerializer
+
+
+def import_company_rows(rows):
+    """
+    Creates one company per CSV row, yielding (row_number, row, errors).
+    """
+    for i, row in enumerate(rows, start=1):
+        serializer = CompanySerializer(data=row)
+        if serializer.is_valid():
+            serializer.save()
+            yield i, row, None
+        else:
+            yield i, row, serializer.errors
+
+
+def import_job_results(reader, max_errors=None):
+    return collect_row_results(import_company_rows(reader), max_errors=max_errors)
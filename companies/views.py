@@ -5,18 +5,21 @@ from rest_framework.permissions import IsAuthenticated
 from .models import Company, CompanyDocument
 from .serializers import CompanySerializer, CompanyDocumentSerializer
 from users.permissions import IsSuperUser
+from igen.tenancy import TenantScopedMixin
+from import_jobs.views import queue_import
+from .importers import import_company_rows
+from monitoring.metrics import record_import
+import time
 
-class CompanyViewSet(viewsets.ModelViewSet):
+class CompanyViewSet(TenantScopedMixin, viewsets.ModelViewSet):
     serializer_class = CompanySerializer
     permission_classes = [IsAuthenticated]  # ✅ Allow authenticated users with role logic
+    tenant_field = 'pk'
 
     def get_queryset(self):
-        user = self.request.user
-        if user.role == 'SUPER_USER':
+        if self.request.user.role == 'PROPERTY_MANAGER':
             return Company.objects.all()
-        elif user.role == 'PROPERTY_MANAGER':
-            return Company.objects.all()
-        return Company.objects.filter(id__in=user.companies.values_list('id', flat=True))
+        return self.scope_to_tenant(Company.objects.all())
 
     def destroy(self, request, *args, **kwargs):
         """
@@ -47,17 +50,20 @@ class CompanyViewSet(viewsets.ModelViewSet):
         if not file:
             return Response({'error': 'No file uploaded'}, status=status.HTTP_400_BAD_REQUEST)
 
+        if request.query_params.get('async') == 'true':
+            return queue_import(request, 'companies', file)
+
         import csv
         decoded_file = file.read().decode('utf-8').splitlines()
         reader = csv.DictReader(decoded_file)
         results = []
-        for i, row in enumerate(reader, start=1):
-            serializer = CompanySerializer(data=row)
-            if serializer.is_valid():
-                serializer.save()
-                results.append({'row': i, 'status': 'success'})
+        started = time.perf_counter()
+        for i, row, errors in import_company_rows(reader):
+            if errors:
+                results.append({'row': i, 'status': 'error', 'errors': errors})
             else:
-                results.append({'row': i, 'status': 'error', 'errors': serializer.errors})
+                results.append({'row': i, 'status': 'success'})
+        record_import('companies', 'sync', len(results), time.perf_counter() - started)
 
         return Response({'results': results})
 
@@ -6,6 +6,7 @@ from django.db.models import JSONField
 
 from .models import Contact
 from .serializers import ContactSerializer
+from igen.tenancy import TenantScopedMixin
 
 
 class ContactFilter(FilterSet):
@@ -25,7 +26,7 @@ class ContactFilter(FilterSet):
         return queryset.filter(**{f"{name}__icontains": value})
 
 
-class ContactViewSet(viewsets.ModelViewSet):
+class ContactViewSet(TenantScopedMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing Contact data with filtering and search capabilities.
     """
@@ -38,11 +39,7 @@ class ContactViewSet(viewsets.ModelViewSet):
     ordering_fields = ['created_at', 'full_name']
 
     def get_queryset(self):
-        user = self.request.user
-        qs = Contact.objects.filter(is_active=True).order_by('-created_at')
-        if user.role == 'SUPER_USER':
-            return qs
-        return qs.filter(company__in=user.companies.all())
+        return self.scope_to_tenant(Contact.objects.filter(is_active=True)).order_by('-created_at')
 
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
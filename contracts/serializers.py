@@ -1,4 +1,6 @@
 from rest_framework import serializers
+from companies.models import Company
+from igen import tenancy
 from .models import Contract, ContractMilestone
 
 class ContractMilestoneSerializer(serializers.ModelSerializer):
@@ -44,21 +46,21 @@ class ContractSerializer(serializers.ModelSerializer):
         super().__init__(*args, **kwargs)
         request = self.context.get("request")
         if request and hasattr(request, "user"):
-            user = request.user
-            if user.role != "SUPER_USER":
+            company_ids = tenancy.company_ids(request)
+            if company_ids is not None:
                 self.fields["company"] = serializers.PrimaryKeyRelatedField(
-                    queryset=user.companies.all(),
+                    queryset=Company.objects.filter(pk__in=company_ids),
                     required=True
                 )
             else:
                 self.fields["company"] = serializers.PrimaryKeyRelatedField(
-                    queryset=Contract._meta.get_field('company').remote_field.model.objects.all(),
+                    queryset=Company.objects.all(),
                     required=True
                 )
 
     def validate_company(self, value):
-        user = self.context["request"].user
-        if user.role != "SUPER_USER" and value not in user.companies.all():
+        company_ids = tenancy.company_ids(self.context["request"])
+        if company_ids is not None and value.pk not in company_ids:
             raise serializers.ValidationError("You are not authorized to create contracts under this company.")
         return value
 
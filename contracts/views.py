@@ -6,32 +6,29 @@ from django.http import FileResponse
 from django.shortcuts import get_object_or_404
 from .models import Contract, ContractMilestone
 from .serializers import ContractSerializer, ContractMilestoneSerializer
+from igen.tenancy import TenantScopedMixin
 import os
 
 
-class ContractViewSet(viewsets.ModelViewSet):
+class ContractViewSet(TenantScopedMixin, viewsets.ModelViewSet):
     serializer_class = ContractSerializer
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        user = self.request.user
-        if user.role == 'SUPER_USER':
-            return Contract.objects.filter(is_active=True)
-        return Contract.objects.filter(company__in=user.companies.all(), is_active=True)
+        return self.scope_to_tenant(Contract.objects.filter(is_active=True))
 
     def create(self, request, *args, **kwargs):
-        user = request.user
         data = request.data.copy()
 
         # Ensure company is set properly
-        if user.role != 'SUPER_USER':
-            company = user.companies.first()
-            if not company:
+        if self.company_ids is not None:
+            company_id = self.default_company_id
+            if not company_id:
                 return Response(
                     {'company': ['User is not linked to any company.']},
                     status=status.HTTP_400_BAD_REQUEST
                 )
-            data['company'] = company.id
+            data['company'] = company_id
 
         serializer = self.get_serializer(data=data, context={'request': request})
         serializer.is_valid(raise_exception=True)
@@ -3,17 +3,17 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from .models import CostCentre
 from .serializers import CostCentreSerializer
+from igen.tenancy import TenantScopedMixin
 
 
-class CostCentreViewSet(viewsets.ModelViewSet):
+class CostCentreViewSet(TenantScopedMixin, viewsets.ModelViewSet):
     serializer_class = CostCentreSerializer
     permission_classes = [IsAuthenticated]  # ✅ Allow all authenticated users
 
     def get_queryset(self):
-        user = self.request.user
-        if user.role == 'SUPER_USER':
+        if self.company_ids is None:
             return CostCentre.objects.all()
-        return CostCentre.objects.filter(company__in=user.companies.all(), is_active=True)
+        return self.scope_to_tenant(CostCentre.objects.filter(is_active=True))
 
     def create(self, request, *args, **kwargs):
         if request.user.role != 'SUPER_USER':
@@ -0,0 +1,9 @@
+from django.contrib import admin
+from .models import DashboardCounter
+
+
+@admin.register(DashboardCounter)
+class DashboardCounterAdmin(admin.ModelAdmin):
+    list_display = ('name', 'company', 'total', 'active', 'updated_at')
+    list_filter = ('name',)
+    readonly_fields = ('company', 'name', 'total', 'active', 'updated_at')
@@ -0,0 +1,186 @@
+"""
+Per-company dashboard counters.
+
+Each counted model has one DashboardCounter row per company holding its
+total and active (not soft-deleted) row counts. Signals apply +/- deltas on
+create, delete, company moves and soft-delete flips, so the dashboard reads
+a handful of indexed rows instead of counting every table. `rebuild()`
+recomputes everything from the base tables.
+"""
+import threading
+from collections import defaultdict
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction as db_transaction
+from django.db.models import Count, F, Q, Sum
+
+from .models import DashboardCounter
+
+GENERATION_KEY = 'dashboard_stats:generation'
+DEFAULT_CACHE_SECONDS = 30
+
+
+class Counted:
+    """
+    How one model is counted: which attribute holds its company and which
+    field/value marks a row as active (None if rows are never soft-deleted).
+    """
+
+    def __init__(self, name, model, company_attr='company_id', active_field='is_active', active_value=True):
+        self.name = name
+        self.model_label = model
+        self.company_attr = company_attr
+        self.active_field = active_field
+        self.active_value = active_value
+
+    @property
+    def model(self):
+        return apps.get_model(self.model_label)
+
+    def state(self, instance):
+        """
+        (company_id, is_active) for an instance, or None if either field was
+        deferred when it was loaded.
+        """
+        deferred = instance.get_deferred_fields()
+        if self.company_attr in deferred or (self.active_field and self.active_field in deferred):
+            return None
+        company_id = instance.pk if self.company_attr == 'pk' else getattr(instance, self.company_attr)
+        active = True if self.active_field is None else getattr(instance, self.active_field) == self.active_value
+        return company_id, active
+
+    def active_q(self, prefix=''):
+        if self.active_field is None:
+            return Q()
+        return Q(**{f'{prefix}{self.active_field}': self.active_value})
+
+
+# Keys are the dashboard's `total_<name>` fields. Users are handled separately.
+COUNTED = [
+    Counted('companies', 'companies.Company', company_attr='pk'),
+    Counted('projects', 'projects.Project'),
+    Counted('properties', 'properties.Property'),
+    Counted('assets', 'assets.Asset'),
+    Counted('contacts', 'contacts.Contact'),
+    Counted('cost_centres', 'cost_centres.CostCentre'),
+    Counted('banks', 'banks.BankAccount'),
+    Counted('vendors', 'vendors.Vendor'),
+    Counted('transaction_types', 'transaction_types.TransactionType', active_field='status', active_value='Active'),
+    Counted('transactions', 'transactions.Transaction', active_field=None),
+]
+USERS = 'users'
+NAMES = [USERS] + [counted.name for counted in COUNTED]
+
+
+def apply_deltas(deltas):
+    """
+    Applies {(company_id, name): (total_delta, active_delta)} atomically.
+    Rows are created on first increment; decrements never create rows, so a
+    company being deleted (which cascades its counters) is left alone.
+    """
+    deltas = {key: value for key, value in deltas.items() if value != (0, 0)}
+    if not deltas:
+        return
+
+    with db_transaction.atomic():
+        for (company_id, name), (total, active) in sorted(deltas.items(), key=lambda item: (item[0][0] or 0, item[0][1])):
+            rows = DashboardCounter.objects.filter(company_id=company_id, name=name) if company_id else \
+                DashboardCounter.objects.filter(company__isnull=True, name=name)
+            if rows.update(total=F('total') + total, active=F('active') + active) or total <= 0:
+                continue
+            try:
+                with db_transaction.atomic():
+                    DashboardCounter.objects.create(company_id=company_id, name=name, total=total, active=active)
+            except IntegrityError:
+                # Created concurrently; fall back to the increment.
+                rows.update(total=F('total') + total, active=F('active') + active)
+
+    db_transaction.on_commit(_bump_generation)
+
+
+def _bump_generation():
+    cache.add(GENERATION_KEY, 0, None)
+    try:
+        cache.incr(GENERATION_KEY)
+    except ValueError:
+        cache.set(GENERATION_KEY, 1, None)
+
+
+def rebuild(registry=apps):
+    """
+    Recomputes every counter from the base tables. Returns the row count.
+    `registry` lets the initial migration run this against historical models.
+    """
+    counter_model = registry.get_model('dashboard', 'DashboardCounter')
+    rows = []
+    for counted in COUNTED:
+        group_by = 'pk' if counted.company_attr == 'pk' else counted.company_attr
+        for row in registry.get_model(counted.model_label).objects.order_by().values(group_by).annotate(
+            total=Count('pk'), active=Count('pk', filter=counted.active_q())
+        ):
+            rows.append(counter_model(company_id=row[group_by], name=counted.name, total=row['total'], active=row['active']))
+
+    user_model = registry.get_model(settings.AUTH_USER_MODEL)
+    link_field = user_model.companies.field.m2m_field_name()
+    links = user_model.companies.through.objects.order_by().values('company_id').annotate(
+        total=Count('pk'), active=Count('pk', filter=Q(**{f'{link_field}__is_active': True}))
+    )
+    for row in links:
+        rows.append(counter_model(company_id=row['company_id'], name=USERS, total=row['total'], active=row['active']))
+    everyone = user_model.objects.aggregate(total=Count('pk'), active=Count('pk', filter=Q(is_active=True)))
+    rows.append(counter_model(company=None, name=USERS, total=everyone['total'], active=everyone['active']))
+
+    with db_transaction.atomic():
+        counter_model.objects.all().delete()
+        counter_model.objects.bulk_create(rows)
+    db_transaction.on_commit(_bump_generation)
+    return len(rows)
+
+
+def read(company_ids=None):
+    """
+    Returns {name: {"total": n, "active": n}} for the given companies, or for
+    everything when company_ids is None. One query.
+    """
+    queryset = DashboardCounter.objects.all()
+    if company_ids is None:
+        # Every row except the per-company user links, which would count a
+        # user once per company; the NULL users row already counts everyone.
+        queryset = queryset.exclude(name=USERS, company__isnull=False)
+    else:
+        queryset = queryset.filter(company_id__in=company_ids)
+
+    counts = {name: {"total": 0, "active": 0} for name in NAMES}
+    for row in queryset.values('name').annotate(total=Sum('total'), active=Sum('active')):
+        counts[row['name']] = {"total": row['total'], "active": row['active']}
+    return counts
+
+
+_locks = defaultdict(threading.Lock)
+_locks_guard = threading.Lock()
+
+
+def single_flight(key, compute):
+    """
+    Returns the cached value for `key`, computing it at most once per
+    process at a time: concurrent callers wait for the first one's result
+    instead of all querying. Entries expire after DASHBOARD_CACHE_SECONDS
+    and whenever a counter changes.
+    """
+    key = f'dashboard_stats:{cache.get(GENERATION_KEY, 0)}:{key}'
+    value = cache.get(key)
+    if value is not None:
+        return value
+
+    with _locks_guard:
+        lock = _locks[key]
+    with lock:
+        value = cache.get(key)
+        if value is None:
+            value = compute()
+            cache.set(key, value, getattr(settings, 'DASHBOARD_CACHE_SECONDS', DEFAULT_CACHE_SECONDS))
+    with _locks_guard:
+        _locks.pop(key, None)
+    return value
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from dashboard import counters
+
+
+class Command(BaseCommand):
+    help = "Recomputes dashboard counters from the base tables."
+
+    def handle(self, *args, **options):
+        rows = counters.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"{rows} dashboard counters rebuilt."))
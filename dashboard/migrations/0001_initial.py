@@ -0,0 +1,47 @@
+# Generated by Django 5.2.4 on 2026-10-18 11:07
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def populate(apps, schema_editor):
+    from dashboard.counters import rebuild
+    rebuild(apps)
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('assets', '0001_initial'),
+        ('banks', '0001_initial'),
+        ('companies', '0002_company_is_active'),
+        ('contacts', '0007_remove_contact_linked_projects'),
+        ('cost_centres', '0001_initial'),
+        ('projects', '0007_alter_project_project_status_and_more'),
+        ('properties', '0001_initial'),
+        ('transaction_types', '0002_transactiontype_is_credit'),
+        ('transactions', '0009_transaction_is_classified'),
+        ('vendors', '0005_vendor_is_active'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DashboardCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50)),
+                ('total', models.BigIntegerField(default=0)),
+                ('active', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('company', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='companies.company')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('company', 'name'), name='dashboard_counter_company_name'), models.UniqueConstraint(condition=models.Q(('company__isnull', True)), fields=('name',), name='dashboard_counter_global_name')],
+            },
+        ),
+        migrations.RunPython(populate, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,30 @@
+from django.db import models
+from companies.models import Company
+
+
+class DashboardCounter(models.Model):
+    """
+    Row count of one dashboard model for one company, kept current by
+    dashboard.signals.
+
+    `company` is NULL for rows that belong to no company (e.g. contacts
+    without a company). For `users`, which link to companies many-to-many,
+    per-company rows count linked users and the NULL row counts every user.
+    """
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    name = models.CharField(max_length=50)
+    total = models.BigIntegerField(default=0)
+    active = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['company', 'name'], name='dashboard_counter_company_name'),
+            models.UniqueConstraint(
+                fields=['name'], condition=models.Q(company__isnull=True),
+                name='dashboard_counter_global_name',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.company_id or '-'} {self.name}: {self.total}"
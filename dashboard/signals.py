@@ -0,0 +1,134 @@
+from collections import defaultdict
+
+from django.apps import apps
+from django.conf import settings
+from django.db.models.signals import post_init, post_save, pre_delete, post_delete, m2m_changed
+
+from igen.signals import post_bulk_create
+from .counters import COUNTED, USERS, apply_deltas
+
+
+class Deltas(defaultdict):
+    """
+    {(company_id, name): [total_delta, active_delta]} accumulator.
+    """
+
+    def __init__(self):
+        super().__init__(lambda: [0, 0])
+
+    def add(self, company_id, name, active, sign):
+        self[(company_id, name)][0] += sign
+        if active:
+            self[(company_id, name)][1] += sign
+
+    def apply(self):
+        apply_deltas({key: tuple(value) for key, value in self.items()})
+
+
+def _connect(counted):
+    model = counted.model
+
+    def remember_state(sender, instance, **kwargs):
+        instance._dashboard_state = counted.state(instance)
+
+    def saved(sender, instance, created, **kwargs):
+        old = None if created else getattr(instance, '_dashboard_state', None)
+        new = instance._dashboard_state = counted.state(instance)
+        if new is None or (not created and (old is None or old == new)):
+            return
+        deltas = Deltas()
+        if old is not None:
+            deltas.add(old[0], counted.name, old[1], -1)
+        deltas.add(new[0], counted.name, new[1], 1)
+        deltas.apply()
+
+    def deleted(sender, instance, **kwargs):
+        state = getattr(instance, '_dashboard_state', None) or counted.state(instance)
+        if state is not None:
+            deltas = Deltas()
+            deltas.add(state[0], counted.name, state[1], -1)
+            deltas.apply()
+
+    def bulk_created(sender, instances, **kwargs):
+        deltas = Deltas()
+        for state in filter(None, map(counted.state, instances)):
+            deltas.add(state[0], counted.name, state[1], 1)
+        deltas.apply()
+
+    uid = f'dashboard_{counted.name}'
+    post_init.connect(remember_state, sender=model, weak=False, dispatch_uid=uid)
+    post_save.connect(saved, sender=model, weak=False, dispatch_uid=uid)
+    post_delete.connect(deleted, sender=model, weak=False, dispatch_uid=uid)
+    post_bulk_create.connect(bulk_created, sender=model, weak=False, dispatch_uid=uid)
+
+
+for _counted in COUNTED:
+    _connect(_counted)
+
+
+# Users link to companies many-to-many: the NULL-company row counts every
+# user and each company's row counts the users linked to it.
+
+User = apps.get_model(settings.AUTH_USER_MODEL)
+
+
+def user_initialized(sender, instance, **kwargs):
+    instance._dashboard_active = None if 'is_active' in instance.get_deferred_fields() else instance.is_active
+
+
+def user_saved(sender, instance, created, **kwargs):
+    old = getattr(instance, '_dashboard_active', None)
+    new = instance._dashboard_active = instance.is_active
+    deltas = Deltas()
+    if created:
+        deltas.add(None, USERS, new, 1)
+    elif old is not None and old != new:
+        sign = 1 if new else -1
+        for company_id in [None] + list(instance.companies.values_list('pk', flat=True)):
+            deltas[(company_id, USERS)][1] += sign
+    deltas.apply()
+
+
+def user_deleting(sender, instance, **kwargs):
+    # The links are removed by cascade without m2m_changed; remember them.
+    instance._dashboard_companies = list(instance.companies.values_list('pk', flat=True))
+
+
+def user_deleted(sender, instance, **kwargs):
+    deltas = Deltas()
+    for company_id in [None] + getattr(instance, '_dashboard_companies', []):
+        deltas.add(company_id, USERS, instance.is_active, -1)
+    deltas.apply()
+
+
+def user_companies_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear':
+        # clear() sends no pk_set; remember the links about to go.
+        instance._dashboard_cleared = set(
+            User.objects.filter(companies=instance).values_list('pk', flat=True) if reverse
+            else instance.companies.values_list('pk', flat=True)
+        )
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    sign = 1 if action == 'post_add' else -1
+    pks = getattr(instance, '_dashboard_cleared', set()) if action == 'post_clear' else pk_set
+
+    deltas = Deltas()
+    if reverse:
+        # company.user_set.add/remove/clear(...)
+        for is_active in User.objects.filter(pk__in=pks).values_list('is_active', flat=True):
+            deltas.add(instance.pk, USERS, is_active, sign)
+    else:
+        # user.companies.add/remove/clear(...)
+        for company_id in pks:
+            deltas.add(company_id, USERS, instance.is_active, sign)
+    deltas.apply()
+
+
+post_init.connect(user_initialized, sender=User, dispatch_uid='dashboard_users')
+post_save.connect(user_saved, sender=User, dispatch_uid='dashboard_users')
+pre_delete.connect(user_deleting, sender=User, dispatch_uid='dashboard_users')
+post_delete.connect(user_deleted, sender=User, dispatch_uid='dashboard_users')
+m2m_changed.connect(user_companies_changed, sender=User.companies.through, dispatch_uid='dashboard_users')
@@ -0,0 +1,71 @@
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from companies.models import Company
+from banks.models import BankAccount
+from users.models import User
+from . import counters
+
+
+class DashboardCounterTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.acme = Company.objects.create(name='Acme', pan='AAAAA0000A')
+        self.globex = Company.objects.create(name='Globex', pan='BBBBB0000B')
+        for company in (self.acme, self.globex):
+            BankAccount.objects.create(
+                company=company, account_name='Main', account_number=f'{company.pk}',
+                bank_name='SBI', ifsc='SBIN0000001'
+            )
+        self.head = User.objects.create_user(user_id='head', password='x', role='CENTER_HEAD', full_name='Head')
+        self.head.companies.add(self.acme)
+
+    def assert_matches_rebuild(self, company_ids=None):
+        maintained = counters.read(company_ids)
+        counters.rebuild()
+        self.assertEqual(maintained, counters.read(company_ids))
+
+    def test_signals_match_rebuild(self):
+        bank = BankAccount.objects.get(company=self.globex)
+        bank.is_active = False
+        bank.save()
+        bank.company = self.acme
+        bank.save()
+
+        other = User.objects.create_user(user_id='other', password='x', role='CENTER_HEAD', full_name='Other')
+        self.globex.user_set.add(self.head, other)
+        self.head.companies.remove(self.globex)
+        other.is_active = False
+        other.save()
+        self.globex.user_set.clear()
+
+        self.assertEqual(counters.read([self.acme.pk])['banks'], {'total': 2, 'active': 1})
+        self.assert_matches_rebuild()
+        self.assert_matches_rebuild([self.acme.pk])
+        self.assert_matches_rebuild([self.globex.pk])
+
+        other.delete()
+        self.globex.delete()
+        self.assert_matches_rebuild()
+
+    def test_dashboard_is_scoped_and_cached(self):
+        client = APIClient()
+        client.force_authenticate(self.head)
+
+        with self.assertNumQueries(2):
+            response = client.get('/api/dashboard-stats/')
+        self.assertEqual(response.data['total_companies'], 1)
+        self.assertEqual(response.data['total_banks'], 1)
+        self.assertEqual(response.data['total_users'], 1)
+
+        # Cached until a counter changes.
+        with self.assertNumQueries(1):
+            client.get('/api/dashboard-stats/')
+        with self.captureOnCommitCallbacks(execute=True):
+            BankAccount.objects.create(
+                company=self.acme, account_name='Petty', account_number='9',
+                bank_name='SBI', ifsc='SBIN0000001'
+            )
+        self.assertEqual(client.get('/api/dashboard-stats/').data['total_banks'], 2)
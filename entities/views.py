@@ -6,16 +6,14 @@ from .serializers import EntitySerializer
 from users.permissions import IsSuperUser  # adjust your permission as needed
 
 from rest_framework.permissions import IsAuthenticated  # ✅ Import this
+from igen.tenancy import TenantScopedMixin
 
-class EntityViewSet(viewsets.ModelViewSet):
+class EntityViewSet(TenantScopedMixin, viewsets.ModelViewSet):
     serializer_class = EntitySerializer
     permission_classes = [IsAuthenticated]  # ✅ Changed from IsSuperUser
 
     def get_queryset(self):
-        user = self.request.user
-        if user.role == 'SUPER_USER':
-            return Entity.objects.all()
-        return Entity.objects.filter(company__in=user.companies.all())
+        return self.scope_to_tenant(Entity.objects.all())
 
     def perform_create(self, serializer):
         entity_type = self.request.data.get('entity_type')
@@ -11,6 +11,10 @@ API.interceptors.request.use(
     if (token) {
       config.headers.Authorization = `Bearer ${token}`;
     }
+    // List endpoints are cursor-paginated; the screens still expect full arrays.
+    if ((config.method || 'get').toLowerCase() === 'get') {
+      config.params = { paginate: 'false', ...config.params };
+    }
     return config;
   },
   (error) => {
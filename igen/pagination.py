@@ -0,0 +1,202 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import BooleanField, F, Func, Q, Value
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+from rest_framework.utils.urls import replace_query_param
+
+
+class RowComparison(Func):
+    """
+    `(a, b, ...) < (x, y, ...)` (or `>`): a SQL row-value comparison of
+    columns against literal values, usable directly in filter().
+    """
+    output_field = BooleanField()
+
+    def __init__(self, columns, values, operator):
+        self.operator = operator
+        self.width = len(columns)
+        super().__init__(*columns, *values)
+
+    def as_sql(self, compiler, connection, **extra_context):
+        parts, params = [], []
+        for expression in self.get_source_expressions():
+            sql, expression_params = compiler.compile(expression)
+            parts.append(sql)
+            params.extend(expression_params)
+        columns, values = ', '.join(parts[:self.width]), ', '.join(parts[self.width:])
+        return f'({columns}) {self.operator} ({values})', params
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor (keyset) pagination used as the project-wide default.
+
+    The cursor holds the full sort key of the last row served, with the
+    primary key appended when the ordering does not already end in it, and
+    the next page is fetched with `WHERE (date, id) < (%s, %s)`, a row-value
+    comparison the (date, id) indexes answer directly. No page is ever
+    reached through OFFSET, so deep pages cost the same as the first one,
+    however many rows share a date. Orderings that mix directions or use
+    nullable columns seek with the equivalent OR of per-column comparisons.
+
+    Views set `cursor_ordering` to choose the ordering; otherwise the
+    queryset's own ordering (or the model's Meta.ordering) is used, falling
+    back to `-pk`.
+
+    `?paginate=false` returns the full unpaginated list for existing clients.
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+    ordering = '-pk'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if request.query_params.get('paginate') == 'false':
+            return None
+
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.keys = self._keys(queryset.model, self.get_ordering(request, queryset, view))
+        self.ordering = tuple(('-' if descending else '') + name for name, descending, _ in self.keys)
+        reverse, self.position = self.decode_cursor(request) or (False, None)
+
+        if reverse:
+            queryset = queryset.order_by(*(order[1:] if order[0] == '-' else '-' + order for order in self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+        if self.position is not None:
+            queryset = queryset.filter(self._seek(self.position, reverse))
+
+        # One extra row tells whether there is a page beyond this one.
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        has_more = len(results) > self.page_size
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = self.position is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, self.position is not None
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+    def get_ordering(self, request, queryset, view):
+        ordering_filters = [
+            backend for backend in getattr(view, 'filter_backends', [])
+            if hasattr(backend, 'get_ordering')
+        ]
+        if ordering_filters and ordering_filters[0]().get_ordering(request, queryset, view):
+            return super().get_ordering(request, queryset, view)
+
+        ordering = getattr(view, 'cursor_ordering', None) or self._natural_ordering(queryset)
+        return (ordering,) if isinstance(ordering, str) else tuple(ordering)
+
+    def _natural_ordering(self, queryset):
+        ordering = queryset.query.order_by or queryset.model._meta.ordering
+        if ordering and all(isinstance(field, str) and '__' not in field for field in ordering):
+            return ordering
+        return self.ordering
+
+    def _keys(self, model, ordering):
+        """
+        [(name, descending, model field or None)] for `ordering`, with
+        foreign keys compared by their column and the primary key appended
+        as the tie-breaker.
+        """
+        keys = []
+        for order in ordering:
+            name = order.lstrip('-')
+            try:
+                field = model._meta.pk if name == 'pk' else model._meta.get_field(name)
+            except FieldDoesNotExist:
+                field = None  # an annotation
+            if field is not None:
+                name = field.attname
+            keys.append((name, order.startswith('-'), field))
+
+        pk = model._meta.pk
+        if not any(name == pk.attname for name, _, _ in keys):
+            keys.append((pk.attname, keys[-1][1] if keys else True, pk))
+        return keys
+
+    def _seek(self, position, reverse):
+        """
+        Condition for the rows after `position` in the page order (before
+        it in the base ordering when paging backwards).
+        """
+        keys = [(name, descending != reverse, field) for name, descending, field in self.keys]
+        directions = {descending for _, descending, _ in keys}
+        if len(directions) == 1 and all(field is not None and not field.null for _, _, field in keys):
+            return RowComparison(
+                [F(name) for name, _, _ in keys],
+                [Value(value, output_field=field) for value, (_, _, field) in zip(position, keys)],
+                '<' if directions.pop() else '>',
+            )
+
+        # PostgreSQL sorts NULLs last ascending and first descending.
+        condition, equal = Q(pk__in=[]), Q()
+        for (name, descending, field), value in zip(keys, position):
+            nullable = field is None or field.null
+            if value is None:
+                after = Q(**{f'{name}__isnull': False}) if descending else None
+                equal_here = Q(**{f'{name}__isnull': True})
+            else:
+                after = Q(**{f'{name}__{"lt" if descending else "gt"}': value})
+                if nullable and not descending:
+                    after |= Q(**{f'{name}__isnull': True})
+                equal_here = Q(**{name: value})
+            if after is not None:
+                condition |= equal & after
+            equal &= equal_here
+        return condition
+
+    def _position(self, instance):
+        if isinstance(instance, dict):
+            return [instance[name] for name, _, _ in self.keys]
+        return [getattr(instance, name) for name, _, _ in self.keys]
+
+    def decode_cursor(self, request):
+        """
+        (reverse, position) from the request's cursor, or None without one.
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+
+        try:
+            tokens = json.loads(urlsafe_b64decode(encoded.encode('ascii')))
+            values = tokens['p']
+            if len(values) != len(self.keys):
+                raise ValueError(encoded)
+            position = [
+                value if value is None or field is None else field.to_python(value)
+                for value, (_, _, field) in zip(values, self.keys)
+            ]
+            return bool(tokens.get('r')), position
+        except (TypeError, ValueError, KeyError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, reverse, position):
+        tokens = {'p': position}
+        if reverse:
+            tokens['r'] = 1
+        encoded = urlsafe_b64encode(json.dumps(tokens, cls=DjangoJSONEncoder).encode()).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(False, self._position(self.page[-1]) if self.page else self.position)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self.encode_cursor(True, self._position(self.page[0]) if self.page else self.position)
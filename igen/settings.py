@@ -1,3 +1,4 @@
+import tempfile
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -44,6 +45,10 @@ INSTALLED_APPS = [
     'reports',
     'contacts',
     'cash_ledger',
+    'import_jobs',
+    'dashboard',
+    'benchmarks',
+    'monitoring',
 ]
 
 
@@ -51,6 +56,8 @@ INSTALLED_APPS = [
 AUTH_USER_MODEL = 'users.User'
 
 MIDDLEWARE = [
+    'monitoring.middleware.RequestTimingMiddleware',
+    'monitoring.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -59,6 +66,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'monitoring.profiling.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'igen.urls'
@@ -110,14 +118,77 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Background CSV imports: worker threads per process. Set
+# IMPORT_JOBS_RUN_IN_PROCESS = False to leave jobs to `manage.py run_import_jobs --loop`.
+IMPORT_JOB_WORKERS = 2
+IMPORT_JOBS_RUN_IN_PROCESS = True
+# run_import_jobs fails RUNNING jobs that saved no progress for this long.
+IMPORT_JOB_STALE_SECONDS = 1800
+
+# Per-company classification suggestion models written by `manage.py train_classifier`.
+CLASSIFIER_MODEL_DIR = BASE_DIR / 'classifier_models'
+
+# Shared by every worker process on the host, so the generation/version
+# keys bumped on writes (dashboard counters, ledger) invalidate cached
+# results in all workers, not just the one that wrote. With several app
+# hosts, point this at Redis or Memcached instead.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': Path(tempfile.gettempdir()) / 'igen-cache',
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    }
+}
+
+# Seconds /api/dashboard-stats/ responses stay cached; a counter change
+# invalidates them sooner for every worker sharing CACHES.
+DASHBOARD_CACHE_SECONDS = 30
+
+# /api/reports/entity-report/pivot/ refuses answers over MAX_ROWS rows and
+# caches results for CACHE_SECONDS; a committed ledger write invalidates
+# them sooner for every worker sharing CACHES.
+REPORT_PIVOT_MAX_ROWS = 5000
+REPORT_PIVOT_CACHE_SECONDS = 300
+
+# Authenticated users are cached in-process (see users.authentication).
+# Deactivations and role/company changes made by another process apply
+# within AUTH_PRINCIPAL_CACHE_SECONDS.
+AUTH_PRINCIPAL_CACHE_SIZE = 1024
+AUTH_PRINCIPAL_CACHE_SECONDS = 60
+
+# Request timing (monitoring.middleware). Every response carries a
+# Server-Timing header; sampled requests (all under DEBUG) also record their
+# slowest statements and query shapes repeated DUPLICATE_THRESHOLD or more
+# times, and are logged as JSON. Slow requests are always logged.
+REQUEST_TIMING_SAMPLE_RATE = 0.01
+REQUEST_TIMING_SLOW_MS = 1000
+REQUEST_TIMING_SLOWEST = 3
+REQUEST_TIMING_DUPLICATE_THRESHOLD = 5
+
+# SUPER_USER requests with ?profile=true or X-Profile: true are profiled
+# (monitoring.profiling); the newest REQUEST_PROFILE_KEEP are kept.
+REQUEST_PROFILE_KEEP = 200
+
+# Prometheus metrics at /metrics (monitoring.metrics). Each worker writes its
+# snapshot to METRICS_DIR (None: <tmp>/igen-metrics) every FLUSH_SECONDS at
+# most; all workers of a deployment must share the directory. Scrapes must
+# send `Authorization: Bearer <METRICS_TOKEN>`; while it is unset /metrics
+# answers 403 unless DEBUG is on.
+METRICS_DIR = None
+METRICS_FLUSH_SECONDS = 5
+METRICS_TOKEN = None
+
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
-    )
+    ),
+    # Keyset pagination everywhere; ?paginate=false returns the full list.
+    'DEFAULT_PAGINATION_CLASS': 'igen.pagination.KeysetPagination',
+    'PAGE_SIZE': 50,
 }
 
 from datetime import timedelta
@@ -132,6 +203,7 @@ SIMPLE_JWT = {
 
     # ✅ Custom serializer to include company_id and role in response
     'TOKEN_OBTAIN_SERIALIZER': 'users.serializers.CustomTokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'users.serializers.CustomTokenRefreshSerializer',
 }
 
 
@@ -0,0 +1,16 @@
+from django.dispatch import Signal
+
+# Sent after rows are written with bulk_create (which skips post_save), so
+# derived tables can catch up. Arguments: sender (model class), instances.
+post_bulk_create = Signal()
+
+# Sent after rows are changed with bulk_update (which skips post_save).
+# Arguments: sender (model class), instances, fields. Each instance's
+# post_init snapshot still describes the row as it was loaded.
+post_bulk_update = Signal()
+
+# Sent after rows are removed with a signal-free bulk delete (which skips
+# post_delete), inside the deleting transaction. Arguments: sender (model
+# class), instances as loaded before the delete. Receivers remove dependent
+# rows themselves; foreign keys are only checked at commit.
+post_bulk_delete = Signal()
@@ -0,0 +1,92 @@
+"""
+Request-scoped tenant context.
+
+The companies a user may see are resolved once per request: from the
+principal cache in users.authentication when the user came through it, else
+from the `company_ids` claim stamped on their access token, otherwise with a
+single membership query. The result is cached on the
+underlying HttpRequest, so viewsets, serializers and permission checks
+handling the same request share it. Querysets are then filtered with a
+literal `company_id IN (...)` rather than a membership subquery.
+
+SUPER_USER is unrestricted: `company_ids()` returns None for them.
+"""
+
+COMPANY_IDS_CLAIM = 'company_ids'
+
+_CACHE_ATTR = '_tenant_company_ids'
+_MISSING = object()
+
+
+def is_super_user(user):
+    return getattr(user, 'role', None) == 'SUPER_USER'
+
+
+def membership_ids(user):
+    """
+    Sorted company ids the user is linked to. One query.
+    """
+    return sorted(user.companies.values_list('pk', flat=True))
+
+
+def company_ids(request):
+    """
+    Tuple of company ids the requesting user belongs to, or None when the
+    user is a SUPER_USER and sees every company.
+    """
+    http_request = getattr(request, '_request', request)
+    ids = getattr(http_request, _CACHE_ATTR, _MISSING)
+    if ids is not _MISSING:
+        return ids
+
+    user = request.user
+    if is_super_user(user):
+        ids = None
+    else:
+        ids = getattr(user, '_company_ids', None)
+        if ids is None:
+            token = getattr(request, 'auth', None)
+            claim = token.get(COMPANY_IDS_CLAIM) if hasattr(token, 'get') else None
+            ids = tuple(claim) if isinstance(claim, list) else tuple(membership_ids(user))
+
+    setattr(http_request, _CACHE_ATTR, ids)
+    return ids
+
+
+def default_company_id(request):
+    """
+    The company new rows are filed under for users who may not choose one:
+    their first (lowest id) company, or None if they have none.
+    """
+    ids = company_ids(request)
+    return ids[0] if ids else None
+
+
+def scope(queryset, request, field='company'):
+    """
+    Restricts `queryset` to the requesting user's companies through `field`.
+    """
+    ids = company_ids(request)
+    if ids is None:
+        return queryset
+    return queryset.filter(**{f'{field}__in': ids})
+
+
+class TenantScopedMixin:
+    """
+    Viewset mixin exposing the request's tenant context.
+    `tenant_field` names the company foreign key on the viewset's model
+    ('pk' for Company itself).
+    """
+    tenant_field = 'company'
+
+    @property
+    def company_ids(self):
+        return company_ids(self.request)
+
+    @property
+    def default_company_id(self):
+        return default_company_id(self.request)
+
+    def scope_to_tenant(self, queryset):
+        return scope(queryset, self.request, self.tenant_field)
@@ -3,10 +3,12 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 from .views import dashboard_stats
+from monitoring.views import metrics
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/dashboard-stats/', dashboard_stats, name='dashboard-stats'),
+    path('metrics', metrics, name='metrics'),
 
     # Include all app-specific APIs
     path('api/users/', include('users.urls')),
@@ -25,6 +27,7 @@ urlpatterns = [
     path('api/', include('contracts.urls')),
     path('api/cash-ledger/', include('cash_ledger.urls')),
     path('api/reports/', include('reports.urls')),
+    path('api/import-jobs/', include('import_jobs.urls')),
 
 
 
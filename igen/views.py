@@ -2,17 +2,9 @@ from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
-from transactions.models import Transaction
-from companies.models import Company
-from banks.models import BankAccount
-from cost_centres.models import CostCentre
-from transaction_types.models import TransactionType
 from users.models import User
-from projects.models import Project
-from assets.models import Asset
-from contacts.models import Contact
-from vendors.models import Vendor
-from properties.models import Property
+from dashboard import counters
+from igen import tenancy
 
 from users.serializers import UserSerializer
 
@@ -31,31 +23,19 @@ def dashboard_stats(request):
             status=status.HTTP_403_FORBIDDEN
         )
 
-    # 📊 Summary Counts Only (NO transaction trends)
-    total_users = User.objects.count()
-    total_companies = Company.objects.count()
-    total_projects = Project.objects.count()
-    total_properties = Property.objects.count()
-    total_assets = Asset.objects.count()
-    total_contacts = Contact.objects.count()
-    total_cost_centres = CostCentre.objects.count()
-    total_banks = BankAccount.objects.count()
-    total_vendors = Vendor.objects.count()
-    total_transaction_types = TransactionType.objects.count()
+    # 📊 Summary Counts Only, read from the maintained per-company counters;
+    # trends are served from the spend rollups by /api/reports/spend-trends/. Super users see everything; other
+    # roles see the companies they are assigned to.
+    company_ids = tenancy.company_ids(request)
+    scope = 'all' if company_ids is None else ','.join(map(str, company_ids))
 
-    return Response({
-        'total_users': total_users,
-        'total_companies': total_companies,
-        'total_projects': total_projects,
-        'total_properties': total_properties,
-        'total_assets': total_assets,
-        'total_contacts': total_contacts,
-        'total_cost_centres': total_cost_centres,
-        'total_banks': total_banks,
-        'total_vendors': total_vendors,
-        'total_transaction_types': total_transaction_types,
-         'total_transactions': Transaction.objects.count(),
-    })
+    def compute():
+        counts = counters.read(company_ids)
+        data = {f'total_{name}': counts[name]['total'] for name in counters.NAMES}
+        data.update({f'active_{name}': counts[name]['active'] for name in counters.NAMES if name != 'transactions'})
+        return data
+
+    return Response(counters.single_flight(scope, compute))
 
 
 @api_view(['GET'])
@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from import_jobs.models import ImportJob
+from import_jobs.runner import reap_stale_jobs, run_job
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs pending import jobs. Use --loop to keep polling (no broker needed). "
+        "RUNNING jobs with no progress for IMPORT_JOB_STALE_SECONDS are marked FAILED."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Keep polling for new jobs.')
+        parser.add_argument('--interval', type=float, default=2.0, help='Seconds between polls.')
+
+    def handle(self, *args, **options):
+        while True:
+            reaped = reap_stale_jobs()
+            if reaped:
+                self.stdout.write(f"Marked {reaped} stalled import job(s) as failed")
+
+            pending = list(
+                ImportJob.objects.filter(status='PENDING').order_by('created_at').values_list('pk', flat=True)
+            )
+            for job_id in pending:
+                self.stdout.write(f"Running import job {job_id}")
+                run_job(job_id)
+
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,47 @@
+class ImportResult:
+    """
+    Running totals for one import. Only the first `max_errors` failing rows
+    are kept in detail; `error_count` always holds the full number.
+    """
+
+    def __init__(self, max_errors=None):
+        self.max_errors = max_errors
+        self.rows_processed = 0
+        self.created = 0
+        self.error_count = 0
+        self.errors = []
+
+    def add_error(self, row_number, row, errors):
+        self.error_count += 1
+        if self.max_errors is None or len(self.errors) < self.max_errors:
+            self.errors.append({
+                "row": row_number,
+                "data": row,
+                "errors": errors
+            })
+
+    def summary(self):
+        return {
+            "rows_processed": self.rows_processed,
+            "created": self.created,
+            "error_count": self.error_count,
+            "errors": self.errors,
+            "errors_truncated": self.error_count > len(self.errors),
+        }
+
+
+def collect_row_results(row_results, max_errors=None, every=100):
+    """
+    Folds a per-row (row_number, row, errors) iterator into an ImportResult,
+    yielding it every `every` rows and once more at the end.
+    """
+    result = ImportResult(max_errors=max_errors)
+    for row_number, row, errors in row_results:
+        result.rows_processed = row_number
+        if errors:
+            result.add_error(row_number, row, errors)
+        else:
+            result.created += 1
+        if row_number % every == 0:
+            yield result
+    yield result
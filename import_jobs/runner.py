@@ -0,0 +1,156 @@
+import csv
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from io import TextIOWrapper
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from monitoring.metrics import record_import
+from .models import ImportJob
+
+logger = logging.getLogger(__name__)
+
+# Each kind maps to a callable(reader, max_errors, **options) returning an
+# iterator of ImportResult snapshots; the runner persists every snapshot as
+# progress. options are the job's stored options other than max_errors.
+IMPORTERS = {
+    'transactions': 'transactions.importers.import_job_results',
+    'projects': 'projects.importers.import_job_results',
+    'companies': 'companies.importers.import_job_results',
+}
+
+_executor = None
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, 'IMPORT_JOB_WORKERS', 2),
+            thread_name_prefix='import-job',
+        )
+    return _executor
+
+
+def create_job(kind, uploaded_file, user=None, options=None):
+    """
+    Stores the upload and queues it. Returns immediately with the job.
+    """
+    job = ImportJob.objects.create(
+        kind=kind,
+        file=uploaded_file,
+        options=options or {},
+        created_by=user if user and user.is_authenticated else None,
+    )
+    if getattr(settings, 'IMPORT_JOBS_RUN_IN_PROCESS', True):
+        transaction.on_commit(lambda: _get_executor().submit(_run_in_thread, job.pk))
+    return job
+
+
+def _run_in_thread(job_id):
+    close_old_connections()
+    try:
+        run_job(job_id)
+    finally:
+        connection.close()
+
+
+def claim_job(job_id):
+    """
+    Moves a PENDING job to RUNNING. Returns False if another worker got it first.
+    """
+    now = timezone.now()
+    return ImportJob.objects.filter(pk=job_id, status='PENDING').update(
+        status='RUNNING', started_at=now, heartbeat_at=now
+    ) == 1
+
+
+def run_job(job_id):
+    if not claim_job(job_id):
+        return
+
+    job = ImportJob.objects.get(pk=job_id)
+    result = None
+    try:
+        importer = import_string(IMPORTERS[job.kind])
+        started = time.perf_counter()
+        with job.file.open('rb') as raw:
+            reader = csv.DictReader(TextIOWrapper(raw, encoding='utf-8'))
+            for result in importer(reader, **job.options):
+                _save_progress(job, result)
+        record_import(job.kind, 'async', job.rows_processed, time.perf_counter() - started)
+
+        job.status = 'COMPLETED'
+        job.message = f"{job.rows_created} rows imported, {job.error_count} rows failed."
+    except Exception as e:
+        logger.exception("Import job %s failed", job_id)
+        job.status = 'FAILED'
+        job.message = str(e)
+
+    job.finished_at = timezone.now()
+    # Guarded like reap_stale_jobs: a job already reaped stays FAILED.
+    if not ImportJob.objects.filter(pk=job.pk, status='RUNNING').update(
+        status=job.status, message=job.message, finished_at=job.finished_at, file=''
+    ):
+        logger.warning("Import job %s finished after it was marked as stalled", job_id)
+    _discard_upload(job)
+
+
+def reap_stale_jobs(stale_after=None):
+    """
+    Fails RUNNING jobs whose worker stopped saving progress (killed, OOM,
+    deploy) so they do not show as running forever. They are not re-queued:
+    transaction imports commit batch by batch, so a rerun would duplicate the
+    rows already written. Returns the number of jobs reaped.
+    """
+    if stale_after is None:
+        stale_after = getattr(settings, 'IMPORT_JOB_STALE_SECONDS', 1800)
+    now = timezone.now()
+    stale = ImportJob.objects.filter(status='RUNNING', heartbeat_at__lt=now - timedelta(seconds=stale_after))
+
+    reaped = 0
+    for job in stale:
+        message = (
+            f"Worker stopped after {job.rows_processed} rows; {job.rows_created} rows were imported "
+            f"before it stopped. Check them before uploading the file again."
+        )
+        # Guarded on the status so a job that finished meanwhile is left alone.
+        if ImportJob.objects.filter(pk=job.pk, status='RUNNING').update(
+            status='FAILED', message=message, finished_at=now
+        ):
+            _discard_upload(job)
+            job.save(update_fields=['file'])
+            reaped += 1
+    return reaped
+
+
+def _discard_upload(job):
+    """
+    Deletes the stored CSV of a finished job; the job row keeps the results.
+    """
+    if not job.file:
+        return
+    try:
+        job.file.delete(save=False)
+    except OSError:
+        logger.exception("Could not delete the upload of import job %s", job.pk)
+    job.file.name = ''
+
+
+def _save_progress(job, result):
+    job.rows_processed = result.rows_processed
+    job.rows_created = result.created
+    job.error_count = result.error_count
+    job.errors = result.errors
+    ImportJob.objects.filter(pk=job.pk).update(
+        heartbeat_at=timezone.now(),
+        rows_processed=job.rows_processed,
+        rows_created=job.rows_created,
+        error_count=job.error_count,
+        errors=job.errors,
+    )
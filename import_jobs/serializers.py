@@ -0,0 +1,16 @@
+from rest_framework import serializers
+from .models import ImportJob
+
+
+class ImportJobSerializer(serializers.ModelSerializer):
+    rows_per_second = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = ImportJob
+        fields = [
+            'id', 'kind', 'status',
+            'rows_processed', 'rows_created', 'error_count', 'errors',
+            'rows_per_second', 'message',
+            'created_by', 'created_at', 'started_at', 'finished_at',
+        ]
+        read_only_fields = fields
@@ -0,0 +1,110 @@
+import datetime
+import io
+import os
+import tempfile
+from unittest import mock
+
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from banks.models import BankAccount
+from companies.models import Company
+from cost_centres.models import CostCentre
+from transaction_types.models import TransactionType
+from transactions.models import Transaction
+from users.models import User
+from . import runner
+from .models import ImportJob
+
+HEADER = 'company,bank_account,cost_centre,transaction_type,direction,amount,date,notes\n'
+
+
+@override_settings(IMPORT_JOBS_RUN_IN_PROCESS=False)
+class ImportJobTests(TestCase):
+
+    def setUp(self):
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        override = override_settings(MEDIA_ROOT=self.media.name)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.company = Company.objects.create(name='Acme', pan='AAAAA0000A')
+        BankAccount.objects.create(
+            company=self.company, account_name='Main', account_number='0001', bank_name='SBI', ifsc='SBIN0000001'
+        )
+        CostCentre.objects.create(company=self.company, name='Admin')
+        TransactionType.objects.create(company=self.company, name='Rent')
+        self.user = User.objects.create_user(user_id='admin', password='x', role='SUPER_USER', full_name='Admin')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def run_jobs(self):
+        out = io.StringIO()
+        call_command('run_import_jobs', stdout=out)
+        return out.getvalue()
+
+    def test_transaction_job_keeps_valid_rows_and_discards_the_upload(self):
+        csv_file = io.BytesIO((
+            HEADER
+            + 'Acme,Main,Admin,Rent,DEBIT,100.00,2025-04-01,ok\n'
+            + 'Acme,Nowhere,Admin,Rent,DEBIT,100.00,2025-04-01,bad\n'
+        ).encode())
+        csv_file.name = 'statement.csv'
+        response = self.client.post('/api/bulk-upload/?async=true', {'file': csv_file}, format='multipart')
+        self.assertEqual(response.status_code, 202)
+        job = ImportJob.objects.get(pk=response.data['job_id'])
+        path = job.file.path
+        self.assertTrue(os.path.exists(path))
+
+        self.run_jobs()
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.rows_created, job.error_count), ('COMPLETED', 1, 1))
+        self.assertEqual(Transaction.objects.get().notes, 'ok')
+        self.assertFalse(job.file)
+        self.assertFalse(os.path.exists(path))
+        self.assertEqual(self.client.get(response.data['status_url']).data['status'], 'COMPLETED')
+
+    def test_stalled_running_jobs_are_failed(self):
+        long_ago = timezone.now() - datetime.timedelta(hours=2)
+        stalled, running = [
+            ImportJob.objects.create(
+                kind='transactions', status='RUNNING', file=ContentFile(HEADER, name='statement.csv'),
+                started_at=heartbeat, heartbeat_at=heartbeat, rows_processed=500, rows_created=480,
+            )
+            for heartbeat in (long_ago, timezone.now())
+        ]
+        path = stalled.file.path
+
+        self.assertIn('Marked 1 stalled import job(s) as failed', self.run_jobs())
+
+        stalled.refresh_from_db()
+        self.assertEqual(stalled.status, 'FAILED')
+        self.assertIn('480 rows were imported', stalled.message)
+        self.assertIsNotNone(stalled.finished_at)
+        self.assertFalse(os.path.exists(path))
+        running.refresh_from_db()
+        self.assertEqual(running.status, 'RUNNING')
+        self.assertTrue(running.file)
+
+    def test_a_reaped_job_is_not_overwritten_when_its_worker_finishes(self):
+        upload = ContentFile(HEADER + 'Acme,Main,Admin,Rent,DEBIT,1,2025-04-01,ok\n', name='statement.csv')
+        job = ImportJob.objects.create(kind='transactions', file=upload)
+        path = job.file.path
+        save_progress = runner._save_progress
+
+        def reaped_meanwhile(job, result):
+            save_progress(job, result)
+            ImportJob.objects.filter(pk=job.pk).update(status='FAILED', message='Worker stopped', file='')
+
+        with mock.patch.object(runner, '_save_progress', reaped_meanwhile), \
+                self.assertLogs('import_jobs.runner', 'WARNING'):
+            runner.run_job(job.pk)
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.message), ('FAILED', 'Worker stopped'))
+        self.assertFalse(os.path.exists(path))
@@ -0,0 +1,44 @@
+from rest_framework import viewsets, status
+from rest_framework.response import Response
+
+from .models import ImportJob
+from .runner import create_job
+from .serializers import ImportJobSerializer
+
+
+class ImportJobViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Status polling for background CSV imports. Users see their own jobs;
+    SUPER_USER sees all of them.
+    """
+    serializer_class = ImportJobSerializer
+
+    def get_queryset(self):
+        user = self.request.user
+        if user.role == 'SUPER_USER':
+            return ImportJob.objects.all()
+        return ImportJob.objects.filter(created_by=user)
+
+
+def queue_import(request, kind, uploaded_file, options=None):
+    """
+    Shared `?async=true` branch for the bulk upload views: stores the file,
+    queues the job and answers 202 straight away. `options` are passed on to
+    the importer as keyword arguments.
+
+    Unlike the synchronous uploads, which write nothing unless every row is
+    valid, transaction jobs commit batch by batch: invalid rows are skipped
+    and reported in the job's `errors`, and a job that fails part way keeps
+    the `rows_created` rows already written.
+    """
+    options = dict(options or {})
+    max_errors = request.query_params.get('max_errors')
+    if max_errors and max_errors.isdigit():
+        options['max_errors'] = int(max_errors)
+
+    job = create_job(kind, uploaded_file, user=request.user, options=options)
+    return Response({
+        'job_id': str(job.id),
+        'status': job.status,
+        'status_url': request.build_absolute_uri(f'/api/import-jobs/{job.id}/'),
+    }, status=status.HTTP_202_ACCEPTED)
@@ -0,0 +1,32 @@
+from django.contrib import admin
+from django.utils.html import format_html
+from .models import RequestProfile
+
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    list_display = ('created_at', 'method', 'path', 'status_code', 'duration_ms', 'query_count', 'peak_memory', 'user')
+    list_filter = ('method', 'status_code')
+    search_fields = ('path',)
+    date_hierarchy = 'created_at'
+    fields = ('created_at', 'user', 'method', 'path', 'query_string', 'status_code', 'duration_ms',
+              'query_count', 'peak_memory', 'profile_file', 'call_stats_block', 'allocations_block')
+    readonly_fields = fields
+    list_per_page = 50
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.display(description='Peak memory', ordering='peak_memory_bytes')
+    def peak_memory(self, obj):
+        if obj.peak_memory_bytes is None:
+            return '-'
+        return f"{obj.peak_memory_bytes / (1024 * 1024):.1f} MiB"
+
+    @admin.display(description='Call stats (cumulative)')
+    def call_stats_block(self, obj):
+        return format_html('<pre style="white-space: pre; overflow-x: auto">{}</pre>', obj.call_stats)
+
+    @admin.display(description='Top allocation sites')
+    def allocations_block(self, obj):
+        return format_html('<pre style="white-space: pre; overflow-x: auto">{}</pre>', obj.allocations)
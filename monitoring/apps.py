@@ -0,0 +1,14 @@
+from django.apps import AppConfig
+
+
+class MonitoringConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'monitoring'
+
+    def ready(self):
+        from rest_framework.serializers import BaseSerializer
+        from .timing import serializer_timer
+
+        # Serializer time for the Server-Timing header; a no-op outside
+        # requests handled by RequestTimingMiddleware.
+        BaseSerializer.data = serializer_timer(BaseSerializer.data)
@@ -0,0 +1,296 @@
+"""
+Prometheus metrics shared across worker processes.
+
+Each process aggregates counters and histograms in memory and writes a
+snapshot to METRICS_DIR/<pid>-<random id>.json, at most every
+METRICS_FLUSH_SECONDS and when it exits. The random id keeps a new worker
+that reuses a dead worker's pid from overwriting its file. `/metrics` (monitoring.views.metrics) merges the snapshots of
+every worker, so a scrape sees all gunicorn workers whichever one answers
+it. Snapshots are replaced atomically; a worker's file is kept after it
+exits so counters never go backwards. Clear the directory when the service
+is (re)deployed.
+
+Request metrics are recorded by monitoring.middleware.MetricsMiddleware;
+imports call `record_import`.
+"""
+import abc
+import atexit
+import json
+import logging
+import math
+import os
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FLUSH_SECONDS = 5
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+SIZE_BUCKETS = tuple(256 * 4 ** i for i in range(10))  # 256 B .. 64 MiB
+RATE_BUCKETS = (10, 50, 100, 500, 1000, 2500, 5000, 10000, 25000, 50000)
+
+
+class Metric(abc.ABC):
+    type = None
+
+    def __init__(self, name, documentation, labelnames):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+
+    def _key(self, labels):
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    @abc.abstractmethod
+    def merge(self, into, values):
+        """
+        Combines this label set's `values` from one snapshot into `into`
+        (None for the first snapshot) and returns the result.
+        """
+
+    @abc.abstractmethod
+    def samples(self, labels, values):
+        """
+        Yields the (sample name, labels, value) lines for one label set.
+        """
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, amount=1, **labels):
+        with registry.lock:
+            key = self._key(labels)
+            self.values[key] = self.values.get(key, 0) + amount
+            registry.changed()
+
+    def merge(self, into, values):
+        return (into or 0) + values
+
+    def samples(self, labels, value):
+        yield self.name, labels, value
+
+
+class Histogram(Metric):
+    """
+    Values per label set are [per-bucket counts..., +Inf count, sum]; the
+    cumulative `le` buckets are only built when rendering.
+    """
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labelnames, buckets):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        with registry.lock:
+            key = self._key(labels)
+            values = self.values.get(key)
+            if values is None:
+                values = self.values[key] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    values[i] += 1
+                    break
+            else:
+                values[len(self.buckets)] += 1
+            values[-1] += value
+            registry.changed()
+
+    def merge(self, into, values):
+        if into is None:
+            return list(values)
+        return [a + b for a, b in zip(into, values)]
+
+    def samples(self, labels, values):
+        cumulative = 0
+        for bound, count in zip(self.buckets + (math.inf,), values):
+            cumulative += count
+            yield f'{self.name}_bucket', labels + (('le', _number(bound)),), cumulative
+        yield f'{self.name}_sum', labels, values[-1]
+        yield f'{self.name}_count', labels, cumulative
+
+
+class Registry:
+    """
+    The metrics of this process and the file its snapshot goes to.
+    """
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.metrics = {}
+        self._timer = None
+        self._flushed_at = 0.0
+        self.filename = _snapshot_filename()
+
+    def register(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    @property
+    def directory(self):
+        return Path(getattr(settings, 'METRICS_DIR', None) or Path(tempfile.gettempdir()) / 'igen-metrics')
+
+    @property
+    def flush_seconds(self):
+        return getattr(settings, 'METRICS_FLUSH_SECONDS', DEFAULT_FLUSH_SECONDS)
+
+    def changed(self):
+        # Called with the lock held: schedules a flush unless one is pending.
+        if self._timer is None:
+            delay = max(self._flushed_at + self.flush_seconds - time.monotonic(), 0)
+            self._timer = threading.Timer(delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                name: [[list(key), value] for key, value in metric.values.items()]
+                for name, metric in self.metrics.items() if metric.values
+            }
+
+    def flush(self):
+        with self.lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            self._flushed_at = time.monotonic()
+            data = self.snapshot()
+        if not data:
+            return
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            path = self.directory / self.filename
+            with tempfile.NamedTemporaryFile('w', dir=self.directory, suffix='.tmp', delete=False) as f:
+                json.dump(data, f)
+            os.replace(f.name, path)
+        except OSError:
+            logger.exception("Could not write metrics to %s", self.directory)
+
+    def collect(self):
+        """
+        {metric name: {label values: merged values}} across every worker's
+        snapshot. The caller's own process is flushed first.
+        """
+        self.flush()
+        merged = {name: {} for name in self.metrics}
+        for path in sorted(self.directory.glob('*.json')):
+            try:
+                with open(path) as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                continue
+            for name, entries in data.items():
+                metric = self.metrics.get(name)
+                if metric is None:
+                    continue
+                for key, values in entries:
+                    key = tuple(key)
+                    merged[name][key] = metric.merge(merged[name].get(key), values)
+        return merged
+
+    def exposition(self):
+        """
+        Every metric in the Prometheus text format (version 0.0.4).
+        """
+        lines = []
+        for name, entries in self.collect().items():
+            metric = self.metrics[name]
+            lines.append(f'# HELP {name} {metric.documentation}')
+            lines.append(f'# TYPE {name} {metric.type}')
+            for key in sorted(entries):
+                labels = tuple(zip(metric.labelnames, key))
+                for sample, sample_labels, value in metric.samples(labels, entries[key]):
+                    lines.append(f'{sample}{_labels(sample_labels)} {_number(value)}')
+        return '\n'.join(lines) + '\n'
+
+    def after_fork(self):
+        # The lock may have been held by another thread of the parent.
+        self.lock = threading.RLock()
+        self.filename = _snapshot_filename()
+        self.reset()
+
+    def reset(self):
+        """
+        Forgets this process's values.
+        """
+        with self.lock:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = None
+            self._flushed_at = 0.0
+            for metric in self.metrics.values():
+                metric.values = {}
+
+
+def _snapshot_filename():
+    return f'{os.getpid()}-{uuid.uuid4().hex[:12]}.json'
+
+
+def _labels(pairs):
+    if not pairs:
+        return ''
+    escaped = (
+        (name, value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in pairs
+    )
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+
+def _number(value):
+    return '+Inf' if value == math.inf else repr(value)
+
+
+registry = Registry()
+# A preloaded app forks its workers: each starts from an empty registry and
+# writes its own file.
+os.register_at_fork(after_in_child=registry.after_fork)
+atexit.register(registry.flush)
+
+request_duration = registry.register(Histogram(
+    'igen_http_request_duration_seconds', 'Time to produce the response, by view and action.',
+    ('view', 'action', 'method', 'status'), LATENCY_BUCKETS,
+))
+request_queries = registry.register(Histogram(
+    'igen_http_request_queries', 'Database queries run while producing the response.',
+    ('view', 'action'), QUERY_BUCKETS,
+))
+response_size = registry.register(Histogram(
+    'igen_http_response_size_bytes', 'Response body size; streamed bodies are counted as they are sent.',
+    ('view', 'action'), SIZE_BUCKETS,
+))
+export_bytes = registry.register(Counter(
+    'igen_export_bytes_total', 'Bytes sent by streaming and file (export) responses.',
+    ('view', 'action'),
+))
+import_rows = registry.register(Counter(
+    'igen_import_rows_total', 'CSV rows processed by bulk uploads.',
+    ('kind', 'mode'),
+))
+import_seconds = registry.register(Counter(
+    'igen_import_seconds_total', 'Time spent processing bulk uploads.',
+    ('kind', 'mode'),
+))
+import_rate = registry.register(Histogram(
+    'igen_import_rows_per_second', 'Throughput of individual bulk uploads.',
+    ('kind', 'mode'), RATE_BUCKETS,
+))
+
+
+def record_import(kind, mode, rows, seconds):
+    """
+    Records one finished upload. `mode` is sync, stream or async.
+    """
+    import_rows.inc(rows, kind=kind, mode=mode)
+    import_seconds.inc(seconds, kind=kind, mode=mode)
+    if rows and seconds > 0:
+        import_rate.observe(rows / seconds, kind=kind, mode=mode)
@@ -0,0 +1,126 @@
+import json
+import logging
+import random
+import time
+
+from django.conf import settings
+from django.db import connection
+
+from . import metrics, timing
+from .timing import RequestTimer
+
+logger = logging.getLogger(__name__)
+
+
+class RequestTimingMiddleware:
+    """
+    Times every request: query count, database time and serializer time go
+    out in a Server-Timing header.
+
+    A REQUEST_TIMING_SAMPLE_RATE share of requests (all of them under DEBUG)
+    also record their slowest statements and repeated query shapes, and are
+    logged as one JSON line. Requests slower than REQUEST_TIMING_SLOW_MS are
+    logged whether sampled or not, and repeated shapes are logged as
+    warnings. Queries run while a streaming response is consumed happen
+    after this middleware returns and are not counted.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        sample_rate = getattr(settings, 'REQUEST_TIMING_SAMPLE_RATE', 0.0)
+        sampled = sample_rate > 0 and random.random() < sample_rate
+        timer = RequestTimer(
+            detailed=sampled or settings.DEBUG,
+            slowest=getattr(settings, 'REQUEST_TIMING_SLOWEST', 3),
+        )
+
+        with timer.activate(), connection.execute_wrapper(timer):
+            response = self.get_response(request)
+
+        duplicates = timer.duplicates(getattr(settings, 'REQUEST_TIMING_DUPLICATE_THRESHOLD', 5)) if timer.detailed else []
+        header = timer.server_timing()
+        if duplicates:
+            header += f', dup;desc="{len(duplicates)} repeated queries"'
+        if response.has_header('Server-Timing'):
+            header = f"{response['Server-Timing']}, {header}"
+        response['Server-Timing'] = header
+
+        total_ms = timer.total_seconds * 1000
+        if sampled or duplicates or total_ms >= getattr(settings, 'REQUEST_TIMING_SLOW_MS', 1000):
+            record = {
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                'user': getattr(getattr(request, 'user', None), 'pk', None),
+                'total_ms': round(total_ms, 3),
+                'db_ms': round(timer.db_seconds * 1000, 3),
+                'serialize_ms': round(timer.serializer_seconds * 1000, 3),
+                'queries': timer.query_count,
+                'sampled': sampled,
+            }
+            if timer.detailed:
+                record['slowest'] = timer.slowest_queries()
+                record['duplicates'] = duplicates
+            (logger.warning if duplicates else logger.info)(json.dumps(record))
+
+        return response
+
+
+def view_labels(request):
+    """
+    (view, action) for the metrics: the view's dotted path, and the viewset
+    action (list, retrieve, export_csv, ...) or the lowercased method.
+    """
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched', request.method.lower()
+    func = getattr(match.func, 'view_class', match.func)
+    view = f'{func.__module__}.{func.__name__}'
+    actions = getattr(match.func, 'actions', None) or {}
+    return view, actions.get(request.method.lower(), request.method.lower())
+
+
+class MetricsMiddleware:
+    """
+    Records latency, query count and response size per view and action in
+    monitoring.metrics. Placed after RequestTimingMiddleware, whose timer
+    supplies the query count. Streamed bodies are counted as they are sent;
+    their latency is the time to the first byte.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started = time.perf_counter()
+        response = self.get_response(request)
+        elapsed = time.perf_counter() - started
+
+        view, action = view_labels(request)
+        metrics.request_duration.observe(
+            elapsed, view=view, action=action, method=request.method, status=f'{response.status_code // 100}xx'
+        )
+        timer = timing.current()
+        if timer is not None:
+            metrics.request_queries.observe(timer.query_count, view=view, action=action)
+
+        if response.streaming:
+            response.streaming_content = _counted(response.streaming_content, view, action)
+        else:
+            metrics.response_size.observe(len(response.content), view=view, action=action)
+        return response
+
+
+def _counted(content, view, action):
+    # Closed by the response when the server is done with it, even if the
+    # client went away part way through.
+    sent = 0
+    try:
+        for chunk in content:
+            sent += len(chunk)
+            yield chunk
+    finally:
+        metrics.response_size.observe(sent, view=view, action=action)
+        metrics.export_bytes.inc(sent, view=view, action=action)
@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.db import models
+
+
+class RequestProfile(models.Model):
+    """
+    A cProfile/tracemalloc capture of one request, taken on demand by
+    monitoring.profiling.ProfilingMiddleware.
+
+    `profile_file` holds the raw stats (load with `pstats.Stats`); the text
+    fields keep the top functions and allocation sites for the admin.
+    """
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, related_name='+')
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=500)
+    query_string = models.TextField(blank=True)
+    status_code = models.PositiveSmallIntegerField(null=True)
+    duration_ms = models.FloatField()
+    query_count = models.PositiveIntegerField(null=True)
+    peak_memory_bytes = models.BigIntegerField(null=True)
+    profile_file = models.FileField(upload_to='profiles/')
+    call_stats = models.TextField(blank=True)
+    allocations = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.method} {self.path} ({self.duration_ms:.0f} ms)"
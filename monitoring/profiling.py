@@ -0,0 +1,205 @@
+"""
+On-demand request profiling.
+
+A SUPER_USER adds `?profile=true` or an `X-Profile: true` header to any
+request. The request is run under cProfile and tracemalloc, and a
+RequestProfile is saved with the raw stats file (under MEDIA_ROOT/profiles/),
+the top functions by cumulative time and the top allocation sites. The
+response carries the profile's id in `X-Profile-Id`. Streaming responses are
+profiled until their last chunk is sent, so CSV exports are covered too;
+their id is not known when headers go out, so they get
+`X-Profile-Id: streaming` and are found in the admin. A profile that cannot
+be saved is logged and the response goes out with `X-Profile-Id: failed`.
+
+tracemalloc is process-wide, so one request per process is profiled at a
+time. A request arriving while another is being profiled runs normally and
+gets `X-Profile-Id: busy`.
+"""
+import cProfile
+import io
+import logging
+import marshal
+import pstats
+import threading
+import time
+import tracemalloc
+import uuid
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from rest_framework.exceptions import APIException
+
+from users.authentication import CachedJWTAuthentication
+from .models import RequestProfile
+from . import timing
+
+logger = logging.getLogger(__name__)
+
+TOP_FUNCTIONS = 60
+TOP_ALLOCATIONS = 30
+TRACEBACK_FRAMES = 10
+
+_lock = threading.Lock()
+
+
+def wants_profile(request):
+    return request.GET.get('profile') == 'true' or request.headers.get('X-Profile') == 'true'
+
+
+def profiling_user(request):
+    """
+    The SUPER_USER making the request, or None. JWT requests are
+    authenticated here because DRF only does so inside the view.
+    """
+    user = getattr(request, 'user', None)
+    if not (user and user.is_authenticated):
+        try:
+            authenticated = CachedJWTAuthentication().authenticate(request)
+        except APIException:
+            authenticated = None
+        user = authenticated[0] if authenticated else None
+    if user is not None and getattr(user, 'role', None) == 'SUPER_USER':
+        return user
+    return None
+
+
+class Capture:
+    """
+    cProfile plus tracemalloc for one request.
+    """
+
+    def __init__(self, request, user):
+        self.request = request
+        self.user = user
+        self.profiler = cProfile.Profile()
+        self.started = time.perf_counter()
+        tracemalloc.start(TRACEBACK_FRAMES)
+
+    def run(self, func, *args):
+        self.profiler.enable()
+        try:
+            return func(*args)
+        finally:
+            self.profiler.disable()
+
+    def finish(self, response):
+        duration_ms = (time.perf_counter() - self.started) * 1000
+        try:
+            snapshot = tracemalloc.take_snapshot().filter_traces([
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, cProfile.__file__),
+            ])
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+            _lock.release()
+
+        # Stats takes the profiler's data, so the raw file is dumped from it.
+        stats_text = io.StringIO()
+        stats = pstats.Stats(self.profiler, stream=stats_text)
+        stats.sort_stats('cumulative').print_stats(TOP_FUNCTIONS)
+        allocations = '\n'.join(str(stat) for stat in snapshot.statistics('lineno')[:TOP_ALLOCATIONS])
+
+        timer = timing.current()
+        profile = RequestProfile(
+            user=self.user,
+            method=self.request.method,
+            path=self.request.path[:500],
+            query_string=self.request.META.get('QUERY_STRING', ''),
+            status_code=response.status_code,
+            duration_ms=duration_ms,
+            query_count=timer.query_count if timer else None,
+            peak_memory_bytes=peak,
+            call_stats=stats_text.getvalue(),
+            allocations=allocations,
+        )
+        profile.profile_file.save(f'{uuid.uuid4().hex}.prof', ContentFile(marshal.dumps(stats.stats)), save=False)
+        profile.save()
+        prune()
+        return profile
+
+
+def prune():
+    """
+    Deletes profiles beyond the newest REQUEST_PROFILE_KEEP, files included.
+    """
+    keep = getattr(settings, 'REQUEST_PROFILE_KEEP', 200)
+    for profile in RequestProfile.objects.order_by('-created_at', '-pk')[keep:]:
+        profile.profile_file.delete(save=False)
+        profile.delete()
+
+
+class ProfilingMiddleware:
+    """
+    Profiles requests that ask for it; see the module docstring.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not wants_profile(request):
+            return self.get_response(request)
+
+        user = profiling_user(request)
+        if user is None:
+            return self.get_response(request)
+        if not _lock.acquire(blocking=False):
+            response = self.get_response(request)
+            response['X-Profile-Id'] = 'busy'
+            return response
+
+        try:
+            capture = Capture(request, user)
+            response = capture.run(self.get_response, request)
+        except BaseException:
+            tracemalloc.stop()
+            _lock.release()
+            raise
+
+        if response.streaming:
+            response.streaming_content = ProfiledStream(capture, response)
+            response['X-Profile-Id'] = 'streaming'
+            return response
+
+        try:
+            profile = capture.finish(response)
+        except Exception:
+            logger.exception("Could not save the profile of %s", request.path)
+            response['X-Profile-Id'] = 'failed'
+        else:
+            response['X-Profile-Id'] = str(profile.pk)
+        return response
+
+
+class ProfiledStream:
+    """
+    Streaming content that stays under the profiler while each chunk is
+    produced, and saves the profile when exhausted or closed (a client that
+    disconnects early still releases the profiling lock).
+    """
+
+    def __init__(self, capture, response):
+        self.capture = capture
+        self.response = response
+        self.content = iter(response.streaming_content)
+        self.finished = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            return self.capture.run(next, self.content)
+        except StopIteration:
+            self.close()
+            raise
+
+    def close(self):
+        if self.finished:
+            return
+        self.finished = True
+        try:
+            self.capture.finish(self.response)
+        except Exception:
+            logger.exception("Could not save the profile of %s", self.capture.request.path)
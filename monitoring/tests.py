@@ -0,0 +1,193 @@
+import io
+import json
+import marshal
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from benchmarks import synthetic
+from companies.models import Company
+from users.models import User
+from users.serializers import CustomTokenObtainPairSerializer
+from . import metrics
+from .models import RequestProfile
+
+
+class RequestTimingMiddlewareTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(user_id='admin', password='x', role='SUPER_USER', full_name='Admin')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        for i in range(6):
+            Company.objects.create(name=f'Company {i}', pan=f'AAAAA000{i}A')
+
+    def timings(self, response):
+        return {part.split(';')[0]: part for part in response['Server-Timing'].split(', ')}
+
+    @override_settings(REQUEST_TIMING_SAMPLE_RATE=0)
+    def test_every_response_carries_server_timing(self):
+        response = self.client.get('/api/cost-centres/')
+        timings = self.timings(response)
+        self.assertEqual(set(timings), {'db', 'serialize', 'app', 'total'})
+        self.assertIn('queries"', timings['db'])
+
+    @override_settings(REQUEST_TIMING_SAMPLE_RATE=1, REQUEST_TIMING_DUPLICATE_THRESHOLD=5)
+    def test_sampled_requests_flag_repeated_queries(self):
+        # Each company's documents are loaded separately: an N+1.
+        with self.assertLogs('monitoring.middleware', 'WARNING') as logs:
+            response = self.client.get('/api/companies/')
+
+        self.assertIn('dup', self.timings(response))
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record['path'], '/api/companies/')
+        self.assertEqual(record['duplicates'][0]['count'], 6)
+        self.assertIn('companies_companydocument', record['duplicates'][0]['sql'])
+        self.assertLessEqual(len(record['slowest']), 3)
+
+
+class ProfilingMiddlewareTests(TestCase):
+
+    def setUp(self):
+        self.media = tempfile.TemporaryDirectory()
+        self.addCleanup(self.media.cleanup)
+        override = override_settings(MEDIA_ROOT=self.media.name)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.admin = User.objects.create_user(user_id='admin', password='x', role='SUPER_USER', full_name='Admin')
+        self.accountant = User.objects.create_user(user_id='acc', password='x', role='ACCOUNTANT', full_name='Acc')
+        Company.objects.create(name='Acme', pan='AAAAA0000A')
+
+    def client_for(self, user):
+        client = APIClient()
+        token = CustomTokenObtainPairSerializer.get_token(user).access_token
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        return client
+
+    def test_super_user_request_is_profiled(self):
+        response = self.client_for(self.admin).get('/api/companies/?profile=true')
+
+        profile = RequestProfile.objects.get(pk=response['X-Profile-Id'])
+        self.assertEqual((profile.path, profile.status_code, profile.user), ('/api/companies/', 200, self.admin))
+        self.assertIn('rest_framework/views.py', profile.call_stats)
+        self.assertTrue(profile.allocations)
+        with profile.profile_file.open('rb') as f:
+            self.assertTrue(marshal.load(f))
+
+    def test_streaming_response_is_profiled_when_consumed(self):
+        synthetic.generate(companies=1, transactions=20, cash_entries=5, batch_size=20)
+        response = self.client_for(self.admin).get('/api/reports/entity-report/export/', HTTP_X_PROFILE='true')
+        self.assertEqual(response['X-Profile-Id'], 'streaming')
+        self.assertFalse(RequestProfile.objects.exists())
+
+        b''.join(response.streaming_content)
+        self.assertTrue(RequestProfile.objects.get().profile_file)
+
+    def test_a_profile_that_cannot_be_saved_does_not_fail_the_request(self):
+        client = self.client_for(self.admin)
+        with mock.patch.object(RequestProfile, 'save', side_effect=OSError('disk full')), \
+                self.assertLogs('monitoring.profiling', 'ERROR'):
+            response = client.get('/api/companies/?profile=true')
+
+        self.assertEqual((response.status_code, response['X-Profile-Id']), (200, 'failed'))
+        response = client.get('/api/companies/?profile=true')
+        self.assertTrue(RequestProfile.objects.filter(pk=response['X-Profile-Id']).exists())
+
+    def test_other_roles_are_not_profiled(self):
+        response = self.client_for(self.accountant).get('/api/companies/?profile=true')
+        self.assertFalse(response.has_header('X-Profile-Id'))
+        self.assertFalse(RequestProfile.objects.exists())
+
+
+class MetricsTests(TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        override = override_settings(METRICS_DIR=self.directory.name, METRICS_TOKEN='secret')
+        override.enable()
+        self.addCleanup(override.disable)
+        metrics.registry.reset()
+        self.addCleanup(metrics.registry.reset)
+
+        self.user = User.objects.create_user(user_id='admin', password='x', role='SUPER_USER', full_name='Admin')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        Company.objects.create(name='Acme', pan='AAAAA0000A')
+
+    def scrape(self):
+        response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        return response.content.decode()
+
+    def test_requests_are_recorded_per_view_and_action(self):
+        self.client.get('/api/companies/')
+        self.client.get('/api/companies/')
+        text = self.scrape()
+
+        labels = 'view="companies.views.CompanyViewSet",action="list"'
+        self.assertIn(f'igen_http_request_duration_seconds_count{{{labels},method="GET",status="2xx"}} 2', text)
+        self.assertIn(f'igen_http_request_duration_seconds_bucket{{{labels},method="GET",status="2xx",le="+Inf"}} 2', text)
+        self.assertIn(f'igen_http_request_queries_count{{{labels}}} 2', text)
+        self.assertIn(f'igen_http_response_size_bytes_count{{{labels}}} 2', text)
+
+    def test_workers_snapshots_are_merged(self):
+        self.client.get('/api/companies/')
+        self.scrape()
+        own = Path(self.directory.name) / metrics.registry.filename
+        shutil.copy(own, Path(self.directory.name) / '1-0123456789ab.json')
+
+        text = self.scrape()
+        self.assertIn(
+            'igen_http_request_duration_seconds_count{view="companies.views.CompanyViewSet",'
+            'action="list",method="GET",status="2xx"} 2', text
+        )
+
+    def test_a_reused_pid_does_not_overwrite_a_dead_workers_snapshot(self):
+        filename = metrics.registry.filename
+        self.assertTrue(filename.startswith(f'{os.getpid()}-'))
+
+        self.client.get('/api/companies/')
+        self.scrape()
+        metrics.registry.after_fork()  # stands in for a new worker with the same pid
+        self.addCleanup(setattr, metrics.registry, 'filename', filename)
+        self.client.get('/api/companies/')
+        self.scrape()
+
+        self.assertEqual(len(list(Path(self.directory.name).glob(f'{os.getpid()}-*.json'))), 2)
+        self.assertIn(
+            'igen_http_request_duration_seconds_count{view="companies.views.CompanyViewSet",'
+            'action="list",method="GET",status="2xx"} 2', self.scrape()
+        )
+
+    def test_streamed_exports_and_imports_are_counted(self):
+        synthetic.generate(companies=1, transactions=20, cash_entries=5, batch_size=20)
+        response = self.client.get('/api/reports/entity-report/export/')
+        size = len(b''.join(response.streaming_content))
+
+        upload = io.BytesIO(b'company,bank_account,cost_centre,transaction_type,direction,amount,date,notes\n')
+        upload.name = 'empty.csv'
+        self.client.post('/api/bulk-upload/', {'file': upload}, format='multipart')
+
+        text = self.scrape()
+        self.assertIn(
+            f'igen_export_bytes_total{{view="reports.views.TransactionLedgerViewSet",action="export_csv"}} {size}', text
+        )
+        self.assertIn('igen_import_rows_total{kind="transactions",mode="sync"} 0', text)
+
+    def test_token_is_required(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 401)
+        self.assertEqual(self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer wrong').status_code, 401)
+        self.assertIn('# TYPE igen_export_bytes_total counter', self.scrape())
+
+        with override_settings(METRICS_TOKEN=None):
+            self.assertEqual(self.client.get('/metrics').status_code, 403)
+            with override_settings(DEBUG=True):
+                self.assertEqual(self.client.get('/metrics').status_code, 200)
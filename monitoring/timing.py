@@ -0,0 +1,129 @@
+"""
+Per-request timing: database time and query counts, serializer time, and,
+for sampled requests, the slowest statements and repeated query shapes.
+
+A RequestTimer is installed for the duration of a request by
+monitoring.middleware.RequestTimingMiddleware. Queries reach it through
+`connection.execute_wrapper`. Serializer time is added by `serializer_timer`,
+which wraps the `data` property of DRF serializers (see MonitoringConfig).
+"""
+import heapq
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+_current = ContextVar('request_timer', default=None)
+
+# IN (%s, %s, ...) lists of any length collapse to one shape.
+_IN_LIST = re.compile(r'\((?:%s, )+%s\)')
+SQL_PREVIEW = 300
+
+
+def current():
+    return _current.get()
+
+
+def query_shape(sql):
+    return _IN_LIST.sub('(%s, ...)', sql)
+
+
+class RequestTimer:
+    """
+    Collects timings for one request. With `detailed` off only counts and
+    durations are kept, so unsampled requests pay for two perf_counter()
+    calls per query.
+    """
+
+    def __init__(self, detailed=False, slowest=3):
+        self.detailed = detailed
+        self.slowest_limit = slowest
+        self.started = time.perf_counter()
+        self.query_count = 0
+        self.db_seconds = 0.0
+        self.serializer_seconds = 0.0
+        self._serializing = False
+        self.shapes = {}
+        self.slowest = []
+
+    def __call__(self, execute, sql, params, many, context):
+        # connection.execute_wrapper hook.
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.query_count += 1
+            self.db_seconds += elapsed
+            if self.detailed:
+                self._record(sql, elapsed)
+
+    def _record(self, sql, elapsed):
+        shape = query_shape(sql)
+        count, total = self.shapes.get(shape, (0, 0.0))
+        self.shapes[shape] = (count + 1, total + elapsed)
+
+        entry = (elapsed, self.query_count, sql)
+        if len(self.slowest) < self.slowest_limit:
+            heapq.heappush(self.slowest, entry)
+        elif entry > self.slowest[0]:
+            heapq.heapreplace(self.slowest, entry)
+
+    @contextmanager
+    def activate(self):
+        token = _current.set(self)
+        try:
+            yield self
+        finally:
+            _current.reset(token)
+
+    @property
+    def total_seconds(self):
+        return time.perf_counter() - self.started
+
+    def duplicates(self, threshold):
+        """
+        Query shapes run at least `threshold` times, most frequent first:
+        the signature of an N+1 loop.
+        """
+        repeated = [
+            {'count': count, 'ms': round(total * 1000, 3), 'sql': shape[:SQL_PREVIEW]}
+            for shape, (count, total) in self.shapes.items() if count >= threshold
+        ]
+        return sorted(repeated, key=lambda item: -item['count'])
+
+    def slowest_queries(self):
+        return [
+            {'ms': round(elapsed * 1000, 3), 'sql': sql[:SQL_PREVIEW]}
+            for elapsed, _, sql in sorted(self.slowest, reverse=True)
+        ]
+
+    def server_timing(self):
+        total = self.total_seconds
+        return ', '.join([
+            f'db;dur={self.db_seconds * 1000:.1f};desc="{self.query_count} queries"',
+            f'serialize;dur={self.serializer_seconds * 1000:.1f}',
+            f'app;dur={max(total - self.db_seconds, 0) * 1000:.1f}',
+            f'total;dur={total * 1000:.1f}',
+        ])
+
+
+def serializer_timer(data_property):
+    """
+    Wraps a serializer's `data` property so time spent producing the
+    representation, lazy queries included, counts as serializer time. Only
+    the outermost serializer is timed; nested ones are already inside it.
+    """
+    def data(serializer):
+        timer = _current.get()
+        if timer is None or timer._serializing:
+            return data_property.fget(serializer)
+        timer._serializing = True
+        started = time.perf_counter()
+        try:
+            return data_property.fget(serializer)
+        finally:
+            timer.serializer_seconds += time.perf_counter() - started
+            timer._serializing = False
+
+    return property(data)
@@ -0,0 +1,65 @@
+from contacts.models import Contact
+from users.models import User
+from import_jobs.results import collect_row_results
+from .serializers import ProjectSerializer
+
+
+def clean_project_row(row):
+    """
+    Maps a CSV row onto ProjectSerializer input, resolving stakeholder and
+    property manager names to ids.
+    """
+    stakeholder_names = row.get('stakeholders', '')
+    stakeholder_ids = []
+    if stakeholder_names:
+        for name in stakeholder_names.split(';'):
+            contact = Contact.objects.filter(full_name__iexact=name.strip()).first()
+            if contact:
+                stakeholder_ids.append(contact.pk)
+
+    property_manager_email = row.get('property_manager_email')
+    property_manager = None
+    if property_manager_email:
+        property_manager = User.objects.filter(user_id__iexact=property_manager_email.strip(), role='PROPERTY_MANAGER').first()
+
+    key_stakeholder_name = row.get('key_stakeholder')
+    key_stakeholder = Contact.objects.filter(full_name__iexact=key_stakeholder_name.strip()).first() if key_stakeholder_name else None
+
+    data = {
+        'name': row.get('name'),
+        'start_date': row.get('start_date'),
+        'end_date': row.get('end_date'),
+        'expected_return': row.get('expected_return'),
+        'landmark': row.get('landmark'),
+        'pincode': row.get('pincode'),
+        'city': row.get('city'),
+        'district': row.get('district'),
+        'state': row.get('state') or 'Kerala',
+        'country': row.get('country') or 'India',
+        'stakeholder_ids': stakeholder_ids,
+        'property_manager_id': property_manager.id if property_manager else None,
+        'key_stakeholder_id': key_stakeholder.pk if key_stakeholder else None,
+        'company': row.get('company'),  # Must be company ID
+        'project_type': row.get('project_type'),
+        'project_status': row.get('project_status'),
+    }
+    # Optional relations are left out rather than sent as null.
+    return {key: value for key, value in data.items()
+            if value is not None or key not in ('property_manager_id', 'key_stakeholder_id')}
+
+
+def import_project_rows(rows):
+    """
+    Creates one project per CSV row, yielding (row_number, row, errors).
+    """
+    for i, row in enumerate(rows, start=1):
+        serializer = ProjectSerializer(data=clean_project_row(row))
+        if serializer.is_valid():
+            serializer.save()
+            yield i, row, None
+        else:
+            yield i, row, serializer.errors
+
+
+def import_job_results(reader, max_errors=None):
+    return collect_row_results(import_project_rows(reader), max_errors=max_errors)
@@ -6,12 +6,15 @@ from rest_framework.permissions import IsAuthenticated
 from .models import Project, Property
 from .serializers import ProjectSerializer, PropertySerializer
 
-from contacts.models import Contact
-from users.models import User
 from users.permissions import IsSuperUserOrCenterHead
+from igen.tenancy import TenantScopedMixin
+from import_jobs.views import queue_import
+from .importers import import_project_rows
+from monitoring.metrics import record_import
 
 import csv
 import logging
+import time
 from django.conf import settings
 
 logger = logging.getLogger(__name__)
@@ -20,7 +23,7 @@ logger = logging.getLogger(__name__)
 # --------------------
 # ViewSet: Project CRUD
 # --------------------
-class ProjectViewSet(viewsets.ModelViewSet):
+class ProjectViewSet(TenantScopedMixin, viewsets.ModelViewSet):
     serializer_class = ProjectSerializer
     permission_classes = [IsSuperUserOrCenterHead]
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
@@ -29,11 +32,7 @@ class ProjectViewSet(viewsets.ModelViewSet):
     ordering = ['-start_date']
 
     def get_queryset(self):
-        user = self.request.user
-        base_qs = Project.objects.all()
-        if user.role == 'SUPER_USER':
-            return base_qs
-        return base_qs.filter(company__in=user.companies.all())
+        return self.scope_to_tenant(Project.objects.all())
 
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
@@ -88,6 +87,9 @@ def bulk_upload(request):
     if not file:
         return Response({'error': 'No file uploaded'}, status=status.HTTP_400_BAD_REQUEST)
 
+    if request.query_params.get('async') == 'true':
+        return queue_import(request, 'projects', file)
+
     try:
         decoded_file = file.read().decode('utf-8').splitlines()
         reader = csv.DictReader(decoded_file)
@@ -95,48 +97,13 @@ def bulk_upload(request):
         return Response({'error': 'Invalid CSV format', 'details': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
     results = []
+    started = time.perf_counter()
 
-    for i, row in enumerate(reader, start=1):
-        stakeholder_names = row.get('stakeholders', '')
-        stakeholder_ids = []
-        if stakeholder_names:
-            for name in stakeholder_names.split(';'):
-                contact = Contact.objects.filter(name__iexact=name.strip()).first()
-                if contact:
-                    stakeholder_ids.append(contact.id)
-
-        property_manager_email = row.get('property_manager_email')
-        property_manager = None
-        if property_manager_email:
-            property_manager = User.objects.filter(email__iexact=property_manager_email.strip(), role='PROPERTY_MANAGER').first()
-
-        key_stakeholder_name = row.get('key_stakeholder')
-        key_stakeholder = Contact.objects.filter(name__iexact=key_stakeholder_name.strip()).first() if key_stakeholder_name else None
-
-        clean_data = {
-            'name': row.get('name'),
-            'start_date': row.get('start_date'),
-            'end_date': row.get('end_date'),
-            'expected_return': row.get('expected_return'),
-            'landmark': row.get('landmark'),
-            'pincode': row.get('pincode'),
-            'city': row.get('city'),
-            'district': row.get('district'),
-            'state': row.get('state') or 'Kerala',
-            'country': row.get('country') or 'India',
-            'stakeholders': stakeholder_ids,
-            'property_manager_id': property_manager.id if property_manager else None,
-            'key_stakeholder_id': key_stakeholder.id if key_stakeholder else None,
-            'company': row.get('company'),  # Must be company ID
-            'project_type': row.get('project_type'),
-            'project_status': row.get('project_status'),
-        }
-
-        serializer = ProjectSerializer(data=clean_data)
-        if serializer.is_valid():
-            serializer.save()
-            results.append({'row': i, 'status': 'success'})
+    for i, row, errors in import_project_rows(reader):
+        if errors:
+            results.append({'row': i, 'status': 'error', 'errors': errors})
         else:
-            results.append({'row': i, 'status': 'error', 'errors': serializer.errors})
+            results.append({'row': i, 'status': 'success'})
+    record_import('projects', 'sync', len(results), time.perf_counter() - started)
 
     return Response({'results': results}, status=status.HTTP_200_OK)
@@ -6,24 +6,16 @@ from .models import Property, PropertyDocument, PropertyKeyDate
 from .serializers import PropertySerializer, PropertyDocumentSerializer, PropertyKeyDateSerializer
 from users.permissions import IsSuperUser
 from rest_framework.permissions import IsAuthenticated
+from igen.tenancy import TenantScopedMixin
 
 
-class PropertyViewSet(viewsets.ModelViewSet):
+class PropertyViewSet(TenantScopedMixin, viewsets.ModelViewSet):
     serializer_class = PropertySerializer
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-     user = self.request.user
-
-     if user.role == 'SUPER_USER':
-        return Property.objects.all().prefetch_related('documents', 'key_dates')
-    
-     elif user.role == 'PROPERTY_MANAGER':
-        # ❗ Only properties belonging to user's companies
-        return Property.objects.filter(company__in=user.companies.all()).prefetch_related('documents', 'key_dates')
-
-    # Default fallback — restrict others similarly
-     return Property.objects.filter(company__in=user.companies.all()).prefetch_related('documents', 'key_dates')
+        # ❗ Only properties belonging to user's companies (all for SUPER_USER)
+        return self.scope_to_tenant(Property.objects.all()).prefetch_related('documents', 'key_dates')
 
 
     @action(detail=True, methods=['post'])
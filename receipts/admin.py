@@ -1,3 +1,11 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import ReceiptMatch
+
+
+@admin.register(ReceiptMatch)
+class ReceiptMatchAdmin(admin.ModelAdmin):
+    list_display = ('receipt', 'transaction', 'method', 'score', 'days_apart', 'matched_by', 'matched_at')
+    list_filter = ('method',)
+    search_fields = ('receipt__reference', 'transaction__notes')
+    raw_id_fields = ('receipt', 'transaction')
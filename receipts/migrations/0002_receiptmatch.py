@@ -0,0 +1,30 @@
+# Generated by Django 5.2.4 on 2026-10-18 11:01
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('receipts', '0001_initial'),
+        ('transactions', '0008_classificationrule'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReceiptMatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(default=1.0)),
+                ('days_apart', models.PositiveIntegerField(default=0)),
+                ('method', models.CharField(choices=[('AUTO', 'Automatic'), ('MANUAL', 'Manual')], default='AUTO', max_length=6)),
+                ('matched_at', models.DateTimeField(auto_now_add=True)),
+                ('matched_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('receipt', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='match', to='receipts.receipt')),
+                ('transaction', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='receipt_match', to='transactions.transaction')),
+            ],
+        ),
+    ]
@@ -4,6 +4,8 @@ from entities.models import Entity
 from banks.models import BankAccount
 from cost_centres.models import CostCentre
 from transaction_types.models import TransactionType
+from transactions.models import Transaction
+from users.models import User
 
 class Receipt(models.Model):
     date = models.DateField()
@@ -26,3 +28,25 @@ class Receipt(models.Model):
 
     def __str__(self):
         return f"Receipt {self.reference} - ₹{self.amount}"
+
+
+class ReceiptMatch(models.Model):
+    """
+    A receipt reconciled with the CREDIT bank transaction that settled it.
+    Each side can be matched at most once.
+    """
+    METHOD_CHOICES = [
+        ('AUTO', 'Automatic'),
+        ('MANUAL', 'Manual'),
+    ]
+
+    receipt = models.OneToOneField(Receipt, on_delete=models.CASCADE, related_name='match')
+    transaction = models.OneToOneField(Transaction, on_delete=models.CASCADE, related_name='receipt_match')
+    score = models.FloatField(default=1.0)
+    days_apart = models.PositiveIntegerField(default=0)
+    method = models.CharField(max_length=6, choices=METHOD_CHOICES, default='AUTO')
+    matched_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    matched_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Receipt {self.receipt_id} ↔ Transaction {self.transaction_id} ({self.method})"
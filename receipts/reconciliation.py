@@ -0,0 +1,161 @@
+"""
+Matches receipts to CREDIT bank transactions.
+
+A receipt can only match a transaction on the same bank account for exactly
+the same amount, dated within `window_days` of the receipt. Transactions are
+bucketed by (bank account, amount) and sorted by date, so each receipt finds
+its candidates with two bisections instead of scanning every transaction.
+Candidates are scored on date proximity and on how closely the receipt's
+reference/notes resemble the bank narration, and pairs are assigned greedily
+from the best score down so each side is used once.
+"""
+import difflib
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction as db_transaction
+
+from transactions.models import Transaction
+from .models import Receipt, ReceiptMatch
+
+DEFAULT_WINDOW_DAYS = 5
+DEFAULT_MIN_SCORE = 0.3
+DATE_WEIGHT = 0.4
+TEXT_WEIGHT = 0.6
+
+
+def unmatched_receipts(company_id=None):
+    queryset = Receipt.objects.filter(match__isnull=True)
+    return queryset.filter(company_id=company_id) if company_id else queryset
+
+
+def unmatched_transactions(company_id=None):
+    queryset = Transaction.objects.filter(direction='CREDIT', receipt_match__isnull=True)
+    return queryset.filter(company_id=company_id) if company_id else queryset
+
+
+def text_similarity(receipt, narration):
+    narration = (narration or '').casefold()
+    reference = (receipt.reference or '').casefold().strip()
+    if not narration:
+        return 0.0
+    if reference and reference in narration:
+        return 1.0
+    text = ' '.join(filter(None, [reference, (receipt.notes or '').casefold()]))
+    if not text:
+        return 0.0
+    return difflib.SequenceMatcher(None, text, narration, autojunk=False).ratio()
+
+
+def score(receipt, transaction, window_days):
+    days = abs((transaction.date - receipt.date).days)
+    date_score = 1 - days / (window_days + 1)
+    return DATE_WEIGHT * date_score + TEXT_WEIGHT * text_similarity(receipt, transaction.notes), days
+
+
+class TransactionIndex:
+    """
+    Unmatched CREDIT transactions bucketed by (bank account, amount), each
+    bucket sorted by date for range lookups.
+    """
+
+    def __init__(self, transactions):
+        buckets = defaultdict(list)
+        for transaction in transactions:
+            buckets[(transaction.bank_account_id, transaction.amount)].append(transaction)
+        self.buckets = {}
+        for key, rows in buckets.items():
+            rows.sort(key=lambda row: (row.date, row.pk))
+            self.buckets[key] = ([row.date for row in rows], rows)
+
+    def candidates(self, bank_account_id, amount, date, window_days):
+        bucket = self.buckets.get((bank_account_id, amount))
+        if bucket is None:
+            return []
+        dates, rows = bucket
+        window = timedelta(days=window_days)
+        return rows[bisect_left(dates, date - window):bisect_right(dates, date + window)]
+
+
+def find_matches(receipts, transactions, window_days=DEFAULT_WINDOW_DAYS, min_score=DEFAULT_MIN_SCORE):
+    """
+    Returns unsaved ReceiptMatch objects for the best one-to-one pairing.
+    """
+    index = TransactionIndex(transactions)
+
+    pairs = []
+    for receipt in receipts:
+        if receipt.bank_id is None:
+            continue
+        for transaction in index.candidates(receipt.bank_id, receipt.amount, receipt.date, window_days):
+            pair_score, days = score(receipt, transaction, window_days)
+            if pair_score >= min_score:
+                pairs.append((pair_score, -days, receipt, transaction))
+
+    pairs.sort(key=lambda pair: (-pair[0], -pair[1], pair[2].pk, pair[3].pk))
+
+    matches, used_receipts, used_transactions = [], set(), set()
+    for pair_score, negative_days, receipt, transaction in pairs:
+        if receipt.pk in used_receipts or transaction.pk in used_transactions:
+            continue
+        used_receipts.add(receipt.pk)
+        used_transactions.add(transaction.pk)
+        matches.append(ReceiptMatch(
+            receipt=receipt, transaction=transaction,
+            score=round(pair_score, 4), days_apart=-negative_days, method='AUTO',
+        ))
+    return matches
+
+
+def reconcile(company_id=None, window_days=DEFAULT_WINDOW_DAYS, min_score=DEFAULT_MIN_SCORE,
+              dry_run=False, user=None):
+    """
+    Matches every unmatched receipt (optionally for one company) and saves
+    the pairs. Returns a summary dict; with dry_run nothing is saved.
+    """
+    receipts = list(
+        unmatched_receipts(company_id)
+        .filter(bank__isnull=False)
+        .only('id', 'date', 'amount', 'reference', 'notes', 'bank_id')
+    )
+    bank_ids = {receipt.bank_id for receipt in receipts}
+    transactions = list(
+        unmatched_transactions(company_id)
+        .filter(bank_account_id__in=bank_ids)
+        .only('id', 'date', 'amount', 'notes', 'bank_account_id')
+    ) if bank_ids else []
+
+    matches = find_matches(receipts, transactions, window_days, min_score)
+    for match in matches:
+        match.matched_by = user
+
+    summary = {
+        "receipts_considered": len(receipts),
+        "transactions_considered": len(transactions),
+        "matched": len(matches),
+        "saved": 0,
+    }
+    if dry_run:
+        summary["pairs"] = [
+            {
+                "receipt": match.receipt_id,
+                "transaction": match.transaction_id,
+                "score": match.score,
+                "days_apart": match.days_apart,
+            }
+            for match in matches
+        ]
+        return summary
+
+    if matches:
+        with db_transaction.atomic():
+            # Pairs matched concurrently (e.g. by hand) are skipped by the
+            # one-to-one constraints instead of failing the run.
+            ReceiptMatch.objects.bulk_create(matches, ignore_conflicts=True)
+            wanted = {(match.receipt_id, match.transaction_id) for match in matches}
+            stored = ReceiptMatch.objects.filter(
+                receipt_id__in=[match.receipt_id for match in matches]
+            ).values_list('receipt_id', 'transaction_id')
+            summary["saved"] = len(wanted.intersection(stored))
+    return summary
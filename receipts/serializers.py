@@ -4,7 +4,7 @@ from .models import Receipt, TransactionType, CostCentre
 
 # serializers.py
 from rest_framework import serializers
-from .models import Receipt, TransactionType, CostCentre
+from .models import Receipt, ReceiptMatch, Transaction, TransactionType, CostCentre
 
 class ReceiptSerializer(serializers.ModelSerializer):
     transaction_type_id = serializers.PrimaryKeyRelatedField(
@@ -26,3 +26,26 @@ class ReceiptSerializer(serializers.ModelSerializer):
             'notes', 'document'
         ]
         read_only_fields = ['transaction_type', 'cost_centre']
+
+
+class ReceiptMatchSerializer(serializers.ModelSerializer):
+    receipt_reference = serializers.CharField(source='receipt.reference', read_only=True)
+    transaction_date = serializers.DateField(source='transaction.date', read_only=True)
+    transaction_notes = serializers.CharField(source='transaction.notes', read_only=True)
+
+    class Meta:
+        model = ReceiptMatch
+        fields = [
+            'id', 'receipt', 'receipt_reference',
+            'transaction', 'transaction_date', 'transaction_notes',
+            'score', 'days_apart', 'method', 'matched_by', 'matched_at',
+        ]
+        read_only_fields = ['score', 'days_apart', 'method', 'matched_by', 'matched_at']
+
+
+class UnmatchedTransactionSerializer(serializers.ModelSerializer):
+    bank_name = serializers.CharField(source='bank_account.account_name', read_only=True)
+
+    class Meta:
+        model = Transaction
+        fields = ['id', 'company', 'bank_account', 'bank_name', 'amount', 'date', 'notes']
@@ -1,3 +1,124 @@
+import datetime
+from decimal import Decimal
+from urllib.parse import urlencode
+
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from banks.models import BankAccount
+from companies.models import Company
+from cost_centres.models import CostCentre
+from transaction_types.models import TransactionType
+from transactions.models import Transaction
+from users.models import User
+from . import reconciliation
+from .models import Receipt, ReceiptMatch
+
+DAY = datetime.date(2025, 4, 10)
+
+
+class ReconciliationTests(TestCase):
+
+    def setUp(self):
+        self.company = Company.objects.create(name='Acme', pan='AAAAA0000A')
+        self.bank = self.bank_account(self.company, 'Main')
+        self.cost_centre = CostCentre.objects.create(company=self.company, name='Admin')
+        self.transaction_type = TransactionType.objects.create(company=self.company, name='Rent received')
+        self.user = User.objects.create_user(user_id='admin', password='x', role='SUPER_USER', full_name='Admin')
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def bank_account(self, company, name):
+        return BankAccount.objects.create(
+            company=company, account_name=name, account_number=name, bank_name='SBI', ifsc='SBIN0000001'
+        )
+
+    def receipt(self, reference, amount='500.00', date=DAY, notes='', bank=None):
+        return Receipt.objects.create(
+            company=self.company, bank=bank or self.bank, transaction_type=self.transaction_type,
+            reference=reference, amount=Decimal(amount), date=date, notes=notes,
+        )
+
+    def credit(self, notes, amount='500.00', days=0, bank=None, company=None):
+        return Transaction.objects.create(
+            company=company or self.company, bank_account=bank or self.bank, cost_centre=self.cost_centre,
+            transaction_type=self.transaction_type, direction='CREDIT', amount=Decimal(amount),
+            date=DAY + datetime.timedelta(days=days), notes=notes,
+        )
+
+    def test_best_scoring_pair_within_the_window_wins(self):
+        receipt = self.receipt('INV-1001')
+        near = self.credit('NEFT CREDIT', days=1)
+        referenced = self.credit('NEFT/INV-1001/TENANT', days=3)
+        self.credit('NEFT/INV-1001/TENANT', days=9)
+        self.credit('NEFT/INV-1001/TENANT', amount='499.00')
+        transactions = list(Transaction.objects.all())
+
+        [match] = reconciliation.find_matches([receipt], transactions, window_days=5)
+        self.assertEqual((match.transaction, match.days_apart), (referenced, 3))
+
+        [match] = reconciliation.find_matches([receipt], transactions, window_days=2, min_score=0)
+        self.assertEqual(match.transaction, near)
+        self.assertEqual(reconciliation.find_matches([receipt], transactions, window_days=2, min_score=0.5), [])
+
+    def test_each_side_is_matched_once(self):
+        first = self.receipt('INV-1', notes='april rent')
+        second = self.receipt('INV-2', notes='april rent')
+        credit = self.credit('NEFT/INV-1')
+
+        matches = reconciliation.find_matches([first, second], [credit])
+
+        self.assertEqual([(match.receipt, match.transaction) for match in matches], [(first, credit)])
+
+    def test_form_encoded_dry_run_saves_nothing(self):
+        receipt = self.receipt('INV-7')
+        credit = self.credit('NEFT/INV-7', days=3)
+
+        response = self.client.post(
+            '/api/receipts/reconcile/', urlencode({'dry_run': 'true', 'window_days': '3'}),
+            content_type='application/x-www-form-urlencoded',
+        )
+
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data['pairs'][0]['transaction'], credit.pk)
+        self.assertFalse(ReceiptMatch.objects.exists())
+
+        response = self.client.post('/api/receipts/reconcile/?window_days=2', {}, format='json')
+        self.assertEqual(response.data['saved'], 0)
+        response = self.client.post('/api/receipts/reconcile/', {'window_days': 3}, format='json')
+        self.assertEqual(response.data['saved'], 1)
+        self.assertEqual(ReceiptMatch.objects.get().receipt, receipt)
+
+    def test_manual_match_and_unmatch(self):
+        receipt = self.receipt('INV-9')
+        other_company = Company.objects.create(name='Globex', pan='BBBBB0000B')
+        foreign = self.credit('NEFT', bank=self.bank_account(other_company, 'Globex'), company=other_company)
+        other_account = self.credit('NEFT', bank=self.bank_account(self.company, 'Savings'))
+        credit = self.credit('NEFT', days=2)
+
+        def match(transaction):
+            return self.client.post(f'/api/receipts/{receipt.pk}/match/', {'transaction': transaction.pk}, format='json')
+
+        self.assertEqual(match(foreign).status_code, 400)
+        self.assertEqual(match(other_account).status_code, 400)
+        response = match(credit)
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(ReceiptMatch.objects.get().method, 'MANUAL')
+        self.assertEqual(match(credit).status_code, 400)
+
+        self.assertEqual(self.client.post(f'/api/receipts/{receipt.pk}/unmatch/').status_code, 200)
+        self.assertFalse(ReceiptMatch.objects.exists())
+        self.assertEqual(self.client.post(f'/api/receipts/{receipt.pk}/unmatch/').status_code, 400)
+
+    def test_non_integer_ids_are_rejected(self):
+        for url in ('/api/receipts/unmatched/?company=abc', '/api/receipts/unmatched/?bank=1x',
+                    '/api/receipts/matches/?company=abc'):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 400, url)
+        response = self.client.post('/api/receipts/reconcile/', {'company': 'abc'}, format='json')
+        self.assertEqual((response.status_code, response.data['error']), (400, 'company must be an integer.'))
 
-# Create your tests here.
+        self.receipt('INV-3')
+        response = self.client.get(f'/api/receipts/unmatched/?company={self.company.pk}&bank={self.bank.pk}')
+        self.assertEqual((response.status_code, response.data['receipt_count']), (200, 1))
@@ -1,11 +1,153 @@
-from rest_framework import viewsets
-from rest_framework.parsers import MultiPartParser, FormParser
-from .models import Receipt
-from .serializers import ReceiptSerializer
+from django.db import IntegrityError, transaction as db_transaction
+from rest_framework import viewsets, status
+from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
+from rest_framework.response import Response
+from .models import Receipt, ReceiptMatch, Transaction
+from .serializers import ReceiptSerializer, ReceiptMatchSerializer, UnmatchedTransactionSerializer
+from . import reconciliation
 from users.permissions import IsSuperUser
 
+UNMATCHED_LIMIT = 500
+
+
+def _id_params(params, *names):
+    """
+    {name: int or None} for optional id parameters. Raises ValueError naming
+    the first one that is not an integer.
+    """
+    ids = {}
+    for name in names:
+        value = params.get(name) or None
+        try:
+            ids[name] = None if value is None else int(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"{name} must be an integer.")
+    return ids
+
+
 class ReceiptViewSet(viewsets.ModelViewSet):
     queryset = Receipt.objects.all().order_by('-date')
     serializer_class = ReceiptSerializer
     parser_classes = [MultiPartParser, FormParser]
     permission_classes = [IsSuperUser]
+
+    @action(detail=False, methods=['post'], parser_classes=[JSONParser, FormParser])
+    def reconcile(self, request):
+        """
+        Matches unmatched receipts to CREDIT bank transactions and saves the pairs.
+        Optional: company, window_days, min_score, dry_run (returns the pairs without saving).
+        """
+        def param(name, default=None):
+            # The body wins over the query string; QueryDict.get returns one value.
+            value = request.data.get(name) if hasattr(request.data, 'get') else None
+            return request.query_params.get(name, default) if value is None else value
+
+        try:
+            window_days = int(param('window_days', reconciliation.DEFAULT_WINDOW_DAYS))
+            min_score = float(param('min_score', reconciliation.DEFAULT_MIN_SCORE))
+        except (TypeError, ValueError):
+            return Response({"error": "window_days must be an integer and min_score a number."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            company = _id_params({'company': param('company')}, 'company')['company']
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        summary = reconciliation.reconcile(
+            company_id=company,
+            window_days=window_days,
+            min_score=min_score,
+            dry_run=str(param('dry_run')).lower() == 'true',
+            user=request.user,
+        )
+        return Response(summary, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['get'])
+    def unmatched(self, request):
+        """
+        Unmatched receipts and unmatched CREDIT transactions, optionally for
+        one company (?company=) or bank account (?bank=). Each list is capped
+        at ?limit= rows (default 500); the counts are always complete.
+        """
+        try:
+            ids = _id_params(request.query_params, 'company', 'bank')
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        company, bank = ids['company'], ids['bank']
+        try:
+            limit = min(int(request.query_params.get('limit', UNMATCHED_LIMIT)), 5000)
+        except ValueError:
+            limit = UNMATCHED_LIMIT
+
+        receipts = reconciliation.unmatched_receipts(company).select_related('transaction_type', 'cost_centre')
+        transactions = reconciliation.unmatched_transactions(company).select_related('bank_account')
+        if bank:
+            receipts = receipts.filter(bank_id=bank)
+            transactions = transactions.filter(bank_account_id=bank)
+
+        return Response({
+            "receipt_count": receipts.count(),
+            "transaction_count": transactions.count(),
+            "receipts": ReceiptSerializer(
+                receipts.order_by('date', 'id')[:limit], many=True, context={'request': request}
+            ).data,
+            "transactions": UnmatchedTransactionSerializer(
+                transactions.order_by('date', 'id')[:limit], many=True
+            ).data,
+        })
+
+    @action(detail=False, methods=['get'])
+    def matches(self, request):
+        queryset = ReceiptMatch.objects.select_related('receipt', 'transaction').order_by('-matched_at', '-id')
+        try:
+            company = _id_params(request.query_params, 'company')['company']
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if company:
+            queryset = queryset.filter(receipt__company_id=company)
+
+        page = self.paginate_queryset(queryset)
+        serializer = ReceiptMatchSerializer(page if page is not None else queryset, many=True)
+        if page is not None:
+            return self.get_paginated_response(serializer.data)
+        return Response(serializer.data)
+
+    @action(detail=True, methods=['post'], parser_classes=[JSONParser, FormParser])
+    def match(self, request, pk=None):
+        """
+        Manually matches this receipt with the CREDIT transaction in `transaction`,
+        which must belong to the receipt's company and bank account.
+        """
+        receipt = self.get_object()
+        try:
+            transaction = Transaction.objects.get(pk=request.data.get('transaction'), direction='CREDIT')
+        except (Transaction.DoesNotExist, ValueError, TypeError):
+            return Response({"error": "CREDIT transaction not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        if transaction.company_id != receipt.company_id:
+            return Response({"error": "Transaction belongs to another company."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        if receipt.bank_id is not None and transaction.bank_account_id != receipt.bank_id:
+            return Response({"error": "Transaction is on another bank account than the receipt."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            with db_transaction.atomic():
+                match = ReceiptMatch.objects.create(
+                    receipt=receipt, transaction=transaction, method='MANUAL', matched_by=request.user,
+                    days_apart=abs((transaction.date - receipt.date).days),
+                )
+        except IntegrityError:
+            return Response({"error": "Receipt or transaction is already matched."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        return Response(ReceiptMatchSerializer(match).data, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=['post'])
+    def unmatch(self, request, pk=None):
+        receipt = self.get_object()
+        deleted, _ = ReceiptMatch.objects.filter(receipt=receipt).delete()
+        if not deleted:
+            return Response({"error": "Receipt is not matched."}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({"detail": "Match removed."}, status=status.HTTP_200_OK)
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import TransactionLedgerCombined
+from .models import TransactionLedgerCombined, LedgerEntry, SpendRollup
 
 @admin.register(TransactionLedgerCombined)
 class TransactionLedgerCombinedAdmin(admin.ModelAdmin):
@@ -32,3 +32,20 @@ class TransactionLedgerCombinedAdmin(admin.ModelAdmin):
         'asset__name',
     )
     ordering = ('-date',)
+
+
+@admin.register(LedgerEntry)
+class LedgerEntryAdmin(admin.ModelAdmin):
+    list_display = ('date', 'source', 'amount', 'cost_centre', 'entity', 'transaction_type', 'company')
+    list_filter = ('source', 'company', 'date')
+    search_fields = ('remarks',)
+    ordering = ('-date',)
+    readonly_fields = [field.name for field in LedgerEntry._meta.fields]
+
+
+@admin.register(SpendRollup)
+class SpendRollupAdmin(admin.ModelAdmin):
+    list_display = ('month', 'source', 'company', 'cost_centre', 'transaction_type', 'entity', 'direction', 'total', 'count')
+    list_filter = ('source', 'company', 'fiscal_year', 'direction')
+    ordering = ('-month',)
+    readonly_fields = [field.name for field in SpendRollup._meta.fields]
@@ -0,0 +1,103 @@
+"""
+Single-query GROUPING SETS aggregation over a filtered ledger queryset.
+
+The filtered queryset is compiled to SQL and wrapped in one
+`GROUP BY GROUPING SETS (...)` statement, so several breakdowns and their
+grand total come back from one scan of the ledger.
+"""
+from itertools import combinations
+
+from django.db import connection
+from django.db.models import F
+from django.db.models.functions import TruncMonth
+
+# name -> (key expression, label expression or None)
+DIMENSIONS = {
+    'entity': (F('entity_id'), F('entity__name')),
+    'cost_centre': (F('cost_centre_id'), F('cost_centre__name')),
+    'transaction_type': (F('transaction_type_id'), F('transaction_type__name')),
+    'source': (F('source'), None),
+    'company': (F('company_id'), F('company__name')),
+    'month': (TruncMonth('date'), None),
+    'asset': (F('asset_id'), F('asset__name')),
+    'contract': (F('contract_id'), F('contract__description')),
+}
+
+MEASURES = {
+    'sum': 'COALESCE(SUM(amount), 0)',
+    'count': 'COUNT(*)',
+    'credit': 'COALESCE(SUM(CASE WHEN amount > 0 THEN amount END), 0)',
+    'debit': 'COALESCE(-SUM(CASE WHEN amount < 0 THEN amount END), 0)',
+    'net': 'COALESCE(SUM(amount), 0)',
+}
+
+
+def _key(name):
+    return f'{name}_key'
+
+
+def _label(name):
+    return f'{name}_label'
+
+
+def rollup_sets(dimensions):
+    """
+    ROLLUP(a, b, c) as grouping sets: (a, b, c), (a, b), (a,), ().
+    """
+    return [tuple(dimensions[:size]) for size in range(len(dimensions), -1, -1)]
+
+
+def cube_sets(dimensions):
+    """
+    CUBE(a, b, ...) as grouping sets: every subset of the dimensions.
+    """
+    return [subset for size in range(len(dimensions), -1, -1) for subset in combinations(dimensions, size)]
+
+
+def grouping_sets(queryset, dimensions, sets, measures=('credit', 'debit', 'net', 'count'), limit=None):
+    """
+    Aggregates `queryset` over each grouping set in one query.
+
+    `dimensions` lists the DIMENSIONS names used; `sets` is an iterable of
+    tuples of those names (`()` is the grand total). Returns a list of dicts
+    with a `grouping` tuple naming the set each row belongs to, the dimension
+    keys/labels for that set, and the requested measures.
+    """
+    projection = {}
+    for name in dimensions:
+        key, label = DIMENSIONS[name]
+        projection[_key(name)] = key
+        if label is not None:
+            projection[_label(name)] = label
+
+    inner = queryset.order_by().values('amount', **projection)
+    inner_sql, params = inner.query.sql_with_params()
+
+    qn = connection.ops.quote_name
+    group_columns = {
+        name: [qn(_key(name))] + ([qn(_label(name))] if DIMENSIONS[name][1] is not None else [])
+        for name in dimensions
+    }
+    select = [f'GROUPING({qn(_key(name))}) AS {qn("g_" + name)}' for name in dimensions]
+    select += [column for name in dimensions for column in group_columns[name]]
+    select += [f'{MEASURES[measure]} AS {qn(measure)}' for measure in measures]
+
+    grouping = ', '.join(
+        '(' + ', '.join(column for name in group_set for column in group_columns[name]) + ')'
+        for group_set in sets
+    )
+    sql = (
+        f'SELECT {", ".join(select)} FROM ({inner_sql}) AS ledger '
+        f'GROUP BY GROUPING SETS ({grouping})'
+    )
+    if limit is not None:
+        sql += f' LIMIT {int(limit)}'
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        columns = [col[0] for col in cursor.description]
+        rows = [dict(zip(columns, values)) for values in cursor.fetchall()]
+
+    for row in rows:
+        row['grouping'] = tuple(name for name in dimensions if row.pop('g_' + name) == 0)
+    return rows
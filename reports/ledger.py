@@ -0,0 +1,163 @@
+"""
+Incremental maintenance of the materialized ledger (reports.LedgerEntry).
+
+Every write to ClassifiedTransaction or CashLedgerRegister upserts or removes
+the matching ledger row, so reports read one indexed table instead of the
+UNION view. `rebuild()` repopulates from scratch and `find_inconsistencies()`
+compares the table with v_transaction_ledger_combined.
+
+`version()` changes whenever a committed write touches the ledger, so
+derived results (the pivot cache) can be keyed on it.
+"""
+from django.core.cache import cache
+from django.db import transaction as db_transaction
+from django.db.models import Count, Sum
+
+from transactions.models import ClassifiedTransaction
+from cash_ledger.models import CashLedgerRegister
+from .models import LedgerEntry, TransactionLedgerCombined
+
+UPDATE_FIELDS = [
+    'date', 'amount', 'cost_centre', 'entity', 'transaction_type',
+    'asset', 'contract', 'remarks', 'source', 'company',
+]
+BATCH_SIZE = 2000
+VERSION_KEY = 'reports:ledger_version'
+
+
+def entry_from_classification(ct):
+    return LedgerEntry(
+        classification_id=ct.pk,
+        date=ct.value_date,
+        amount=ct.amount,
+        cost_centre_id=ct.cost_centre_id,
+        entity_id=ct.entity_id,
+        transaction_type_id=ct.transaction_type_id,
+        asset_id=ct.asset_id,
+        contract_id=ct.contract_id,
+        remarks=ct.remarks,
+        source='BANK',
+        company_id=ct.company_id,
+    )
+
+
+def entry_from_cash_entry(entry):
+    return LedgerEntry(
+        cash_entry_id=entry.pk,
+        date=entry.date,
+        amount=entry.amount,
+        cost_centre_id=entry.cost_centre_id,
+        entity_id=entry.entity_id,
+        transaction_type_id=entry.transaction_type_id,
+        asset_id=entry.asset_id,
+        contract_id=entry.contract_id,
+        remarks=entry.remarks,
+        source='CASH',
+        company_id=entry.company_id,
+    )
+
+
+def sync_classifications(instances):
+    _sync(instances, 'classification', entry_from_classification,
+          lambda ct: ct.is_active_classification)
+
+
+def sync_cash_entries(instances):
+    _sync(instances, 'cash_entry', entry_from_cash_entry,
+          lambda entry: entry.is_active)
+
+
+def _sync(instances, link_field, build, is_active):
+    active = [build(obj) for obj in instances if is_active(obj)]
+    inactive_ids = [obj.pk for obj in instances if not is_active(obj)]
+
+    if inactive_ids:
+        LedgerEntry.objects.filter(**{f'{link_field}_id__in': inactive_ids}).delete()
+    if active:
+        LedgerEntry.objects.bulk_create(
+            active,
+            batch_size=BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=[link_field],
+            update_fields=UPDATE_FIELDS,
+        )
+    if instances:
+        changed()
+
+
+def version():
+    return cache.get(VERSION_KEY, 0)
+
+
+def changed():
+    """
+    Moves `version()` on once the current transaction commits.
+    """
+    db_transaction.on_commit(_bump_version)
+
+
+def _bump_version():
+    cache.add(VERSION_KEY, 0, None)
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 1, None)
+
+
+def rebuild():
+    """
+    Full refresh from the base tables. Returns the number of ledger rows.
+    """
+    with db_transaction.atomic():
+        LedgerEntry.objects.all().delete()
+        total = 0
+        sources = (
+            (ClassifiedTransaction.objects.filter(is_active_classification=True), entry_from_classification),
+            (CashLedgerRegister.objects.filter(is_active=True), entry_from_cash_entry),
+        )
+        for queryset, build in sources:
+            batch = []
+            for obj in queryset.order_by().iterator(chunk_size=BATCH_SIZE):
+                batch.append(build(obj))
+                if len(batch) >= BATCH_SIZE:
+                    LedgerEntry.objects.bulk_create(batch)
+                    total += len(batch)
+                    batch = []
+            LedgerEntry.objects.bulk_create(batch)
+            total += len(batch)
+    changed()
+    return total
+
+
+def _daily_totals(queryset):
+    rows = (
+        queryset.order_by()
+        .values('source', 'company_id', 'date')
+        .annotate(count=Count('*'), total=Sum('amount'))
+    )
+    return {
+        (row['source'], row['company_id'], row['date']): (row['count'], row['total'])
+        for row in rows
+    }
+
+
+def find_inconsistencies():
+    """
+    Compares per (source, company, date) row counts and sums between the
+    materialized table and the view. Returns a list of mismatches.
+    """
+    expected = _daily_totals(TransactionLedgerCombined.objects.all())
+    actual = _daily_totals(LedgerEntry.objects.all())
+
+    mismatches = []
+    for key in sorted(set(expected) | set(actual), key=str):
+        if expected.get(key) != actual.get(key):
+            source, company_id, date = key
+            mismatches.append({
+                'source': source,
+                'company': company_id,
+                'date': date,
+                'view': expected.get(key, (0, 0)),
+                'ledger': actual.get(key, (0, 0)),
+            })
+    return mismatches
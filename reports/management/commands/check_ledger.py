@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from reports import ledger
+
+
+class Command(BaseCommand):
+    help = "Compares the materialized ledger with v_transaction_ledger_combined."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true',
+                            help='Repopulate the ledger from the base tables before checking.')
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            count = ledger.rebuild()
+            self.stdout.write(f"Rebuilt ledger with {count} rows.")
+
+        mismatches = ledger.find_inconsistencies()
+        if not mismatches:
+            self.stdout.write(self.style.SUCCESS("Ledger is consistent with the view."))
+            return
+
+        for row in mismatches:
+            self.stdout.write(
+                f"{row['source']} company={row['company']} date={row['date']}: "
+                f"view (count, total)={row['view']} ledger={row['ledger']}"
+            )
+        self.stdout.write(self.style.ERROR(f"{len(mismatches)} mismatched days. Run with --rebuild to repair."))
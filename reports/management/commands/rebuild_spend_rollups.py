@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from reports import rollups
+
+
+class Command(BaseCommand):
+    help = "Recomputes the monthly spend rollups from the base tables."
+
+    def handle(self, *args, **options):
+        rows = rollups.rebuild()
+        self.stdout.write(self.style.SUCCESS(f"{rows} spend rollups rebuilt."))
@@ -0,0 +1,80 @@
+# Generated by Django 5.2.4 on 2026-10-18 10:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def populate_ledger(apps, schema_editor):
+    """
+    Copies the active rows with one INSERT ... SELECT per source, so nothing
+    is loaded into Python however large the tables are.
+    """
+    LedgerEntry = apps.get_model('reports', 'LedgerEntry')
+    qn = schema_editor.quote_name
+
+    common = ('amount', 'cost_centre', 'entity', 'transaction_type', 'asset', 'contract', 'remarks', 'company')
+    sources = (
+        ('transactions', 'ClassifiedTransaction', 'classification', 'value_date', 'is_active_classification', 'BANK'),
+        ('cash_ledger', 'CashLedgerRegister', 'cash_entry', 'date', 'is_active', 'CASH'),
+    )
+    for app_label, model_name, link_field, date_field, active_field, source in sources:
+        model = apps.get_model(app_label, model_name)
+
+        def column(name, model=model):
+            return qn(model._meta.get_field(name).column)
+
+        targets = [link_field, 'date', 'source'] + list(common)
+        schema_editor.execute(
+            'INSERT INTO {table} ({targets}) SELECT {pk}, {date}, %s, {columns} FROM {source} WHERE {active}'.format(
+                table=qn(LedgerEntry._meta.db_table),
+                targets=', '.join(qn(LedgerEntry._meta.get_field(name).column) for name in targets),
+                pk=qn(model._meta.pk.column),
+                date=column(date_field),
+                columns=', '.join(column(name) for name in common),
+                source=qn(model._meta.db_table),
+                active=column(active_field),
+            ),
+            [source],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0001_initial'),
+        ('cash_ledger', '0003_cashledgerregister_cash_ledger_company_329c68_idx'),
+        ('companies', '0002_company_is_active'),
+        ('contracts', '0003_remove_contract_asset'),
+        ('cost_centres', '0001_initial'),
+        ('entities', '0001_initial'),
+        ('reports', '0004_auto_20250730_1941'),
+        ('transaction_types', '0002_transactiontype_is_credit'),
+        ('transactions', '0007_classifiedtransaction_transaction_created_70c385_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LedgerEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('remarks', models.TextField(blank=True, null=True)),
+                ('source', models.CharField(choices=[('BANK', 'BANK'), ('CASH', 'CASH')], max_length=10)),
+                ('asset', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='assets.asset')),
+                ('cash_entry', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='ledger_entry', to='cash_ledger.cashledgerregister')),
+                ('classification', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='ledger_entry', to='transactions.classifiedtransaction')),
+                ('company', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='companies.company')),
+                ('contract', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='contracts.contract')),
+                ('cost_centre', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='cost_centres.costcentre')),
+                ('entity', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='entities.entity')),
+                ('transaction_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='transaction_types.transactiontype')),
+            ],
+            options={
+                'ordering': ['-date', '-id'],
+                'indexes': [models.Index(fields=['company', 'date'], name='reports_led_company_01efe2_idx'), models.Index(fields=['entity', 'date'], name='reports_led_entity__046267_idx'), models.Index(fields=['cost_centre', 'date'], name='reports_led_cost_ce_84462a_idx')],
+                'constraints': [models.CheckConstraint(condition=models.Q(models.Q(('cash_entry__isnull', True), ('classification__isnull', False)), models.Q(('cash_entry__isnull', False), ('classification__isnull', True)), _connector='OR'), name='ledger_entry_single_source')],
+            },
+        ),
+        migrations.RunPython(populate_ledger, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.4 on 2026-10-18 11:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def populate(apps, schema_editor):
+    from reports.rollups import rebuild
+    rebuild(apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cash_ledger', '0004_cashbalancehead'),
+        ('companies', '0002_company_is_active'),
+        ('cost_centres', '0001_initial'),
+        ('entities', '0001_initial'),
+        ('reports', '0005_ledgerentry'),
+        ('transaction_types', '0002_transactiontype_is_credit'),
+        ('transactions', '0009_transaction_is_classified'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SpendRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(choices=[('STATEMENT', 'STATEMENT'), ('BANK', 'BANK'), ('CASH', 'CASH')], max_length=10)),
+                ('direction', models.CharField(max_length=6, null=True)),
+                ('month', models.DateField()),
+                ('fiscal_year', models.PositiveSmallIntegerField()),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('count', models.BigIntegerField(default=0)),
+                ('company', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='companies.company')),
+                ('cost_centre', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='cost_centres.costcentre')),
+                ('entity', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='entities.entity')),
+                ('transaction_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='transaction_types.transactiontype')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['company', 'month'], name='reports_spe_company_add5b9_idx'), models.Index(fields=['company', 'fiscal_year'], name='reports_spe_company_e3cfcd_idx')],
+                'constraints': [models.UniqueConstraint(fields=('source', 'company', 'cost_centre', 'transaction_type', 'entity', 'direction', 'month'), name='spend_rollup_key', nulls_distinct=False)],
+            },
+        ),
+        migrations.RunPython(populate, migrations.RunPython.noop),
+    ]
@@ -15,3 +15,95 @@ class TransactionLedgerCombined(models.Model):
     class Meta:
         managed = False
         db_table = 'v_transaction_ledger_combined'
+
+
+class LedgerEntry(models.Model):
+    """
+    Materialized copy of v_transaction_ledger_combined.
+
+    One row per active classification (source BANK) or active cash entry
+    (source CASH), kept current incrementally by reports.ledger on every write
+    instead of re-running the UNION view for each report.
+    """
+    SOURCE_CHOICES = [('BANK', 'BANK'), ('CASH', 'CASH')]
+
+    classification = models.OneToOneField(
+        'transactions.ClassifiedTransaction', null=True, blank=True,
+        on_delete=models.CASCADE, related_name='ledger_entry'
+    )
+    cash_entry = models.OneToOneField(
+        'cash_ledger.CashLedgerRegister', null=True, blank=True,
+        on_delete=models.CASCADE, related_name='ledger_entry'
+    )
+
+    date = models.DateField()
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+    cost_centre = models.ForeignKey('cost_centres.CostCentre', on_delete=models.CASCADE, related_name='+')
+    entity = models.ForeignKey('entities.Entity', on_delete=models.CASCADE, related_name='+')
+    transaction_type = models.ForeignKey('transaction_types.TransactionType', on_delete=models.CASCADE, related_name='+')
+    asset = models.ForeignKey('assets.Asset', null=True, blank=True, on_delete=models.SET_NULL, related_name='+')
+    contract = models.ForeignKey('contracts.Contract', null=True, blank=True, on_delete=models.SET_NULL, related_name='+')
+    remarks = models.TextField(null=True, blank=True)
+    source = models.CharField(max_length=10, choices=SOURCE_CHOICES)
+    company = models.ForeignKey('companies.Company', null=True, on_delete=models.CASCADE, related_name='+')
+
+    class Meta:
+        ordering = ['-date', '-id']
+        indexes = [
+            models.Index(fields=['company', 'date']),
+            models.Index(fields=['entity', 'date']),
+            models.Index(fields=['cost_centre', 'date']),
+        ]
+        constraints = [
+            models.CheckConstraint(
+                condition=(
+                    models.Q(classification__isnull=False, cash_entry__isnull=True) |
+                    models.Q(classification__isnull=True, cash_entry__isnull=False)
+                ),
+                name='ledger_entry_single_source',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.source} {self.date} ₹{self.amount}"
+
+
+class SpendRollup(models.Model):
+    """
+    Monthly totals of one (source, company, cost centre, transaction type,
+    entity, direction), kept current by reports.rollups on every write to
+    the rows they summarise.
+
+    STATEMENT rows summarise bank statement lines (Transaction, no entity),
+    BANK rows active classifications and CASH rows active cash entries.
+    `fiscal_year` is the Indian April-March year the month falls in, named
+    by its first year (2024 = FY 2024-25).
+    """
+    SOURCE_CHOICES = [('STATEMENT', 'STATEMENT'), ('BANK', 'BANK'), ('CASH', 'CASH')]
+
+    source = models.CharField(max_length=10, choices=SOURCE_CHOICES)
+    company = models.ForeignKey('companies.Company', null=True, on_delete=models.CASCADE, related_name='+')
+    cost_centre = models.ForeignKey('cost_centres.CostCentre', on_delete=models.CASCADE, related_name='+')
+    transaction_type = models.ForeignKey('transaction_types.TransactionType', on_delete=models.CASCADE, related_name='+')
+    entity = models.ForeignKey('entities.Entity', null=True, on_delete=models.CASCADE, related_name='+')
+    direction = models.CharField(max_length=6, null=True)
+    month = models.DateField()
+    fiscal_year = models.PositiveSmallIntegerField()
+    total = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    count = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['source', 'company', 'cost_centre', 'transaction_type', 'entity', 'direction', 'month'],
+                nulls_distinct=False,
+                name='spend_rollup_key',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['company', 'month']),
+            models.Index(fields=['company', 'fiscal_year']),
+        ]
+
+    def __str__(self):
+        return f"{self.source} {self.month:%Y-%m} ₹{self.total}"
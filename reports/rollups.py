@@ -0,0 +1,294 @@
+"""
+Monthly spend rollups (reports.SpendRollup).
+
+Every write to a Transaction, ClassifiedTransaction or CashLedgerRegister
+adds its +/- contribution to one rollup row per (source, company, cost
+centre, transaction type, entity, direction, month); see reports.signals.
+Increments are batched INSERT ... ON CONFLICT DO UPDATE statements, so trends
+and spend-by-cost-centre read a few hundred rows per company-year instead
+of scanning the history. `rebuild()` recomputes everything.
+"""
+from collections import defaultdict
+from datetime import date, timedelta
+
+from django.apps import apps
+from django.db import connection, transaction as db_transaction
+from django.db.models import BigIntegerField, Count, F, Q, Sum, Value
+from django.db.models.functions import TruncMonth
+
+from .models import SpendRollup
+
+BATCH_SIZE = 1000
+KEY_FIELDS = ('source', 'company_id', 'cost_centre_id', 'transaction_type_id', 'entity_id', 'direction', 'month')
+FY_START_MONTH = 4
+
+UPSERT_SQL = """
+    INSERT INTO {table} ({columns}, fiscal_year, total, count)
+    VALUES {values}
+    ON CONFLICT ({columns}) DO UPDATE
+    SET total = {table}.total + EXCLUDED.total, count = {table}.count + EXCLUDED.count
+"""
+
+
+def fiscal_year(day):
+    """
+    The Indian fiscal year `day` falls in, named by its first year.
+    """
+    return day.year if day.month >= FY_START_MONTH else day.year - 1
+
+
+def fiscal_year_label(year):
+    return f"FY{year}-{(year + 1) % 100:02d}"
+
+
+class Source:
+    """
+    How one model's rows roll up: the date they count on, whether a row
+    counts at all, and its direction (a fixed value when the model has none).
+    """
+
+    def __init__(self, name, model, date_field, active_field=None, entity=True, direction=None):
+        self.name = name
+        self.model_label = model
+        self.date_field = date_field
+        self.active_field = active_field
+        self.entity = entity
+        self.direction = direction
+
+    @property
+    def model(self):
+        return apps.get_model(self.model_label)
+
+    @property
+    def fields(self):
+        fields = ['company_id', 'cost_centre_id', 'transaction_type_id', self.date_field, 'amount']
+        if self.entity:
+            fields.append('entity_id')
+        if self.active_field:
+            fields.append(self.active_field)
+        if self.direction is None:
+            fields.append('direction')
+        return fields
+
+    def state(self, instance):
+        """
+        (key, amount) for the row's contribution, None if it contributes
+        nothing, or UNKNOWN if a field it needs was deferred.
+        """
+        if instance.get_deferred_fields().intersection(self.fields):
+            return UNKNOWN
+        if self.active_field and not getattr(instance, self.active_field):
+            return None
+        day = getattr(instance, self.date_field)
+        if day is None or instance.amount is None:
+            return None
+        key = (
+            self.name,
+            instance.company_id,
+            instance.cost_centre_id,
+            instance.transaction_type_id,
+            instance.entity_id if self.entity else None,
+            self.direction or instance.direction,
+            day.replace(day=1),
+        )
+        return key, instance.amount
+
+    def totals(self, registry=apps):
+        """
+        Grouped totals of the rows that count, for `rebuild()`.
+        """
+        queryset = registry.get_model(self.model_label).objects.order_by()
+        if self.active_field:
+            queryset = queryset.filter(**{self.active_field: True})
+        return queryset.values(
+            'company_id', 'cost_centre_id', 'transaction_type_id',
+            rollup_entity=F('entity_id') if self.entity else Value(None, output_field=BigIntegerField()),
+            rollup_direction=Value(self.direction) if self.direction else F('direction'),
+            rollup_month=TruncMonth(self.date_field),
+        ).annotate(total=Sum('amount'), count=Count('pk'))
+
+
+UNKNOWN = object()
+
+SOURCES = [
+    Source('STATEMENT', 'transactions.Transaction', 'date', entity=False),
+    Source('BANK', 'transactions.ClassifiedTransaction', 'value_date', active_field='is_active_classification'),
+    # Cash entries are all payments out of the petty cash balance.
+    Source('CASH', 'cash_ledger.CashLedgerRegister', 'date', active_field='is_active', direction='DEBIT'),
+]
+
+
+class Deltas(defaultdict):
+    """
+    {rollup key: [total_delta, count_delta]} accumulator.
+    """
+
+    def __init__(self):
+        super().__init__(lambda: [0, 0])
+
+    def add(self, state, sign):
+        if state is None or state is UNKNOWN:
+            return
+        key, amount = state
+        self[key][0] += sign * amount
+        self[key][1] += sign
+
+    def apply(self):
+        apply_deltas({key: tuple(value) for key, value in self.items()})
+
+
+def apply_deltas(deltas):
+    """
+    Applies {key: (total_delta, count_delta)}. Keys gaining rows are upserted
+    in one statement; the rest only update existing rows, so rows removed by
+    a cascading delete (company, cost centre, ...) are never re-created.
+    """
+    deltas = {key: value for key, value in deltas.items() if value != (0, 0)}
+    if not deltas:
+        return
+
+    ordered = sorted(deltas.items(), key=lambda item: tuple('' if part is None else str(part) for part in item[0]))
+    inserts = [(key, value) for key, value in ordered if value[1] > 0]
+    updates = [(key, value) for key, value in ordered if value[1] <= 0]
+
+    with db_transaction.atomic():
+        for start in range(0, len(inserts), BATCH_SIZE):
+            _upsert(inserts[start:start + BATCH_SIZE])
+        for key, (total, count) in updates:
+            SpendRollup.objects.filter(**dict(zip(KEY_FIELDS, key))).update(
+                total=F('total') + total, count=F('count') + count
+            )
+
+
+def _upsert(rows):
+    qn = connection.ops.quote_name
+    columns = ', '.join(qn(SpendRollup._meta.get_field(name.removesuffix('_id')).column) for name in KEY_FIELDS)
+    placeholders = '(' + ', '.join(['%s'] * (len(KEY_FIELDS) + 3)) + ')'
+    params = []
+    for key, (total, count) in rows:
+        params.extend(key)
+        params.extend([fiscal_year(key[-1]), total, count])
+    sql = UPSERT_SQL.format(
+        table=qn(SpendRollup._meta.db_table), columns=columns, values=', '.join([placeholders] * len(rows)),
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+
+
+def rebuild(registry=apps):
+    """
+    Recomputes every rollup from the base tables. Returns the row count.
+    `registry` lets the migration that adds the table run this against
+    historical models.
+    """
+    rollup_model = registry.get_model('reports', 'SpendRollup')
+    rows = []
+    for source in SOURCES:
+        for row in source.totals(registry):
+            rows.append(rollup_model(
+                source=source.name,
+                company_id=row['company_id'],
+                cost_centre_id=row['cost_centre_id'],
+                transaction_type_id=row['transaction_type_id'],
+                entity_id=row['rollup_entity'],
+                direction=row['rollup_direction'],
+                month=row['rollup_month'],
+                fiscal_year=fiscal_year(row['rollup_month']),
+                total=row['total'],
+                count=row['count'],
+            ))
+
+    with db_transaction.atomic():
+        rollup_model.objects.all().delete()
+        rollup_model.objects.bulk_create(rows, batch_size=BATCH_SIZE)
+    return len(rows)
+
+
+def next_month(day):
+    return date(day.year + day.month // 12, day.month % 12 + 1, 1)
+
+
+def split_range(start, end):
+    """
+    Splits the inclusive date range [start, end] (either may be None) into
+    the whole months rollups answer, as SpendRollup filters, and the
+    partial months at either end, as (from, to) date filters on the base
+    table. The partial list is empty when the range is month-aligned.
+    """
+    first = start if start is None or start.day == 1 else next_month(start)
+    if end is None:
+        stop = None
+    elif (end + timedelta(days=1)).day == 1:
+        stop = next_month(end)
+    else:
+        stop = end.replace(day=1)
+
+    if first is not None and stop is not None and first >= stop:
+        return None, [(start, end)]
+
+    whole = {}
+    if first is not None:
+        whole['month__gte'] = first
+    if stop is not None:
+        whole['month__lt'] = stop
+    partial = []
+    if start is not None and first != start:
+        partial.append((start, first - timedelta(days=1)))
+    if end is not None and stop <= end:
+        partial.append((stop, end))
+    return whole, partial
+
+
+LABELS = {
+    'company': 'company__name',
+    'cost_centre': 'cost_centre__name',
+    'transaction_type': 'transaction_type__name',
+    'entity': 'entity__name',
+}
+GROUP_BY = ('company', 'cost_centre', 'transaction_type', 'entity', 'direction', 'source')
+
+
+def series(queryset, period='month', group_by=None):
+    """
+    Monthly or fiscal-year totals of a SpendRollup queryset, optionally one
+    series per `group_by` dimension. Returns a list of
+    {"key", "label", "points": [{"period", "credit", "debit", "net", "count"}]}.
+    """
+    period_field = 'month' if period == 'month' else 'fiscal_year'
+    fields = [period_field]
+    if group_by:
+        fields.append(group_by)
+        if group_by in LABELS:
+            fields.append(LABELS[group_by])
+
+    rows = (
+        queryset.order_by()
+        .values(*fields)
+        .annotate(
+            credit=Sum('total', filter=Q(direction='CREDIT')),
+            debit=Sum('total', filter=Q(direction='DEBIT')),
+            amount=Sum('total'),
+            rows=Sum('count'),
+        )
+        .order_by(*fields[1:], period_field)
+    )
+
+    result = {}
+    for row in rows:
+        key = row[group_by] if group_by else None
+        entry = result.setdefault(key, {
+            'key': key,
+            'label': row.get(LABELS.get(group_by)) if group_by in LABELS else (key if group_by else 'Total'),
+            'points': [],
+        })
+        credit, debit = row['credit'] or 0, row['debit'] or 0
+        entry['points'].append({
+            'period': row['month'].strftime('%Y-%m') if period == 'month' else fiscal_year_label(row['fiscal_year']),
+            'credit': credit,
+            'debit': debit,
+            'net': credit - debit,
+            'total': row['amount'] or 0,
+            'count': row['rows'],
+        })
+    return list(result.values())
+
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import TransactionLedgerCombined
+from .models import LedgerEntry
 
 class TransactionLedgerSerializer(serializers.ModelSerializer):
     entity_name = serializers.CharField(source='entity.name', read_only=True)
@@ -7,6 +7,10 @@ class TransactionLedgerSerializer(serializers.ModelSerializer):
     transaction_type_name = serializers.CharField(source='transaction_type.name', read_only=True)
 
     class Meta:
-        model = TransactionLedgerCombined
-        fields = '__all__'
+        model = LedgerEntry
+        fields = [
+            'id', 'date', 'amount', 'cost_centre', 'entity', 'transaction_type',
+            'asset', 'contract', 'remarks', 'source', 'company',
+            'entity_name', 'cost_centre_name', 'transaction_type_name',
+        ]
         read_only_fields = ['entity_name', 'cost_centre_name', 'transaction_type_name']
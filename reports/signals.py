@@ -0,0 +1,106 @@
+from django.db.models.signals import post_init, pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from igen.signals import post_bulk_create, post_bulk_delete, post_bulk_update
+from transactions.models import ClassifiedTransaction
+from cash_ledger.models import CashLedgerRegister
+from . import ledger, rollups
+from .models import LedgerEntry
+
+
+@receiver(post_save, sender=ClassifiedTransaction)
+def classification_saved(sender, instance, **kwargs):
+    ledger.sync_classifications([instance])
+
+
+@receiver(post_save, sender=CashLedgerRegister)
+def cash_entry_saved(sender, instance, **kwargs):
+    ledger.sync_cash_entries([instance])
+
+
+@receiver(post_delete, sender=ClassifiedTransaction)
+@receiver(post_delete, sender=CashLedgerRegister)
+def source_deleted(sender, instance, **kwargs):
+    # The ledger row goes with it by cascade.
+    ledger.changed()
+
+
+@receiver(post_bulk_delete, sender=ClassifiedTransaction)
+def classifications_bulk_deleted(sender, instances, **kwargs):
+    # No cascade without the collector: drop their ledger rows here.
+    LedgerEntry.objects.filter(classification_id__in=[instance.pk for instance in instances]).delete()
+    ledger.changed()
+
+
+@receiver(post_bulk_create)
+def rows_bulk_created(sender, instances, **kwargs):
+    if sender is ClassifiedTransaction:
+        ledger.sync_classifications(instances)
+    elif sender is CashLedgerRegister:
+        ledger.sync_cash_entries(instances)
+
+
+def _connect_rollups(source):
+    model = source.model
+
+    def remember_state(sender, instance, **kwargs):
+        instance._rollup_state = source.state(instance)
+
+    def saving(sender, instance, raw=False, **kwargs):
+        # Rows loaded with deferred fields: read what they counted as.
+        if not raw and not instance._state.adding and getattr(instance, '_rollup_state', None) is rollups.UNKNOWN:
+            stored = model.objects.filter(pk=instance.pk).first()
+            instance._rollup_state = source.state(stored) if stored is not None else None
+
+    def saved(sender, instance, created, raw=False, **kwargs):
+        if raw:
+            return
+        old = None if created else getattr(instance, '_rollup_state', None)
+        new = instance._rollup_state = source.state(instance)
+        if old != new:
+            deltas = rollups.Deltas()
+            deltas.add(old, -1)
+            deltas.add(new, 1)
+            deltas.apply()
+
+    def deleted(sender, instance, **kwargs):
+        deltas = rollups.Deltas()
+        state = getattr(instance, '_rollup_state', rollups.UNKNOWN)
+        deltas.add(source.state(instance) if state is rollups.UNKNOWN else state, -1)
+        deltas.apply()
+
+    def bulk_created(sender, instances, **kwargs):
+        deltas = rollups.Deltas()
+        for instance in instances:
+            deltas.add(source.state(instance), 1)
+        deltas.apply()
+
+    def bulk_deleted(sender, instances, **kwargs):
+        deltas = rollups.Deltas()
+        for instance in instances:
+            state = getattr(instance, '_rollup_state', rollups.UNKNOWN)
+            deltas.add(source.state(instance) if state is rollups.UNKNOWN else state, -1)
+        deltas.apply()
+
+    def bulk_updated(sender, instances, **kwargs):
+        deltas = rollups.Deltas()
+        for instance in instances:
+            old = getattr(instance, '_rollup_state', None)
+            new = instance._rollup_state = source.state(instance)
+            if old != new:
+                deltas.add(old, -1)
+                deltas.add(new, 1)
+        deltas.apply()
+
+    uid = f'spend_rollup_{source.name}'
+    post_init.connect(remember_state, sender=model, weak=False, dispatch_uid=uid)
+    pre_save.connect(saving, sender=model, weak=False, dispatch_uid=uid)
+    post_save.connect(saved, sender=model, weak=False, dispatch_uid=uid)
+    post_delete.connect(deleted, sender=model, weak=False, dispatch_uid=uid)
+    post_bulk_create.connect(bulk_created, sender=model, weak=False, dispatch_uid=uid)
+    post_bulk_update.connect(bulk_updated, sender=model, weak=False, dispatch_uid=uid)
+    post_bulk_delete.connect(bulk_deleted, sender=model, weak=False, dispatch_uid=uid)
+
+
+for _source in rollups.SOURCES:
+    _connect_rollups(_source)
@@ -1,3 +1,355 @@
-from django.test import TestCase
+import csv
+import datetime
+import importlib.util
+import io
+import unittest
+from decimal import Decimal
 
-# Create your tests here.
+from django.apps import apps as django_apps
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import TruncMonth
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from benchmarks import synthetic
+from cash_ledger.models import CashLedgerRegister
+from entities.models import Entity
+from transaction_types.models import TransactionType
+from transactions.models import Transaction, ClassifiedTransaction, ClassificationRule
+from transactions.classification import classify_batch
+from transactions.rules import auto_classify
+from users.models import User
+from . import ledger, rollups
+from .models import LedgerEntry, SpendRollup
+
+
+def rollup_rows():
+    return {
+        (row.source, row.company_id, row.cost_centre_id, row.transaction_type_id, row.entity_id,
+         row.direction, row.month, row.fiscal_year): (row.total, row.count)
+        for row in SpendRollup.objects.exclude(count=0)
+    }
+
+
+def ledger_rows():
+    fields = ('source', 'classification_id', 'cash_entry_id', 'company_id', 'date', 'amount',
+              'cost_centre_id', 'entity_id', 'transaction_type_id', 'asset_id', 'contract_id', 'remarks')
+    return sorted(LedgerEntry.objects.values_list(*fields), key=str)
+
+
+class LedgerTests(TestCase):
+
+    def setUp(self):
+        synthetic.generate(companies=2, transactions=200, cash_entries=40, batch_size=100)
+
+    def assertLedgerMatchesRebuild(self):
+        self.assertEqual(ledger.find_inconsistencies(), [])
+        maintained = ledger_rows()
+        ledger.rebuild()
+        self.assertEqual(maintained, ledger_rows())
+
+    def test_incremental_updates_match_a_rebuild(self):
+        self.assertLedgerMatchesRebuild()
+
+        split = ClassifiedTransaction.objects.filter(is_active_classification=True).first()
+        split.amount += 5
+        split.value_date = datetime.date(2021, 1, 1)
+        split.save()
+        ClassifiedTransaction.objects.filter(is_active_classification=True).exclude(pk=split.pk).first().delete()
+        inactive = ClassifiedTransaction.objects.filter(is_active_classification=True).exclude(pk=split.pk).first()
+        inactive.is_active_classification = False
+        inactive.save()
+
+        entry = CashLedgerRegister.objects.filter(is_active=True).first()
+        entry.remarks = 'edited'
+        entry.save()
+        CashLedgerRegister.objects.exclude(pk=entry.pk).first().delete()
+
+        self.assertLedgerMatchesRebuild()
+
+    def test_forced_reclassification_matches_a_rebuild(self):
+        transactions = Transaction.objects.filter(is_classified=True).order_by('pk')[:5]
+        groups = []
+        for txn in transactions:
+            split = txn.classifications.first()
+            groups.append({'transaction': txn.pk, 'splits': [{
+                'cost_centre': split.cost_centre_id, 'entity': split.entity_id,
+                'transaction_type': split.transaction_type_id, 'amount': str(txn.amount), 'value_date': '2022-01-01',
+            }]})
+
+        results = classify_batch(groups, force=True)
+
+        self.assertEqual({result['status'] for result in results}, {'classified'})
+        self.assertEqual(ClassifiedTransaction.objects.filter(transaction__in=transactions).count(), 5)
+        self.assertLedgerMatchesRebuild()
+        maintained = rollup_rows()
+        rollups.rebuild()
+        self.assertEqual(maintained, rollup_rows())
+
+    def test_migration_populates_the_same_rows(self):
+        expected = ledger_rows()
+        LedgerEntry.objects.all().delete()
+
+        migration = importlib.import_module('reports.migrations.0005_ledgerentry')
+        with connection.schema_editor() as schema_editor:
+            migration.populate_ledger(django_apps, schema_editor)
+
+        self.assertEqual(ledger_rows(), expected)
+
+
+class SpendRollupTests(TestCase):
+
+    def setUp(self):
+        synthetic.generate(companies=2, transactions=200, cash_entries=40, batch_size=100)
+        self.user = User.objects.get(user_id='bench-admin')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def assertRollupsMatchRebuild(self):
+        maintained = rollup_rows()
+        rollups.rebuild()
+        self.assertEqual(maintained, rollup_rows())
+
+    def test_incremental_updates_match_a_rebuild(self):
+        self.assertRollupsMatchRebuild()
+
+        txn = Transaction.objects.filter(is_classified=True).first()
+        txn.amount += 10
+        txn.date = datetime.date(2020, 3, 31)
+        txn.save()
+
+        split = ClassifiedTransaction.objects.exclude(transaction=txn).first()
+        split.is_active_classification = False
+        split.save()
+        ClassifiedTransaction.objects.filter(transaction=split.transaction).exclude(pk=split.pk).delete()
+
+        entry = CashLedgerRegister.objects.only('pk', 'amount').first()
+        entry.amount = Decimal('123.45')
+        entry.save(update_fields=['amount'])
+        CashLedgerRegister.objects.exclude(pk=entry.pk).first().delete()
+
+        self.assertRollupsMatchRebuild()
+
+    def test_auto_classification_moves_retyped_rows(self):
+        txn = Transaction.objects.filter(is_classified=False).first()
+        utilities = TransactionType.objects.create(company=txn.company, name='Utilities')
+        ClassificationRule.objects.create(
+            company=txn.company, name='Everything', cost_centre=txn.cost_centre,
+            entity=Entity.objects.filter(company=txn.company).first(), transaction_type=utilities,
+        )
+
+        summary = auto_classify()
+
+        self.assertGreater(summary['classified'], 0)
+        self.assertTrue(SpendRollup.objects.filter(source='STATEMENT', transaction_type=utilities, count__gt=0).exists())
+        self.assertRollupsMatchRebuild()
+
+    def test_trends_by_fiscal_year(self):
+        company = Transaction.objects.first().company
+        rows = Transaction.objects.filter(company=company).order_by('pk')[:2]
+        for txn, day in zip(rows, [datetime.date(2019, 3, 31), datetime.date(2019, 4, 1)]):
+            txn.date = day
+            txn.save()
+
+        response = self.client.get(
+            '/api/reports/spend-trends/',
+            {'period': 'fy', 'source': 'STATEMENT', 'company': company.pk, 'end': '2019-04'},
+        )
+        self.assertEqual(response.status_code, 200)
+        points = response.data['series'][0]['points']
+        self.assertEqual([point['period'] for point in points], ['FY2018-19', 'FY2019-20'])
+        self.assertEqual([point['count'] for point in points], [1, 1])
+        self.assertEqual(points[0]['total'], rows[0].amount)
+
+    def test_spend_by_cost_centre_matches_the_transactions(self):
+        start, end = datetime.date(2024, 5, 17), datetime.date(2025, 2, 3)
+        expected = {
+            row['cost_centre__name']: row['total']
+            for row in Transaction.objects.filter(date__range=(start, end)).order_by()
+            .values('cost_centre__name').annotate(total=Sum('amount'))
+        }
+
+        response = self.client.get('/api/spend-by-cost-centre/', {'start': start, 'end': end})
+        self.assertEqual({row['cost_centre']: row['total'] for row in response.data}, expected)
+
+    def test_split_range(self):
+        self.assertEqual(
+            rollups.split_range(datetime.date(2024, 5, 17), datetime.date(2024, 8, 31)),
+            ({'month__gte': datetime.date(2024, 6, 1), 'month__lt': datetime.date(2024, 9, 1)},
+             [(datetime.date(2024, 5, 17), datetime.date(2024, 5, 31))]),
+        )
+        self.assertEqual(
+            rollups.split_range(datetime.date(2024, 5, 2), datetime.date(2024, 5, 20)),
+            (None, [(datetime.date(2024, 5, 2), datetime.date(2024, 5, 20))]),
+        )
+
+
+class SummaryTests(TestCase):
+
+    def setUp(self):
+        synthetic.generate(companies=2, transactions=200, cash_entries=40, batch_size=100)
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.get(user_id='bench-admin'))
+
+    def summary(self, **params):
+        response = self.client.get('/api/reports/entity-report/summary/', params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def expected(self, queryset):
+        totals = queryset.aggregate(
+            credit=Sum('amount', filter=Q(amount__gt=0), default=Decimal('0')),
+            debit=-Sum('amount', filter=Q(amount__lt=0), default=Decimal('0')),
+            count=Count('id'),
+        )
+        return {
+            'total_credit': totals['credit'], 'total_debit': totals['debit'],
+            'net': totals['credit'] - totals['debit'], 'count': totals['count'],
+        }
+
+    def test_plain_totals(self):
+        data = self.summary()
+        expected = self.expected(LedgerEntry.objects.all())
+        self.assertEqual(data, {key: expected[key] for key in ('total_credit', 'total_debit', 'net')})
+
+    def test_each_breakdown_matches_the_ledger(self):
+        data = self.summary(breakdown='entity,cost_centre,transaction_type,source,month')
+        grand = self.expected(LedgerEntry.objects.all())
+        self.assertEqual(
+            {key: data[key] for key in ('total_credit', 'total_debit', 'net')},
+            {key: grand[key] for key in ('total_credit', 'total_debit', 'net')},
+        )
+
+        for name, field in [('entity', 'entity_id'), ('cost_centre', 'cost_centre_id'),
+                            ('transaction_type', 'transaction_type_id'), ('source', 'source')]:
+            items = {item[name]: item for item in data['breakdowns'][name]}
+            keys = set(LedgerEntry.objects.values_list(field, flat=True))
+            self.assertEqual(set(items), keys, name)
+            for key in keys:
+                expected = self.expected(LedgerEntry.objects.filter(**{field: key}))
+                self.assertEqual({k: items[key][k] for k in expected}, expected, (name, key))
+
+        months = LedgerEntry.objects.annotate(month=TruncMonth('date')).values_list('month', flat=True)
+        items = {item['month']: item for item in data['breakdowns']['month']}
+        self.assertEqual(set(items), {month.strftime('%Y-%m') for month in months})
+        for label, item in items.items():
+            year, month = map(int, label.split('-'))
+            expected = self.expected(LedgerEntry.objects.filter(date__year=year, date__month=month))
+            self.assertEqual({k: item[k] for k in expected}, expected, label)
+
+    def test_empty_totals_are_decimal_on_both_paths(self):
+        for params in ({}, {'breakdown': 'source'}):
+            data = self.summary(start_date='1900-01-01', end_date='1900-01-31', **params)
+            self.assertEqual(data['total_debit'], Decimal('0'))
+            self.assertTrue(all(isinstance(data[key], Decimal) for key in ('total_credit', 'total_debit', 'net')))
+
+
+class ExportTests(TestCase):
+
+    def setUp(self):
+        synthetic.generate(companies=2, transactions=200, cash_entries=40, batch_size=100)
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.get(user_id='bench-admin'))
+
+    def export(self, **params):
+        response = self.client.get('/api/reports/entity-report/export/', params)
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content)
+
+    def test_csv_header_and_rows(self):
+        header, *rows = csv.reader(io.StringIO(self.export().decode()))
+
+        self.assertEqual(header, [
+            'Date', 'Source', 'Amount', 'Cost Centre', 'Entity', 'Transaction Type', 'Asset', 'Contract', 'Remarks'
+        ])
+        expected = [
+            [entry.date.strftime('%Y-%m-%d'), entry.source, f'{entry.amount:.2f}',
+             entry.cost_centre.name if entry.cost_centre else '', entry.entity.name if entry.entity else '',
+             entry.transaction_type.name if entry.transaction_type else '',
+             entry.asset.name if entry.asset else '', entry.contract.description if entry.contract else '',
+             entry.remarks or '']
+            for entry in LedgerEntry.objects.select_related(
+                'cost_centre', 'entity', 'transaction_type', 'asset', 'contract'
+            )
+        ]
+        self.assertEqual(sorted(rows), sorted(expected))
+
+    def test_csv_query_count_is_constant(self):
+        counts = []
+        for params in ({'source': 'CASH'}, {}):
+            with CaptureQueriesContext(connection) as context:
+                rows = self.export(**params).count(b'\n') - 1
+            counts.append(len(context.captured_queries))
+            self.assertEqual(rows, LedgerEntry.objects.filter(**params).count())
+        self.assertEqual(counts[0], counts[1])
+
+    @unittest.skipUnless(importlib.util.find_spec('pyarrow'), 'pyarrow is not installed')
+    def test_columnar_files_keep_their_types(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        tables = {
+            'parquet': pq.read_table(io.BytesIO(self.export(format='parquet'))),
+            'arrow': pa.ipc.open_file(pa.BufferReader(self.export(format='arrow'))).read_all(),
+        }
+        for name, table in tables.items():
+            self.assertEqual(table.schema.field('date').type, pa.date32(), name)
+            self.assertEqual(table.schema.field('amount').type, pa.decimal128(12, 2), name)
+            self.assertEqual(table.schema.field('source').type, pa.string(), name)
+            self.assertEqual(table.num_rows, LedgerEntry.objects.count(), name)
+            self.assertEqual(
+                sum(table.column('amount').to_pylist()), LedgerEntry.objects.aggregate(total=Sum('amount'))['total']
+            )
+
+
+class PivotTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        synthetic.generate(companies=2, transactions=200, cash_entries=40, batch_size=100)
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.get(user_id='bench-admin'))
+
+    def pivot(self, **params):
+        return self.client.get('/api/reports/entity-report/pivot/', params)
+
+    def test_rollup_subtotals_and_grand_total(self):
+        response = self.pivot(dimensions='source,cost_centre', measures='sum,count')
+        self.assertEqual(response.status_code, 200)
+        rows = response.data['rows']
+
+        self.assertEqual(rows[-1]['grouping'], [])
+        self.assertEqual(rows[-1]['count'], LedgerEntry.objects.count())
+        self.assertEqual(rows[-1]['sum'], LedgerEntry.objects.aggregate(total=Sum('amount'))['total'])
+        for source in ('BANK', 'CASH'):
+            subtotal = next(row for row in rows if row['grouping'] == ['source'] and row['source'] == source)
+            details = [row for row in rows if row['grouping'] == ['source', 'cost_centre'] and row['source'] == source]
+            self.assertEqual(subtotal['count'], sum(row['count'] for row in details))
+            self.assertTrue(all(row['cost_centre_name'] for row in details))
+
+    def test_results_are_cached_until_the_ledger_changes(self):
+        self.pivot(dimensions='month')
+        with self.assertNumQueries(0):
+            self.pivot(dimensions='month')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            entry = CashLedgerRegister.objects.filter(is_active=True).first()
+            entry.is_active = False
+            entry.save()
+        with self.assertNumQueries(1):
+            response = self.pivot(dimensions='month')
+        self.assertEqual(response.data['rows'][-1]['count'], LedgerEntry.objects.count())
+
+    def test_limits(self):
+        self.assertEqual(self.pivot(dimensions='entity,cost_centre,month,source').status_code, 400)
+        self.assertEqual(self.pivot(dimensions='entity', measures='median').status_code, 400)
+        with override_settings(REPORT_PIVOT_MAX_ROWS=3):
+            self.assertEqual(self.pivot(dimensions='entity').status_code, 400)
+        response = self.pivot(dimensions='source,month', mode='cube', measures='count')
+        self.assertEqual(
+            {tuple(row['grouping']) for row in response.data['rows']},
+            {('source', 'month'), ('source',), ('month',), ()},
+        )
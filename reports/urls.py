@@ -1,10 +1,11 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import TransactionLedgerViewSet
+from .views import TransactionLedgerViewSet, spend_trends
 
 router = DefaultRouter()
 router.register(r'entity-report', TransactionLedgerViewSet, basename='entity-report')
 
 urlpatterns = [
+    path('spend-trends/', spend_trends, name='spend-trends'),
     path('', include(router.urls)),
 ]
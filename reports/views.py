@@ -1,33 +1,47 @@
+import hashlib
+import json
+from decimal import Decimal
+
 from rest_framework import viewsets, filters
 from django_filters.rest_framework import DjangoFilterBackend
-from .models import TransactionLedgerCombined
+from .models import LedgerEntry, SpendRollup
 from .serializers import TransactionLedgerSerializer
-from rest_framework.decorators import action
+from rest_framework.decorators import action, api_view
 from rest_framework.response import Response
-from django.db.models import Sum
-from django.http import HttpResponse
-import csv
+from rest_framework import status
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Sum, Q
+from django.utils.dateparse import parse_date
+
+from igen.exports import stream_csv, columnar_export, ColumnarRenderer, EXPORT_RENDERERS, EXPORT_CHUNK_SIZE
+
+from .aggregation import DIMENSIONS, grouping_sets, rollup_sets, cube_sets
+from . import ledger, rollups
+from igen import tenancy
+from igen.tenancy import TenantScopedMixin
+
+SUMMARY_BREAKDOWNS = ('entity', 'cost_centre', 'transaction_type', 'source', 'month')
+PIVOT_DIMENSIONS = ('entity', 'cost_centre', 'transaction_type', 'source', 'company', 'month', 'asset', 'contract')
+PIVOT_MEASURES = ('sum', 'count', 'credit', 'debit', 'net')
+PIVOT_MAX_DIMENSIONS = 3
+DEFAULT_PIVOT_MAX_ROWS = 5000
+DEFAULT_PIVOT_CACHE_SECONDS = 300
 
 
-class TransactionLedgerViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = TransactionLedgerCombined.objects.all().order_by('-date')
+class TransactionLedgerViewSet(TenantScopedMixin, viewsets.ReadOnlyModelViewSet):
+    # Reads the materialized ledger rather than the v_transaction_ledger_combined view.
+    queryset = LedgerEntry.objects.all().order_by('-date')
     serializer_class = TransactionLedgerSerializer
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter, filters.SearchFilter]
     filterset_fields = ['date', 'entity', 'cost_centre', 'transaction_type', 'source', 'company']
     ordering_fields = ['date', 'amount']
     search_fields = ['remarks']
+    cursor_ordering = ('-date', '-id')
 
     def get_queryset(self):
-        user = self.request.user
-        queryset = super().get_queryset()
-
-        # Restrict by user's company unless superuser
-        if hasattr(user, 'role') and user.role != 'SUPER_USER':
-            company = user.companies.first()
-            if company:
-                queryset = queryset.filter(company=company)
-            else:
-                return queryset.none()
+        # Restrict by user's companies unless superuser
+        queryset = self.scope_to_tenant(super().get_queryset())
 
         # Date range filtering
         start_date = self.request.query_params.get('start_date')
@@ -55,44 +69,256 @@ class TransactionLedgerViewSet(viewsets.ReadOnlyModelViewSet):
 
     @action(detail=False, methods=['get'], url_path='summary')
     def get_summary(self, request):
+        """
+        Credit/debit/net totals from one conditional-aggregation query.
+
+        ?breakdown=entity,cost_centre,transaction_type,source,month adds
+        per-dimension totals, computed in the same query via GROUPING SETS.
+        """
         queryset = self.filter_queryset(self.get_queryset())
 
-        total_credit = queryset.filter(amount__gt=0).aggregate(total=Sum('amount'))['total'] or 0
-        total_debit = queryset.filter(amount__lt=0).aggregate(total=Sum('amount'))['total'] or 0
-        net = total_credit + total_debit  # debit is negative
+        breakdowns = [
+            name for name in request.query_params.get('breakdown', '').split(',')
+            if name in SUMMARY_BREAKDOWNS
+        ]
+        if not breakdowns:
+            totals = queryset.order_by().aggregate(
+                total_credit=Sum('amount', filter=Q(amount__gt=0)),
+                total_debit=Sum('amount', filter=Q(amount__lt=0)),
+            )
+            total_credit = totals['total_credit'] or Decimal('0')
+            total_debit = abs(totals['total_debit'] or Decimal('0'))
+            return Response({
+                'total_credit': round(total_credit, 2),
+                'total_debit': round(total_debit, 2),
+                'net': round(total_credit - total_debit, 2),
+            })
+
+        rows = grouping_sets(queryset, breakdowns, [()] + [(name,) for name in breakdowns])
+
+        summary = {'total_credit': Decimal('0.00'), 'total_debit': Decimal('0.00'), 'net': Decimal('0.00')}
+        result = {'breakdowns': {name: [] for name in breakdowns}}
+        for row in rows:
+            totals = {
+                'total_credit': round(row['credit'], 2),
+                'total_debit': round(row['debit'], 2),
+                'net': round(row['net'], 2),
+                'count': row['count'],
+            }
+            if not row['grouping']:
+                summary.update({key: totals[key] for key in summary})
+                continue
+            name = row['grouping'][0]
+            key = row[f'{name}_key']
+            item = {name: key.strftime('%Y-%m') if name == 'month' and key else key}
+            if f'{name}_label' in row:
+                item[f'{name}_name'] = row[f'{name}_label']
+            item.update(totals)
+            result['breakdowns'][name].append(item)
 
-        return Response({
-            'total_credit': round(total_credit, 2),
-            'total_debit': round(abs(total_debit), 2),
-            'net': round(net, 2),
-        })
+        for name, items in result['breakdowns'].items():
+            items.sort(key=lambda item: str(item.get(f'{name}_name') or item[name] or ''))
+        summary.update(result)
+        return Response(summary)
 
-    @action(detail=False, methods=['get'], url_path='export')
+    @action(detail=False, methods=['get'], url_path='export', renderer_classes=EXPORT_RENDERERS)
     def export_csv(self, request):
+        """
+        Streams the filtered ledger as CSV from a server-side cursor with the
+        related names joined in SQL, so memory and query count stay constant.
+        ?format=parquet or ?format=arrow returns a typed columnar file instead.
+        """
         queryset = self.filter_queryset(self.get_queryset())
 
         if not queryset.exists():
             return Response({"detail": "No data to export."}, status=204)
 
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = 'attachment; filename="entity_wise_report.csv"'
-        writer = csv.writer(response)
-        writer.writerow([
-            'Date', 'Source', 'Amount', 'Cost Centre',
-            'Entity', 'Transaction Type', 'Asset',
-            'Contract', 'Remarks'
-        ])
-
-        for row in queryset:
-            writer.writerow([
-                row.date.strftime('%Y-%m-%d') if row.date else '',
-                row.source,
-                f"{row.amount:.2f}" if row.amount is not None else '',
-                row.cost_centre.name if row.cost_centre else '',
-                row.entity.name if row.entity else '',
-                row.transaction_type.name if row.transaction_type else '',
-                getattr(row.asset, 'name', '') if row.asset else '',
-                getattr(row.contract, 'name', '') if row.contract else '',
-                row.remarks or ''
-            ])
-        return response
+        if isinstance(request.accepted_renderer, ColumnarRenderer):
+            return columnar_export(queryset, [
+                ('date', 'date'),
+                ('source', 'source'),
+                ('amount', 'amount'),
+                ('cost_centre', 'cost_centre__name'),
+                ('entity', 'entity__name'),
+                ('transaction_type', 'transaction_type__name'),
+                ('asset', 'asset__name'),
+                ('contract', 'contract__description'),
+                ('remarks', 'remarks'),
+            ], request.accepted_renderer, 'entity_wise_report')
+
+        rows = queryset.values_list(
+            'date', 'source', 'amount', 'cost_centre__name', 'entity__name',
+            'transaction_type__name', 'asset__name', 'contract__description', 'remarks'
+        ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+        return stream_csv(
+            [
+                'Date', 'Source', 'Amount', 'Cost Centre',
+                'Entity', 'Transaction Type', 'Asset',
+                'Contract', 'Remarks'
+            ],
+            (
+                [
+                    date.strftime('%Y-%m-%d') if date else '',
+                    source,
+                    f"{amount:.2f}" if amount is not None else '',
+                    cost_centre or '',
+                    entity or '',
+                    transaction_type or '',
+                    asset or '',
+                    contract or '',
+                    remarks or ''
+                ]
+                for date, source, amount, cost_centre, entity, transaction_type, asset, contract, remarks in rows
+            ),
+            'entity_wise_report.csv',
+        )
+
+    @action(detail=False, methods=['get'], url_path='pivot')
+    def pivot(self, request):
+        """
+        Pivot table over the filtered ledger from one GROUPING SETS query.
+
+        ?dimensions= up to three of entity, cost_centre, transaction_type,
+        source, company, month, asset, contract (in pivot order) and
+        ?measures= any of sum, count, credit, debit, net (default: all).
+        Subtotals follow ROLLUP over the dimensions in order, or every
+        combination with ?mode=cube; the grand total is the row whose
+        `grouping` is empty. Answers with more than REPORT_PIVOT_MAX_ROWS
+        rows are refused. Results are cached per ledger version.
+        """
+        dimensions = [name for name in request.query_params.get('dimensions', '').split(',') if name]
+        measures = [name for name in request.query_params.get('measures', '').split(',') if name] or list(PIVOT_MEASURES)
+        mode = request.query_params.get('mode', 'rollup')
+
+        if not dimensions or len(dimensions) > PIVOT_MAX_DIMENSIONS or len(set(dimensions)) != len(dimensions) \
+                or not set(dimensions) <= set(PIVOT_DIMENSIONS):
+            return Response(
+                {"detail": f"dimensions must be 1 to {PIVOT_MAX_DIMENSIONS} of {', '.join(PIVOT_DIMENSIONS)}."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if not set(measures) <= set(PIVOT_MEASURES):
+            return Response(
+                {"detail": f"measures must be any of {', '.join(PIVOT_MEASURES)}."}, status=status.HTTP_400_BAD_REQUEST
+            )
+        if mode not in ('rollup', 'cube'):
+            return Response({"detail": "mode must be rollup or cube."}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Tenant scope and filters are part of the key, so users never share
+        # results across company sets.
+        query = sorted((key, request.query_params.getlist(key)) for key in request.query_params)
+        digest = hashlib.sha256(json.dumps([self.company_ids, query], default=str).encode()).hexdigest()
+        cache_key = f'reports:pivot:{ledger.version()}:{digest}'
+        data = cache.get(cache_key)
+        if data is not None:
+            return Response(data)
+
+        max_rows = getattr(settings, 'REPORT_PIVOT_MAX_ROWS', DEFAULT_PIVOT_MAX_ROWS)
+        sets = rollup_sets(dimensions) if mode == 'rollup' else cube_sets(dimensions)
+        queryset = self.filter_queryset(self.get_queryset())
+        rows = grouping_sets(queryset, dimensions, sets, measures=measures, limit=max_rows + 1)
+        if len(rows) > max_rows:
+            return Response(
+                {"detail": f"The pivot has more than {max_rows} rows; add filters or use fewer dimensions."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        data = {
+            'dimensions': dimensions,
+            'measures': measures,
+            'mode': mode,
+            'rows': sorted((_pivot_row(row, dimensions, measures) for row in rows), key=_pivot_order(dimensions)),
+        }
+        cache.set(cache_key, data, getattr(settings, 'REPORT_PIVOT_CACHE_SECONDS', DEFAULT_PIVOT_CACHE_SECONDS))
+        return Response(data)
+
+
+def _pivot_row(row, dimensions, measures):
+    item = {'grouping': list(row['grouping'])}
+    for name in dimensions:
+        grouped = name in row['grouping']
+        key = row[f'{name}_key'] if grouped else None
+        item[name] = key.strftime('%Y-%m') if grouped and name == 'month' and key else key
+        if DIMENSIONS[name][1] is not None:
+            item[f'{name}_name'] = row[f'{name}_label'] if grouped else None
+    for measure in measures:
+        item[measure] = row[measure] if measure == 'count' else round(row[measure], 2)
+    return item
+
+
+def _pivot_order(dimensions):
+    # Detail rows first within each group, then its subtotal, then the grand total.
+    def key(item):
+        parts = []
+        for name in dimensions:
+            rolled_up = name not in item['grouping']
+            value = item.get(f'{name}_name') or item[name]
+            parts.append((rolled_up, '' if value is None else str(value)))
+        return parts
+    return key
+
+
+TREND_FILTERS = ('company', 'cost_centre', 'transaction_type', 'entity', 'fiscal_year')
+
+
+def _month(value):
+    # YYYY-MM or YYYY-MM-DD; the rollups are monthly, so days are ignored.
+    try:
+        day = parse_date(value if len(value) > 7 else f'{value}-01')
+    except ValueError:
+        return None
+    return day.replace(day=1) if day else None
+
+
+@api_view(['GET'])
+def spend_trends(request):
+    """
+    Spend series from the monthly rollups, so the cost does not grow with
+    history.
+
+    ?period=month (default) or fy for Indian April-March fiscal years.
+    ?source=BANK,CASH (default; the classified ledger) or STATEMENT for
+    bank statement lines. Filters: company, cost_centre, transaction_type,
+    entity, direction, fiscal_year, start/end (YYYY-MM). ?group_by= one of
+    company, cost_centre, transaction_type, entity, direction, source
+    returns one series per value.
+    """
+    params = request.query_params
+    period = params.get('period', 'month')
+    group_by = params.get('group_by') or None
+    sources = [name for name in params.get('source', 'BANK,CASH').split(',') if name]
+    valid_sources = {choice for choice, _ in SpendRollup.SOURCE_CHOICES}
+
+    if period not in ('month', 'fy'):
+        return Response({"detail": "period must be month or fy."}, status=status.HTTP_400_BAD_REQUEST)
+    if group_by is not None and group_by not in rollups.GROUP_BY:
+        return Response(
+            {"detail": f"group_by must be one of {', '.join(rollups.GROUP_BY)}."}, status=status.HTTP_400_BAD_REQUEST
+        )
+    if not sources or not set(sources) <= valid_sources:
+        return Response(
+            {"detail": f"source must be a list of {', '.join(sorted(valid_sources))}."}, status=status.HTTP_400_BAD_REQUEST
+        )
+
+    queryset = tenancy.scope(SpendRollup.objects.filter(source__in=sources), request)
+    for name in TREND_FILTERS:
+        value = params.get(name)
+        if value:
+            if not value.isdigit():
+                return Response({"detail": f"{name} must be an id."}, status=status.HTTP_400_BAD_REQUEST)
+            queryset = queryset.filter(**{name: value})
+    if params.get('direction'):
+        queryset = queryset.filter(direction=params['direction'].upper())
+    for name, lookup in (('start', 'month__gte'), ('end', 'month__lte')):
+        if params.get(name):
+            month = _month(params[name])
+            if month is None:
+                return Response({"detail": f"{name} must be YYYY-MM."}, status=status.HTTP_400_BAD_REQUEST)
+            queryset = queryset.filter(**{lookup: month})
+
+    return Response({
+        'period': period,
+        'sources': sources,
+        'group_by': group_by,
+        'series': rollups.series(queryset, period, group_by),
+    })
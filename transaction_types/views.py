@@ -3,19 +3,15 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from .models import TransactionType
 from .serializers import TransactionTypeSerializer
+from igen.tenancy import TenantScopedMixin
 
-class TransactionTypeViewSet(viewsets.ModelViewSet):
+class TransactionTypeViewSet(TenantScopedMixin, viewsets.ModelViewSet):
     serializer_class = TransactionTypeSerializer
     permission_classes = [IsAuthenticated]  # ✅ Allow all logged-in users
 
     def get_queryset(self):
-        user = self.request.user
-
         # SUPER_USER can access everything
-        if user.role == 'SUPER_USER':
-            queryset = TransactionType.objects.all()
-        else:
-            queryset = TransactionType.objects.filter(company__in=user.companies.all())
+        queryset = self.scope_to_tenant(TransactionType.objects.all())
 
         # Optional filters from query params (case-insensitive)
         direction = self.request.query_params.get('direction')
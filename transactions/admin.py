@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Transaction, ClassifiedTransaction
+from .models import Transaction, ClassifiedTransaction, ClassificationRule
 
 @admin.register(Transaction)
 class TransactionAdmin(admin.ModelAdmin):
@@ -15,3 +15,10 @@ class ClassifiedTransactionAdmin(admin.ModelAdmin):
     list_filter = ('is_active_classification', 'value_date', 'transaction_type')
     search_fields = ('remarks',)
     ordering = ('-value_date',)
+
+@admin.register(ClassificationRule)
+class ClassificationRuleAdmin(admin.ModelAdmin):
+    list_display = ('name', 'company', 'priority', 'keyword', 'pattern', 'bank_account', 'direction', 'cost_centre', 'entity', 'is_active')
+    list_filter = ('company', 'is_active', 'direction')
+    search_fields = ('name', 'keyword', 'pattern')
+    ordering = ('company', 'priority')
@@ -0,0 +1,248 @@
+"""
+Split classification of bank transactions.
+
+A transaction's splits are written as one atomic unit: the parent row is
+locked with select_for_update so concurrent classifications of the same
+transaction queue behind each other, split totals are compared in exact
+Decimal, references are checked with one query per table, and the splits
+are inserted with a single bulk_create carrying the parent's snapshot fields.
+"""
+from django.db import transaction as db_transaction
+from rest_framework import serializers, status
+
+from igen.signals import post_bulk_create, post_bulk_delete
+from cost_centres.models import CostCentre
+from entities.models import Entity
+from transaction_types.models import TransactionType
+from assets.models import Asset
+from contracts.models import Contract
+from .models import Transaction, ClassifiedTransaction
+from .serializers import ClassificationSplitSerializer
+
+REFERENCES = {
+    'cost_centre': CostCentre,
+    'entity': Entity,
+    'transaction_type': TransactionType,
+    'asset': Asset,
+    'contract': Contract,
+}
+
+BATCH_SIZE = 1000
+
+RESPONSE_RELATED = (
+    'company', 'bank_account', 'cost_centre', 'entity',
+    'transaction_type', 'asset', 'contract',
+)
+
+
+class ClassificationError(Exception):
+    def __init__(self, message, status_code=status.HTTP_400_BAD_REQUEST):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+def validate_splits(entries):
+    """
+    Validates split entries and checks their references exist.
+
+    Returns the list of validated dicts or raises serializers.ValidationError
+    with one error dict per entry, like a many=True serializer.
+    """
+    serializer = ClassificationSplitSerializer(data=entries, many=True)
+    serializer.is_valid(raise_exception=True)
+    splits = serializer.validated_data
+
+    errors = reference_errors(splits)
+    if any(errors):
+        raise serializers.ValidationError(errors)
+    return splits
+
+
+def reference_errors(splits):
+    """
+    Returns one error dict per validated split, empty when every id it
+    references exists. Costs one query per referenced table.
+    """
+    errors = [{} for _ in splits]
+    for field, model in REFERENCES.items():
+        ids = {split[field] for split in splits if split.get(field) is not None}
+        if not ids:
+            continue
+        found = set(model.objects.filter(pk__in=ids).values_list('pk', flat=True))
+        for index, split in enumerate(splits):
+            value = split.get(field)
+            if value is not None and value not in found:
+                errors[index][field] = [f'Invalid pk "{value}" - object does not exist.']
+    return errors
+
+
+def classify(transaction_id, entries, force=False):
+    """
+    Replaces (with force) or creates the splits of one transaction.
+
+    Returns the created ClassifiedTransaction rows with their related objects
+    loaded for serialization. Raises ClassificationError for request-level
+    problems and serializers.ValidationError for invalid entries.
+    """
+    splits = validate_splits(entries)
+    if any(split['transaction'] != splits[0]['transaction'] for split in splits):
+        raise ClassificationError("All split entries must belong to the same transaction.")
+
+    with db_transaction.atomic():
+        try:
+            transaction = Transaction.objects.select_for_update().get(id=transaction_id)
+        except (Transaction.DoesNotExist, ValueError, TypeError):
+            raise ClassificationError("Transaction not found.", status.HTTP_404_NOT_FOUND)
+
+        total_split_amount = sum(split['amount'] for split in splits)
+        if total_split_amount != transaction.amount:
+            raise ClassificationError(
+                f"Split amount ({total_split_amount}) must equal the transaction amount ({transaction.amount})."
+            )
+
+        existing = ClassifiedTransaction.objects.filter(transaction=transaction)
+        if existing.exists():
+            if not force:
+                raise ClassificationError("Transaction already classified. Use ?force=true to overwrite.")
+            delete_splits([transaction.id])
+
+        created = ClassifiedTransaction.objects.bulk_create([
+            split_instance(transaction, split) for split in splits
+        ])
+        post_bulk_create.send(sender=ClassifiedTransaction, instances=created)
+
+    order = {row.pk: index for index, row in enumerate(created)}
+    rows = ClassifiedTransaction.objects.filter(pk__in=order).select_related(*RESPONSE_RELATED)
+    return sorted(rows, key=lambda row: order[row.pk])
+
+
+def classify_batch(groups, force=False):
+    """
+    Classifies many transactions in one call.
+
+    `groups` is a list of {"transaction": id, "splits": [...]}. Every group is
+    validated, the parents are locked and loaded (with their is_classified
+    state) in one query, and the splits
+    of all valid groups are written with batched bulk_create. Invalid groups
+    are skipped and reported; the rest are committed.
+
+    Returns one result dict per group, in request order.
+    """
+    results = [None] * len(groups)
+    pending = []
+
+    for index, group in enumerate(groups):
+        transaction_id = group.get('transaction') if isinstance(group, dict) else None
+        entries = group.get('splits') if isinstance(group, dict) else None
+        if not isinstance(entries, list) or not entries or not all(isinstance(e, dict) for e in entries):
+            results[index] = _failed(transaction_id, "Expected a non-empty list of split entries.")
+            continue
+
+        serializer = ClassificationSplitSerializer(
+            data=[{**entry, 'transaction': transaction_id} for entry in entries], many=True
+        )
+        if not serializer.is_valid():
+            results[index] = _failed(transaction_id, serializer.errors)
+            continue
+        pending.append((index, serializer.validated_data))
+
+    errors = iter(reference_errors([split for _, splits in pending for split in splits]))
+    checked = []
+    for index, splits in pending:
+        split_errors = [next(errors) for _ in splits]
+        if any(split_errors):
+            results[index] = _failed(splits[0]['transaction'], split_errors)
+        else:
+            checked.append((index, splits))
+
+    with db_transaction.atomic():
+        transaction_ids = {splits[0]['transaction'] for _, splits in checked}
+        transactions = Transaction.objects.select_for_update().order_by('pk').in_bulk(transaction_ids)
+        classified = {pk for pk, transaction in transactions.items() if transaction.is_classified}
+
+        ready, seen = [], set()
+        for index, splits in checked:
+            transaction_id = splits[0]['transaction']
+            transaction = transactions.get(transaction_id)
+            total_split_amount = sum(split['amount'] for split in splits)
+
+            if transaction is None:
+                results[index] = _failed(transaction_id, "Transaction not found.")
+            elif transaction_id in seen:
+                results[index] = _failed(transaction_id, "Transaction appears in more than one group.")
+            elif total_split_amount != transaction.amount:
+                results[index] = _failed(
+                    transaction_id,
+                    f"Split amount ({total_split_amount}) must equal the transaction amount ({transaction.amount})."
+                )
+            elif transaction_id in classified and not force:
+                results[index] = _failed(transaction_id, "Transaction already classified. Use ?force=true to overwrite.")
+            else:
+                ready.append((index, transaction, splits))
+            seen.add(transaction_id)
+
+        overwritten = [transaction.id for _, transaction, _ in ready if transaction.id in classified]
+        if overwritten:
+            delete_splits(overwritten)
+
+        instances = {
+            index: [split_instance(transaction, split) for split in splits]
+            for index, transaction, splits in ready
+        }
+        created = ClassifiedTransaction.objects.bulk_create(
+            [row for rows in instances.values() for row in rows], batch_size=BATCH_SIZE
+        )
+        if created:
+            post_bulk_create.send(sender=ClassifiedTransaction, instances=created)
+
+    for index, rows in instances.items():
+        results[index] = {
+            "transaction": rows[0].transaction_id,
+            "status": "classified",
+            "classification_ids": [row.pk for row in rows],
+        }
+    return results
+
+
+def delete_splits(transaction_ids):
+    """
+    Deletes every split of `transaction_ids` with one DELETE and a single
+    post_bulk_delete, instead of a post_delete (and its is_classified,
+    rollup and ledger updates) per row.
+    """
+    with db_transaction.atomic():
+        splits = list(ClassifiedTransaction.objects.filter(transaction_id__in=transaction_ids))
+        if not splits:
+            return
+        queryset = ClassifiedTransaction.objects.filter(pk__in=[split.pk for split in splits])
+        queryset._raw_delete(queryset.db)
+        post_bulk_delete.send(sender=ClassifiedTransaction, instances=splits)
+
+
+def _failed(transaction_id, errors):
+    return {"transaction": transaction_id, "status": "failed", "errors": errors}
+
+
+def split_instance(transaction, split):
+    """
+    Unsaved ClassifiedTransaction for one validated split. Snapshot fields
+    mirror ClassifiedTransaction.save(), which bulk_create skips.
+    """
+    return ClassifiedTransaction(
+        transaction=transaction,
+        company_id=transaction.company_id,
+        bank_account_id=transaction.bank_account_id,
+        transaction_type_id=transaction.transaction_type_id,
+        direction=transaction.direction,
+        cost_centre_id=split['cost_centre'],
+        entity_id=split['entity'],
+        asset_id=split.get('asset'),
+        contract_id=split.get('contract'),
+        amount=split['amount'],
+        value_date=split['value_date'],
+        remarks=split.get('remarks'),
+        is_active_classification=split.get('is_active_classification', True),
+        parent_transaction_reference=str(transaction.id),
+        parent_transaction_date=transaction.date,
+    )
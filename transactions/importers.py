@@ -0,0 +1,264 @@
+from collections import Counter
+
+from django.db import transaction as db_transaction
+from rest_framework import serializers
+
+from companies.models import Company
+from banks.models import BankAccount
+from cost_centres.models import CostCentre
+from transaction_types.models import TransactionType
+from import_jobs.results import ImportResult
+from igen.signals import post_bulk_create
+from .models import Transaction
+from .serializers import TransactionSerializer
+from . import rules
+
+
+class ReferenceMap:
+    """
+    Case-folded name -> pk lookup for one reference table, loaded in a single query.
+
+    When the table belongs to a company, names are also indexed per company so a
+    cost centre called "Admin" in two companies still resolves for a row that
+    names its company.
+    """
+
+    def __init__(self, queryset, name_field, label, company_field=None):
+        self.label = label
+        self.by_name = {}
+        self.by_company_name = {}
+
+        columns = ['pk', name_field] + ([company_field] if company_field else [])
+        for values in queryset.values_list(*columns):
+            pk, name = values[0], values[1]
+            key = (name or '').strip().casefold()
+            self.by_name.setdefault(key, set()).add(pk)
+            if company_field:
+                self.by_company_name.setdefault((values[2], key), set()).add(pk)
+
+    def resolve(self, value, company_id=None):
+        """
+        Returns (pk, error); exactly one of the two is None.
+        """
+        key = (value or '').strip().casefold()
+        if not key:
+            return None, "This field is required."
+
+        matches = self.by_company_name.get((company_id, key)) if company_id else None
+        if not matches:
+            matches = self.by_name.get(key)
+
+        if not matches:
+            return None, f"{self.label} '{value}' not found."
+        if len(matches) > 1:
+            return None, f"Multiple {self.label} records named '{value}' found."
+        return next(iter(matches)), None
+
+
+class TransactionImporter:
+    """
+    Set-based CSV import for bank transactions.
+
+    Reference tables are read once per upload into in-memory maps, rows are
+    validated against the serializer's scalar fields without touching the
+    database, and valid rows are written with batched bulk_create inside one
+    atomic block. Nothing is written if any row fails validation.
+    """
+
+    BATCH_SIZE = 1000
+    MAX_ERRORS = 100
+    SCALAR_FIELDS = ('direction', 'amount', 'date', 'notes')
+
+    def __init__(self, batch_size=None, keep_ids=False):
+        self.batch_size = batch_size or self.BATCH_SIZE
+        # With keep_ids, created_ids lists the pks of the committed rows.
+        self.keep_ids = keep_ids
+        self.created_ids = []
+        fields = TransactionSerializer().fields
+        self.scalar_fields = {name: fields[name] for name in self.SCALAR_FIELDS}
+        self.companies = None
+        self.bank_accounts = None
+        self.cost_centres = None
+        self.transaction_types = None
+
+    def load_references(self):
+        self.companies = ReferenceMap(Company.objects.all(), 'name', 'Company')
+        self.bank_accounts = ReferenceMap(
+            BankAccount.objects.all(), 'account_name', 'BankAccount', company_field='company_id'
+        )
+        self.cost_centres = ReferenceMap(
+            CostCentre.objects.all(), 'name', 'CostCentre', company_field='company_id'
+        )
+        self.transaction_types = ReferenceMap(
+            TransactionType.objects.all(), 'name', 'TransactionType', company_field='company_id'
+        )
+
+    def validate_row(self, row):
+        """
+        Resolves references and validates one CSV row.
+
+        Returns (instance, errors). `row` is updated in place with resolved pks
+        so error reports show what was looked up.
+        """
+        errors = {}
+
+        company_id, error = self.companies.resolve(row.get('company'))
+        if error:
+            errors['company'] = error
+        else:
+            row['company'] = company_id
+
+        lookups = (
+            ('bank_account', self.bank_accounts),
+            ('cost_centre', self.cost_centres),
+            ('transaction_type', self.transaction_types),
+        )
+        resolved = {}
+        for column, reference in lookups:
+            pk, error = reference.resolve(row.get(column), company_id)
+            if error:
+                errors[column] = error
+            else:
+                resolved[column] = row[column] = pk
+
+        if errors:
+            return None, errors
+
+        values = {}
+        for name, field in self.scalar_fields.items():
+            raw = row.get(name)
+            if raw is None:
+                if field.required:
+                    errors[name] = [str(field.error_messages['required'])]
+                continue
+            try:
+                values[name] = field.run_validation(raw)
+            except serializers.ValidationError as exc:
+                errors[name] = exc.detail
+
+        if errors:
+            return None, errors
+
+        return Transaction(
+            company_id=company_id,
+            bank_account_id=resolved['bank_account'],
+            cost_centre_id=resolved['cost_centre'],
+            transaction_type_id=resolved['transaction_type'],
+            **values
+        ), None
+
+    def run(self, rows):
+        """
+        Validates and inserts an iterable of CSV dict rows. post_bulk_create
+        is only sent once every row has validated and the import will commit.
+        """
+        result = ImportResult()
+        if self.companies is None:
+            self.load_references()
+
+        batch, written = [], []
+        with db_transaction.atomic():
+            for row_number, row in enumerate(rows, start=1):
+                result.rows_processed = row_number
+                instance, errors = self.validate_row(row)
+
+                if errors:
+                    result.add_error(row_number, row, errors)
+                    batch = []
+                    continue
+
+                if result.error_count:
+                    # Keep validating to report every bad row, but stop writing.
+                    continue
+
+                batch.append(instance)
+                if len(batch) >= self.batch_size:
+                    result.created += self._flush(batch, notify=False)
+                    written.append(batch)
+                    batch = []
+
+            if result.error_count:
+                db_transaction.set_rollback(True)
+                result.created = 0
+            else:
+                result.created += self._flush(batch, notify=False)
+                written.append(batch)
+                # Receivers only hear about rows that are going to be committed.
+                for batch in written:
+                    self._created(batch)
+
+        return result
+
+    def stream(self, rows, max_errors=None):
+        """
+        Bounded-memory import for very large files.
+
+        Rows are validated and inserted in fixed-size batches, each committed on
+        its own, so invalid rows are skipped rather than failing the whole file.
+        Only the first `max_errors` errors are retained. Yields the running
+        ImportResult after every batch so callers can report progress.
+        """
+        result = ImportResult(max_errors=self.MAX_ERRORS if max_errors is None else max_errors)
+        if self.companies is None:
+            self.load_references()
+
+        batch = []
+        for row_number, row in enumerate(rows, start=1):
+            result.rows_processed = row_number
+            instance, errors = self.validate_row(row)
+            if errors:
+                result.add_error(row_number, row, errors)
+            else:
+                batch.append(instance)
+
+            if row_number % self.batch_size == 0:
+                with db_transaction.atomic():
+                    result.created += self._flush(batch)
+                batch = []
+                yield result
+
+        with db_transaction.atomic():
+            result.created += self._flush(batch)
+        yield result
+
+    def _flush(self, batch, notify=True):
+        if not batch:
+            return 0
+        Transaction.objects.bulk_create(batch, batch_size=self.batch_size)
+        if notify:
+            self._created(batch)
+        return len(batch)
+
+    def _created(self, batch):
+        if not batch:
+            return
+        post_bulk_create.send(sender=Transaction, instances=batch)
+        if self.keep_ids:
+            self.created_ids.extend(instance.pk for instance in batch)
+
+
+def classify_uploaded(ids, chunk_size=10000):
+    """
+    Runs the classification rules over the transactions an upload has just
+    created (`ids`, from TransactionImporter(keep_ids=True).created_ids),
+    `chunk_size` ids per pass. Returns the combined auto_classify summary.
+    """
+    summary = {"scanned": 0, "matched": 0, "classified": 0, "rules": Counter()}
+    for start in range(0, len(ids), chunk_size):
+        part = rules.auto_classify(Transaction.objects.filter(pk__in=ids[start:start + chunk_size]))
+        for key in ("scanned", "matched", "classified"):
+            summary[key] += part[key]
+        summary["rules"].update(part["rules"])
+    summary["rules"] = dict(summary["rules"])
+    return summary
+
+
+def import_job_results(reader, max_errors=None, auto_classify=False):
+    """
+    ImportJob entry point: runs the streaming importer so large files are
+    committed batch by batch while the job records progress.
+    """
+    importer = TransactionImporter(keep_ids=auto_classify)
+    yield from importer.stream(reader, max_errors=max_errors)
+    if auto_classify:
+        classify_uploaded(importer.created_ids)
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from transactions import rules
+from transactions.models import Transaction
+
+
+class Command(BaseCommand):
+    help = "Applies the active classification rules to unclassified transactions."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--company', type=int, action='append',
+                            help='Company id to process (repeatable). Defaults to all companies.')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Count matches without writing classifications.')
+
+    def handle(self, *args, **options):
+        queryset = Transaction.objects.all()
+        if options['company']:
+            queryset = queryset.filter(company_id__in=options['company'])
+
+        summary = rules.auto_classify(queryset, dry_run=options['dry_run'])
+
+        for name, count in sorted(summary['rules'].items(), key=lambda item: -item[1]):
+            self.stdout.write(f"{count:>8}  {name}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Scanned {summary['scanned']}, matched {summary['matched']}, classified {summary['classified']}."
+        ))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from transactions import suggestions
+from transactions.models import ClassifiedTransaction
+
+
+class Command(BaseCommand):
+    help = "Trains the per-company classification suggestion models from existing classifications."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--company', type=int, action='append',
+                            help='Company id to train (repeatable). Defaults to every company with classifications.')
+        parser.add_argument('--alpha', type=float, default=suggestions.DEFAULT_ALPHA,
+                            help='Additive smoothing for token counts.')
+        parser.add_argument('--min-count', type=int, default=suggestions.DEFAULT_MIN_COUNT,
+                            help='Ignore tokens seen in fewer training rows than this.')
+
+    def handle(self, *args, **options):
+        company_ids = options['company'] or (
+            ClassifiedTransaction.objects
+            .filter(is_active_classification=True, company__isnull=False)
+            .order_by().values_list('company_id', flat=True).distinct()
+        )
+        for company_id in company_ids:
+            rows = suggestions.train(company_id, alpha=options['alpha'], min_count=options['min_count'])
+            if rows:
+                self.stdout.write(f"company={company_id}: trained on {rows} classifications -> {suggestions.model_path(company_id)}")
+            else:
+                self.stdout.write(f"company={company_id}: no classifications, skipped.")
+        self.stdout.write(self.style.SUCCESS("Done."))
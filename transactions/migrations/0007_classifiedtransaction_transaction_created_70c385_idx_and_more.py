@@ -0,0 +1,28 @@
+# Generated by Django 5.2.4 on 2026-10-18 10:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('assets', '0001_initial'),
+        ('banks', '0001_initial'),
+        ('companies', '0002_company_is_active'),
+        ('contracts', '0003_remove_contract_asset'),
+        ('cost_centres', '0001_initial'),
+        ('entities', '0001_initial'),
+        ('transaction_types', '0002_transactiontype_is_credit'),
+        ('transactions', '0006_classifiedtransaction_direction'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='classifiedtransaction',
+            index=models.Index(fields=['-created_at'], name='transaction_created_70c385_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(fields=['-date', '-id'], name='transaction_date_ade987_idx'),
+        ),
+    ]
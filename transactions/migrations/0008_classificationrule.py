@@ -0,0 +1,43 @@
+# Generated by Django 5.2.4 on 2026-10-18 10:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('banks', '0001_initial'),
+        ('companies', '0002_company_is_active'),
+        ('cost_centres', '0001_initial'),
+        ('entities', '0001_initial'),
+        ('transaction_types', '0002_transactiontype_is_credit'),
+        ('transactions', '0007_classifiedtransaction_transaction_created_70c385_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClassificationRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('priority', models.PositiveIntegerField(default=100)),
+                ('keyword', models.CharField(blank=True, max_length=255)),
+                ('pattern', models.CharField(blank=True, help_text='Case-insensitive regular expression.', max_length=500)),
+                ('direction', models.CharField(blank=True, choices=[('CREDIT', 'Credit (Income)'), ('DEBIT', 'Debit (Expense)')], max_length=6)),
+                ('min_amount', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('max_amount', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('is_active', models.BooleanField(default=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('bank_account', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='banks.bankaccount')),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='classification_rules', to='companies.company')),
+                ('cost_centre', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='cost_centres.costcentre')),
+                ('entity', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='entities.entity')),
+                ('transaction_type', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='transaction_types.transactiontype')),
+            ],
+            options={
+                'ordering': ['company', 'priority', 'id'],
+                'indexes': [models.Index(fields=['company', 'is_active'], name='transaction_company_0dc3c6_idx')],
+            },
+        ),
+    ]
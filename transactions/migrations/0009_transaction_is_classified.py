@@ -0,0 +1,48 @@
+# Generated by Django 5.2.4 on 2026-10-18 11:03
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_is_classified(apps, schema_editor):
+    Transaction = apps.get_model('transactions', 'Transaction')
+    ClassifiedTransaction = apps.get_model('transactions', 'ClassifiedTransaction')
+    Transaction.objects.filter(
+        models.Exists(ClassifiedTransaction.objects.filter(transaction=models.OuterRef('pk')))
+    ).update(is_classified=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('banks', '0001_initial'),
+        ('companies', '0002_company_is_active'),
+        ('cost_centres', '0001_initial'),
+        ('transaction_types', '0002_transactiontype_is_credit'),
+        ('transactions', '0008_classificationrule'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='transaction',
+            name='claim_expires_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='claimed_by',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='transaction',
+            name='is_classified',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(backfill_is_classified, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='transaction',
+            index=models.Index(condition=models.Q(('is_classified', False)), fields=['-date', '-id'], name='transaction_unclassified_idx'),
+        ),
+    ]
@@ -7,6 +7,7 @@ from transaction_types.models import TransactionType
 from entities.models import Entity
 from assets.models import Asset
 from contracts.models import Contract
+from users.models import User
 
 class Transaction(models.Model):
     TRANSACTION_DIRECTION = [
@@ -24,6 +25,25 @@ class Transaction(models.Model):
     notes = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    # Maintained by transactions.signals whenever splits are written or removed.
+    is_classified = models.BooleanField(default=False)
+
+    # Work-queue claim (see transactions.queue); expired claims are free again.
+    claimed_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    claim_expires_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            # Keyset pagination order for the transaction list.
+            models.Index(fields=['-date', '-id']),
+            # Only unclassified rows are indexed, so the queue and the default
+            # list stay cheap however much classified history accumulates.
+            models.Index(
+                fields=['-date', '-id'], name='transaction_unclassified_idx',
+                condition=models.Q(is_classified=False),
+            ),
+        ]
+
     def _str_(self):
         return f"{self.company.name}: {self.direction} ₹{self.amount} on {self.date}"
 class ClassifiedTransaction(models.Model):
@@ -67,4 +87,43 @@ class ClassifiedTransaction(models.Model):
             models.Index(fields=['company']),
             models.Index(fields=['bank_account']),
             models.Index(fields=['is_active_classification']),
+            models.Index(fields=['-created_at']),
+        ]
+
+
+class ClassificationRule(models.Model):
+    """
+    Auto-classification rule for imported bank transactions.
+
+    A rule matches when every condition it sets holds: the narration (notes)
+    contains `keyword` as whole words and/or matches `pattern`, the bank
+    account and direction are equal and the amount is within range. Rules
+    are tried by ascending priority and the first match wins.
+    """
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, related_name='classification_rules')
+    name = models.CharField(max_length=255)
+    priority = models.PositiveIntegerField(default=100)
+    keyword = models.CharField(max_length=255, blank=True)
+    pattern = models.CharField(max_length=500, blank=True, help_text="Case-insensitive regular expression.")
+    bank_account = models.ForeignKey(BankAccount, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    direction = models.CharField(max_length=6, choices=Transaction.TRANSACTION_DIRECTION, blank=True)
+    min_amount = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    max_amount = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+
+    # Classification applied on match. transaction_type, if set, is also
+    # written to the parent transaction so the split snapshot stays consistent.
+    cost_centre = models.ForeignKey(CostCentre, on_delete=models.CASCADE, related_name='+')
+    entity = models.ForeignKey(Entity, on_delete=models.CASCADE, related_name='+')
+    transaction_type = models.ForeignKey(TransactionType, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+
+    is_active = models.BooleanField(default=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['company', 'priority', 'id']
+        indexes = [
+            models.Index(fields=['company', 'is_active']),
         ]
+
+    def __str__(self):
+        return f"{self.company.name}: {self.name}"
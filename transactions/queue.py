@@ -0,0 +1,56 @@
+"""
+Unclassified-transaction work queue.
+
+Accountants claim the next N unclassified transactions. Rows are picked with
+SELECT ... FOR UPDATE SKIP LOCKED over the partial index on unclassified
+rows, so concurrent claimers never receive the same row and never wait on
+each other. A claim lasts settings.TRANSACTION_CLAIM_MINUTES, after which the
+row is handed out again; classifying a row releases its claim.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction as db_transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Transaction
+
+DEFAULT_CLAIM_MINUTES = 15
+MAX_CLAIM = 200
+
+
+def claim_next(user, count, company_ids=None):
+    """
+    Claims up to `count` unclassified transactions for `user`, including any
+    the user already holds. Returns the claimed ids in queue order.
+    """
+    now = timezone.now()
+    expires = now + timedelta(minutes=getattr(settings, 'TRANSACTION_CLAIM_MINUTES', DEFAULT_CLAIM_MINUTES))
+
+    queryset = Transaction.objects.filter(is_classified=False).filter(
+        Q(claimed_by__isnull=True) | Q(claim_expires_at__lt=now) | Q(claimed_by=user)
+    )
+    if company_ids is not None:
+        queryset = queryset.filter(company_id__in=company_ids)
+
+    with db_transaction.atomic():
+        ids = list(
+            queryset
+            .select_for_update(skip_locked=True)
+            .order_by('-date', '-id')
+            .values_list('id', flat=True)[:min(count, MAX_CLAIM)]
+        )
+        Transaction.objects.filter(pk__in=ids).update(claimed_by=user, claim_expires_at=expires)
+    return ids
+
+
+def release(user, transaction_ids=None):
+    """
+    Drops the user's claims (all of them, or just `transaction_ids`).
+    Returns the number released.
+    """
+    queryset = Transaction.objects.filter(claimed_by=user)
+    if transaction_ids is not None:
+        queryset = queryset.filter(pk__in=transaction_ids)
+    return queryset.update(claimed_by=None, claim_expires_at=None)
@@ -0,0 +1,277 @@
+"""
+Rule-based auto-classification of unclassified bank transactions.
+
+All active rules of a company are compiled into one RuleMatcher:
+
+* rules are bucketed by (bank account, direction), so a row only sees rules
+  that can apply to its account and direction;
+* keyword rules are indexed by their first word, so a narration is split
+  into words once and only rules whose keyword starts with one of them are
+  considered;
+* all regex rules are OR-ed into a single prefilter; a row that does not
+  match it skips every regex rule, and otherwise only the regex rules that
+  still beat the best keyword candidate on priority are evaluated. Patterns
+  that cannot be combined (see `pattern_problem`) are refused when a rule
+  is saved; if older rules still break the prefilter, every regex rule is
+  tried on its own.
+
+Matching classifications are written in batches with bulk_create, taking
+row locks so a transaction classified by hand in the meantime is skipped.
+"""
+import re
+from collections import Counter, defaultdict
+
+from django.db import transaction as db_transaction
+
+from igen.signals import post_bulk_create, post_bulk_update
+from .models import Transaction, ClassifiedTransaction, ClassificationRule
+from .classification import split_instance
+
+BATCH_SIZE = 2000
+# Everything matching and writing needs, including what the spend rollups
+# key a statement row on, so retyping it can move its rollup contribution.
+ROW_FIELDS = (
+    'id', 'company_id', 'bank_account_id', 'cost_centre_id', 'transaction_type_id',
+    'direction', 'amount', 'date', 'notes',
+)
+WORD_RE = re.compile(r'\w+')
+
+# Constructs that compile on their own but change meaning, or fail, once the
+# pattern is one alternative of the prefilter.
+GLOBAL_FLAGS_RE = re.compile(r'\(\?[aiLmsux]+\)')
+NAMED_GROUP_RE = re.compile(r'\(\?P[<=]')
+BACKREFERENCE_RE = re.compile(r'(?<!\\)(?:\\\\)*\\[1-9]')
+
+
+def words(text):
+    return WORD_RE.findall((text or '').casefold())
+
+
+def pattern_problem(pattern):
+    """
+    Why `pattern` cannot be a rule pattern, or None if it can.
+    """
+    try:
+        re.compile(pattern)
+    except re.error as exc:
+        return f"Invalid regular expression: {exc}"
+    if GLOBAL_FLAGS_RE.search(pattern):
+        return "Inline flags such as (?i) are not supported; patterns already ignore case."
+    if NAMED_GROUP_RE.search(pattern):
+        return "Named groups are not supported; use (?:...) instead."
+    if BACKREFERENCE_RE.search(pattern):
+        return "Backreferences such as \\1 are not supported."
+    return None
+
+
+class CompiledRule:
+    __slots__ = ('rule', 'sort_key', 'keyword', 'regex', 'min_amount', 'max_amount')
+
+    def __init__(self, rule):
+        self.rule = rule
+        self.sort_key = (rule.priority, rule.pk)
+        self.keyword = words(rule.keyword)
+        self.regex = re.compile(rule.pattern, re.IGNORECASE) if rule.pattern else None
+        self.min_amount = rule.min_amount
+        self.max_amount = rule.max_amount
+
+    def matches(self, narration, tokens, amount):
+        if self.min_amount is not None and amount < self.min_amount:
+            return False
+        if self.max_amount is not None and amount > self.max_amount:
+            return False
+        if self.keyword and not _contains_phrase(tokens, self.keyword):
+            return False
+        if self.regex and not self.regex.search(narration):
+            return False
+        return True
+
+
+def _contains_phrase(tokens, phrase):
+    size = len(phrase)
+    return any(tokens[i:i + size] == phrase for i, token in enumerate(tokens) if token == phrase[0])
+
+
+class _Bucket:
+    """
+    The rules sharing one (bank account, direction) condition.
+    """
+
+    def __init__(self):
+        self.by_first_word = defaultdict(list)
+        self.regex_only = []
+        self.unconditional = []
+
+    def add(self, compiled):
+        if compiled.keyword:
+            self.by_first_word[compiled.keyword[0]].append(compiled)
+        elif compiled.regex:
+            self.regex_only.append(compiled)
+        else:
+            self.unconditional.append(compiled)
+
+    def finish(self):
+        for rules in self.by_first_word.values():
+            rules.sort(key=lambda compiled: compiled.sort_key)
+        self.regex_only.sort(key=lambda compiled: compiled.sort_key)
+        self.unconditional.sort(key=lambda compiled: compiled.sort_key)
+        self.prefilter = None
+        patterns = [compiled.regex.pattern for compiled in self.regex_only]
+        if patterns and not any(map(pattern_problem, patterns)):
+            try:
+                self.prefilter = re.compile('|'.join(f'(?:{pattern})' for pattern in patterns), re.IGNORECASE)
+            except re.error:
+                pass
+
+    def best(self, narration, tokens, amount):
+        candidates = []
+        for token in set(tokens):
+            candidates.extend(self.by_first_word.get(token, ()))
+        candidates.extend(self.unconditional)
+        candidates.sort(key=lambda compiled: compiled.sort_key)
+
+        best = next((c for c in candidates if c.matches(narration, tokens, amount)), None)
+
+        # Without a prefilter every regex rule is tried on its own.
+        if self.regex_only and (self.prefilter is None or self.prefilter.search(narration)):
+            for compiled in self.regex_only:
+                if best is not None and compiled.sort_key > best.sort_key:
+                    break
+                if compiled.matches(narration, tokens, amount):
+                    return compiled
+        return best
+
+
+class RuleMatcher:
+    """
+    Compiled form of a company's active rules.
+    """
+
+    def __init__(self, rules):
+        self.buckets = defaultdict(_Bucket)
+        self.count = 0
+        for rule in rules:
+            self.buckets[(rule.bank_account_id, rule.direction or None)].add(CompiledRule(rule))
+            self.count += 1
+        for bucket in self.buckets.values():
+            bucket.finish()
+
+    def match(self, transaction):
+        """
+        Returns the winning ClassificationRule for `transaction` or None.
+        """
+        narration = transaction.notes or ''
+        tokens = words(narration)
+        best = None
+        for key in (
+            (transaction.bank_account_id, transaction.direction),
+            (transaction.bank_account_id, None),
+            (None, transaction.direction),
+            (None, None),
+        ):
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                continue
+            candidate = bucket.best(narration, tokens, transaction.amount)
+            if candidate is not None and (best is None or candidate.sort_key < best.sort_key):
+                best = candidate
+        return best.rule if best else None
+
+
+def load_matchers(company_ids=None):
+    """
+    Returns {company_id: RuleMatcher} for companies with active rules.
+    """
+    rules = ClassificationRule.objects.filter(is_active=True)
+    if company_ids is not None:
+        rules = rules.filter(company_id__in=company_ids)
+
+    by_company = defaultdict(list)
+    for rule in rules:
+        by_company[rule.company_id].append(rule)
+    return {company_id: RuleMatcher(company_rules) for company_id, company_rules in by_company.items()}
+
+
+def unclassified(queryset=None):
+    queryset = Transaction.objects.all() if queryset is None else queryset
+    return queryset.filter(is_classified=False)
+
+
+def auto_classify(queryset=None, dry_run=False, batch_size=BATCH_SIZE):
+    """
+    Applies the rules to the unclassified transactions in `queryset` (all
+    transactions by default).
+
+    Returns {"scanned", "matched", "classified", "rules": {name: count}}.
+    With dry_run nothing is written and "classified" stays 0.
+    """
+    queryset = unclassified(queryset)
+    matchers = load_matchers(
+        queryset.order_by().values_list('company_id', flat=True).distinct()
+    )
+    summary = {"scanned": 0, "matched": 0, "classified": 0, "rules": Counter()}
+    if not matchers:
+        summary["rules"] = {}
+        return summary
+
+    rows = (
+        queryset
+        .filter(company_id__in=matchers)
+        .only(*ROW_FIELDS)
+        .order_by('pk')
+        .iterator(chunk_size=batch_size)
+    )
+
+    batch = []
+    for transaction in rows:
+        summary["scanned"] += 1
+        rule = matchers[transaction.company_id].match(transaction)
+        if rule is None:
+            continue
+        summary["matched"] += 1
+        summary["rules"][rule.name] += 1
+        batch.append((transaction, rule))
+        if len(batch) >= batch_size:
+            summary["classified"] += 0 if dry_run else _apply(batch)
+            batch = []
+
+    if batch and not dry_run:
+        summary["classified"] += _apply(batch)
+    summary["rules"] = dict(summary["rules"])
+    return summary
+
+
+def _apply(batch):
+    with db_transaction.atomic():
+        # Lock the rows and drop any that were classified since they were read;
+        # the rest are re-read so their rollup snapshots are current.
+        locked = {
+            transaction.pk: transaction
+            for transaction in unclassified(Transaction.objects.filter(pk__in=[t.pk for t, _ in batch]))
+            .select_for_update(skip_locked=True)
+            .only(*ROW_FIELDS)
+        }
+        batch = [(locked[transaction.pk], rule) for transaction, rule in batch if transaction.pk in locked]
+
+        retyped = []
+        for transaction, rule in batch:
+            if rule.transaction_type_id and rule.transaction_type_id != transaction.transaction_type_id:
+                transaction.transaction_type_id = rule.transaction_type_id
+                retyped.append(transaction)
+        if retyped:
+            Transaction.objects.bulk_update(retyped, ['transaction_type'], batch_size=BATCH_SIZE)
+            post_bulk_update.send(sender=Transaction, instances=retyped, fields=['transaction_type'])
+
+        created = ClassifiedTransaction.objects.bulk_create([
+            split_instance(transaction, {
+                'cost_centre': rule.cost_centre_id,
+                'entity': rule.entity_id,
+                'amount': transaction.amount,
+                'value_date': transaction.date,
+                'remarks': f"Auto-classified by rule: {rule.name}",
+            })
+            for transaction, rule in batch
+        ], batch_size=BATCH_SIZE)
+        if created:
+            post_bulk_create.send(sender=ClassifiedTransaction, instances=created)
+    return len(created)
@@ -1,12 +1,13 @@
 from rest_framework import serializers
-from .models import Transaction, ClassifiedTransaction
+
+from igen import tenancy
+from .models import Transaction, ClassifiedTransaction, ClassificationRule
 
 class TransactionSerializer(serializers.ModelSerializer):
     company_name = serializers.CharField(source='company.name', read_only=True)
     bank_name = serializers.CharField(source='bank_account.account_name', read_only=True)
     cost_centre_name = serializers.CharField(source='cost_centre.name', read_only=True)
     transaction_type_name = serializers.CharField(source='transaction_type.name', read_only=True)
-    is_classified = serializers.SerializerMethodField()
 
     class Meta:
         model = Transaction
@@ -17,11 +18,9 @@ class TransactionSerializer(serializers.ModelSerializer):
             'cost_centre', 'cost_centre_name',
             'transaction_type', 'transaction_type_name',
             'direction', 'amount', 'date', 'notes', 'created_at',
-            'is_classified'
+            'is_classified', 'claimed_by', 'claim_expires_at'
         ]
-
-    def get_is_classified(self, obj):
-        return ClassifiedTransaction.objects.filter(transaction=obj).exists()
+        read_only_fields = ['is_classified', 'claimed_by', 'claim_expires_at']
 
 class ClassifiedTransactionSerializer(serializers.ModelSerializer):
     cost_centre_name = serializers.CharField(source='cost_centre.name', read_only=True)
@@ -76,3 +75,66 @@ class ClassifiedTransactionSerializer(serializers.ModelSerializer):
         validated_data['parent_transaction_date'] = transaction.date
 
         return super().create(validated_data)
+
+
+class ClassificationSplitSerializer(serializers.ModelSerializer):
+    """
+    Validates one split entry without touching the database. References are
+    plain ids here and are checked in bulk by transactions.classification.
+    """
+    transaction = serializers.IntegerField()
+    cost_centre = serializers.IntegerField()
+    entity = serializers.IntegerField()
+    transaction_type = serializers.IntegerField()
+    asset = serializers.IntegerField(required=False, allow_null=True)
+    contract = serializers.IntegerField(required=False, allow_null=True)
+
+    class Meta:
+        model = ClassifiedTransaction
+        fields = [
+            'transaction', 'cost_centre', 'entity', 'transaction_type',
+            'asset', 'contract', 'amount', 'value_date',
+            'remarks', 'is_active_classification',
+        ]
+
+
+class ClassificationRuleSerializer(serializers.ModelSerializer):
+    cost_centre_name = serializers.CharField(source='cost_centre.name', read_only=True)
+    entity_name = serializers.CharField(source='entity.name', read_only=True)
+    transaction_type_name = serializers.CharField(source='transaction_type.name', read_only=True, default=None)
+
+    class Meta:
+        model = ClassificationRule
+        fields = [
+            'id', 'company', 'name', 'priority',
+            'keyword', 'pattern', 'bank_account', 'direction', 'min_amount', 'max_amount',
+            'cost_centre', 'cost_centre_name',
+            'entity', 'entity_name',
+            'transaction_type', 'transaction_type_name',
+            'is_active', 'created_at',
+        ]
+
+    def validate_pattern(self, value):
+        from .rules import pattern_problem  # rules imports this module via classification
+
+        problem = value and pattern_problem(value)
+        if problem:
+            raise serializers.ValidationError(problem)
+        return value
+
+    def validate_company(self, value):
+        company_ids = tenancy.company_ids(self.context["request"])
+        if company_ids is not None and value.pk not in company_ids:
+            raise serializers.ValidationError("You are not authorized to create rules under this company.")
+        return value
+
+    def validate(self, attrs):
+        company = attrs.get('company', getattr(self.instance, 'company', None))
+        errors = {}
+        for field in ('cost_centre', 'entity', 'transaction_type', 'bank_account'):
+            value = attrs.get(field, getattr(self.instance, field, None))
+            if value is not None and value.company_id != company.pk:
+                errors[field] = "Must belong to the rule's company."
+        if errors:
+            raise serializers.ValidationError(errors)
+        return attrs
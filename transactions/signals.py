@@ -0,0 +1,45 @@
+from django.db.models import Exists, OuterRef
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from igen.signals import post_bulk_create, post_bulk_delete
+from .models import Transaction, ClassifiedTransaction
+
+
+def mark_classified(transaction_ids):
+    """
+    Sets is_classified on the parents of new splits and releases their claims.
+    """
+    Transaction.objects.filter(pk__in=transaction_ids, is_classified=False).update(
+        is_classified=True, claimed_by=None, claim_expires_at=None
+    )
+
+
+def refresh_classified(transaction_ids):
+    """
+    Recomputes is_classified from the splits that remain.
+    """
+    Transaction.objects.filter(pk__in=transaction_ids, is_classified=True).exclude(
+        Exists(ClassifiedTransaction.objects.filter(transaction=OuterRef('pk')))
+    ).update(is_classified=False)
+
+
+@receiver(post_save, sender=ClassifiedTransaction)
+def classification_saved(sender, instance, created, **kwargs):
+    if created:
+        mark_classified([instance.transaction_id])
+
+
+@receiver(post_bulk_create, sender=ClassifiedTransaction)
+def classifications_bulk_created(sender, instances, **kwargs):
+    mark_classified({instance.transaction_id for instance in instances})
+
+
+@receiver(post_delete, sender=ClassifiedTransaction)
+def classification_deleted(sender, instance, **kwargs):
+    refresh_classified([instance.transaction_id])
+
+
+@receiver(post_bulk_delete, sender=ClassifiedTransaction)
+def classifications_bulk_deleted(sender, instances, **kwargs):
+    refresh_classified({instance.transaction_id for instance in instances})
@@ -0,0 +1,174 @@
+"""
+Learned classification suggestions.
+
+`train()` fits one multinomial naive Bayes model per company on its active
+ClassifiedTransaction rows. Features are the narration words of the parent
+transaction plus its direction and an order-of-magnitude amount bucket;
+labels are (entity, cost centre) pairs. Models are saved as .npz files under
+settings.CLASSIFIER_MODEL_DIR and cached per process, reloaded only when
+the file changes, so scoring a transaction only sums the log-probability
+rows of its own tokens.
+"""
+import math
+import os
+import re
+from collections import Counter
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+
+from .models import ClassifiedTransaction
+
+WORD_RE = re.compile(r'[^\W\d_]{2,}')
+DEFAULT_ALPHA = 0.1
+DEFAULT_MIN_COUNT = 2
+MAX_FEATURES = 20000
+
+_cache = {}
+
+
+def features(notes, direction, amount):
+    tokens = WORD_RE.findall((notes or '').casefold())
+    tokens.append(f'dir:{direction}')
+    if amount:
+        tokens.append(f'amt:{int(math.log10(abs(float(amount))))}')
+    return tokens
+
+
+def model_path(company_id):
+    return Path(settings.CLASSIFIER_MODEL_DIR) / f'company_{company_id}.npz'
+
+
+def train(company_id, alpha=DEFAULT_ALPHA, min_count=DEFAULT_MIN_COUNT):
+    """
+    Fits and saves the company's model. Returns the number of training rows,
+    or 0 if the company has nothing to learn from.
+    """
+    rows = list(
+        ClassifiedTransaction.objects
+        .filter(company_id=company_id, is_active_classification=True)
+        .values_list('transaction__notes', 'direction', 'amount', 'entity_id', 'cost_centre_id')
+        .iterator(chunk_size=5000)
+    )
+    if not rows:
+        return 0
+
+    documents = [features(notes, direction, amount) for notes, direction, amount, _, _ in rows]
+    document_frequency = Counter(token for document in documents for token in set(document))
+    vocabulary = sorted(
+        token for token, count in document_frequency.most_common(MAX_FEATURES) if count >= min_count
+    )
+    index = {token: i for i, token in enumerate(vocabulary)}
+
+    labels = sorted({(entity_id, cost_centre_id) for _, _, _, entity_id, cost_centre_id in rows})
+    label_index = {label: i for i, label in enumerate(labels)}
+
+    row_labels, columns = [], []
+    for (_, _, _, entity_id, cost_centre_id), document in zip(rows, documents):
+        label = label_index[(entity_id, cost_centre_id)]
+        for token in document:
+            if token in index:
+                row_labels.append(label)
+                columns.append(index[token])
+
+    counts = np.zeros((len(labels), len(vocabulary)), dtype=np.float64)
+    np.add.at(counts, (np.array(row_labels, dtype=np.intp), np.array(columns, dtype=np.intp)), 1)
+    smoothed = counts + alpha
+    feature_log_prob = np.log(smoothed) - np.log(smoothed.sum(axis=1, keepdims=True))
+
+    label_counts = np.bincount([label_index[(row[3], row[4])] for row in rows], minlength=len(labels))
+    class_log_prior = np.log(label_counts) - np.log(label_counts.sum())
+
+    path = model_path(company_id)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix('.tmp.npz')
+    np.savez_compressed(
+        tmp_path,
+        vocabulary=np.array(vocabulary, dtype=str),
+        # Stored token-major so scoring gathers one contiguous row per token.
+        token_log_prob=np.ascontiguousarray(feature_log_prob.T, dtype=np.float32),
+        class_log_prior=class_log_prior.astype(np.float32),
+        labels=np.array(labels, dtype=np.int64),
+    )
+    os.replace(tmp_path, path)
+    _cache.pop(company_id, None)
+    return len(rows)
+
+
+class SuggestionModel:
+
+    def __init__(self, data):
+        self.index = {token: i for i, token in enumerate(data['vocabulary'].tolist())}
+        self.token_log_prob = data['token_log_prob']
+        self.class_log_prior = data['class_log_prior']
+        self.labels = data['labels']
+
+    def top_k(self, transactions, k=3):
+        """
+        Returns, per transaction, up to k (entity_id, cost_centre_id, probability)
+        tuples, best first.
+        """
+        scores = np.tile(self.class_log_prior, (len(transactions), 1))
+        for row, transaction in enumerate(transactions):
+            columns = [
+                self.index[token]
+                for token in features(transaction.notes, transaction.direction, transaction.amount)
+                if token in self.index
+            ]
+            if columns:
+                scores[row] += self.token_log_prob[columns].sum(axis=0)
+
+        scores -= scores.max(axis=1, keepdims=True)
+        probabilities = np.exp(scores)
+        probabilities /= probabilities.sum(axis=1, keepdims=True)
+
+        k = min(k, len(self.labels))
+        best = np.argsort(-probabilities, axis=1)[:, :k]
+        return [
+            [
+                (int(self.labels[label][0]), int(self.labels[label][1]), float(probabilities[row, label]))
+                for label in best[row]
+            ]
+            for row in range(len(transactions))
+        ]
+
+
+def load(company_id):
+    """
+    Returns the company's SuggestionModel, or None if none has been trained.
+    Loaded once per process and reloaded when the file is replaced.
+    """
+    path = model_path(company_id)
+    try:
+        mtime = path.stat().st_mtime_ns
+    except FileNotFoundError:
+        _cache.pop(company_id, None)
+        return None
+
+    cached = _cache.get(company_id)
+    if cached and cached[0] == mtime:
+        return cached[1]
+
+    with np.load(path) as data:
+        model = SuggestionModel(data)
+    _cache[company_id] = (mtime, model)
+    return model
+
+
+def suggest(transactions, k=3):
+    """
+    Maps transaction id -> list of (entity_id, cost_centre_id, probability).
+    Transactions of companies without a trained model get an empty list.
+    """
+    by_company = {}
+    for transaction in transactions:
+        by_company.setdefault(transaction.company_id, []).append(transaction)
+
+    results = {}
+    for company_id, company_transactions in by_company.items():
+        model = load(company_id)
+        guesses = model.top_k(company_transactions, k) if model else [[] for _ in company_transactions]
+        for transaction, transaction_guesses in zip(company_transactions, guesses):
+            results[transaction.id] = transaction_guesses
+    return results
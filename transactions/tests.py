@@ -1,3 +1,610 @@
-from django.test import TestCase
+import datetime
+import io
+import json
+import tempfile
+from decimal import Decimal
+from unittest import mock
+from urllib.parse import urlencode
 
-# Create your tests here.
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from companies.models import Company
+from igen.signals import post_bulk_create
+from banks.models import BankAccount
+from cost_centres.models import CostCentre
+from transaction_types.models import TransactionType
+from entities.models import Entity
+from users.models import User
+from .importers import TransactionImporter
+from .models import Transaction, ClassifiedTransaction, ClassificationRule
+
+
+class TransactionAPITestCase(TestCase):
+
+    def setUp(self):
+        self.company = Company.objects.create(name='Acme', pan='AAAAA0000A')
+        self.bank = BankAccount.objects.create(
+            company=self.company, account_name='Main', account_number='0001',
+            bank_name='SBI', ifsc='SBIN0000001'
+        )
+        self.cost_centre = CostCentre.objects.create(company=self.company, name='Admin')
+        self.transaction_type = TransactionType.objects.create(company=self.company, name='Rent')
+        self.entity = Entity.objects.create(company=self.company, name='Head Office', entity_type='Internal')
+        self.user = User.objects.create_user(user_id='admin', password='x', role='SUPER_USER', full_name='Admin')
+
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create_transactions(self, count):
+        transactions = Transaction.objects.bulk_create([
+            Transaction(
+                company=self.company, bank_account=self.bank, cost_centre=self.cost_centre,
+                transaction_type=self.transaction_type, direction='DEBIT',
+                amount=Decimal('100.00'), date=datetime.date(2025, 4, 1)
+            )
+            for _ in range(count)
+        ])
+        # Classify every other row so both branches of is_classified are exercised.
+        for txn in transactions[::2]:
+            ClassifiedTransaction.objects.create(
+                transaction=txn, cost_centre=self.cost_centre, entity=self.entity,
+                transaction_type=self.transaction_type, amount=txn.amount, value_date=txn.date
+            )
+        return transactions
+
+
+class TransactionListQueryCountTests(TransactionAPITestCase):
+    """
+    The transaction listing must not issue per-row queries for classification
+    status or the related *_name fields.
+    """
+
+    def test_show_all_query_count_is_constant(self):
+        for count in (1, 5, 25):
+            Transaction.objects.all().delete()
+            self.create_transactions(count)
+
+            with self.assertNumQueries(1):
+                response = self.client.get('/api/transactions/', {'show_all': 'true'})
+
+            rows = response.data['results']
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(len(rows), count)
+            self.assertEqual(sum(row['is_classified'] for row in rows), (count + 1) // 2)
+            self.assertTrue(all(row['company_name'] == 'Acme' for row in rows))
+
+    def test_unclassified_listing_query_count_is_constant(self):
+        self.create_transactions(10)
+
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/transactions/')
+
+        rows = response.data['results']
+        self.assertEqual(len(rows), 5)
+        self.assertFalse(any(row['is_classified'] for row in rows))
+
+
+class TransactionPaginationTests(TransactionAPITestCase):
+
+    def test_cursor_pages_cover_every_row_once(self):
+        self.create_transactions(7)
+
+        seen = []
+        url, params = '/api/transactions/', {'show_all': 'true', 'page_size': 3}
+        while url:
+            response = self.client.get(url, params)
+            seen.extend(row['id'] for row in response.data['results'])
+            url, params = response.data['next'], None
+
+        self.assertEqual(sorted(seen), sorted(Transaction.objects.values_list('id', flat=True)))
+
+    def test_pages_seek_on_date_and_id(self):
+        # Every row shares one date, so only the id keeps the pages apart.
+        self.create_transactions(7)
+        expected = list(Transaction.objects.order_by('-date', '-id').values_list('id', flat=True))
+
+        first = self.client.get('/api/transactions/', {'show_all': 'true', 'page_size': 3}).data
+        with CaptureQueriesContext(connection) as context:
+            second = self.client.get(first['next']).data
+        sql = context.captured_queries[-1]['sql']
+        self.assertIn('("transactions_transaction"."date", "transactions_transaction"."id") <', sql)
+        self.assertNotIn('OFFSET', sql)
+        self.assertEqual([row['id'] for row in second['results']], expected[3:6])
+
+        back = self.client.get(second['previous']).data
+        self.assertEqual([row['id'] for row in back['results']], expected[:3])
+        self.assertIsNone(back['previous'])
+
+    def test_paginate_false_returns_plain_list(self):
+        self.create_transactions(3)
+
+        response = self.client.get('/api/transactions/', {'show_all': 'true', 'paginate': 'false'})
+
+        self.assertEqual(len(response.data), 3)
+
+
+class ClassificationTests(TransactionAPITestCase):
+
+    def splits(self, txn, amounts):
+        return [
+            {
+                'transaction': txn.id, 'cost_centre': self.cost_centre.pk, 'entity': self.entity.pk,
+                'transaction_type': self.transaction_type.pk, 'amount': amount, 'value_date': '2025-04-01',
+            }
+            for amount in amounts
+        ]
+
+    def test_split_query_count_is_constant(self):
+        counts = []
+        for ways in (2, 50):
+            txn = self.create_transactions(2)[1]
+            amounts = ['%.2f' % (100 / ways)] * ways
+            amounts[0] = str(Decimal('100.00') - sum(Decimal(a) for a in amounts[1:]))
+
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.post('/api/classified-transactions/', self.splits(txn, amounts), format='json')
+
+            self.assertEqual(response.status_code, 201, response.data)
+            self.assertEqual(len(response.data), ways)
+            counts.append(len(context.captured_queries))
+
+        self.assertEqual(counts[0], counts[1])
+
+    def test_split_total_is_compared_exactly(self):
+        txn = Transaction.objects.create(
+            company=self.company, bank_account=self.bank, cost_centre=self.cost_centre,
+            transaction_type=self.transaction_type, direction='DEBIT',
+            amount=Decimal('0.30'), date=datetime.date(2025, 4, 1)
+        )
+
+        response = self.client.post('/api/classified-transactions/', self.splits(txn, ['0.10', '0.20']), format='json')
+
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(response.data[0]['company'], self.company.pk)
+        self.assertEqual(response.data[0]['direction'], 'DEBIT')
+
+    def test_failed_overwrite_keeps_existing_splits(self):
+        txn = self.create_transactions(1)[0]
+
+        response = self.client.post(
+            '/api/classified-transactions/?force=true', self.splits(txn, ['60.00', '30.00']), format='json'
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(ClassifiedTransaction.objects.filter(transaction=txn).count(), 1)
+
+    def test_batch_reports_each_group_and_writes_valid_ones(self):
+        transactions = self.create_transactions(4)
+        unclassified = transactions[1::2]
+        groups = [
+            {'transaction': unclassified[0].id, 'splits': self.splits(unclassified[0], ['40.00', '60.00'])},
+            {'transaction': unclassified[1].id, 'splits': self.splits(unclassified[1], ['10.00'])},
+            {'transaction': transactions[0].id, 'splits': self.splits(transactions[0], ['100.00'])},
+            {'transaction': 999999, 'splits': self.splits(transactions[0], ['100.00'])},
+        ]
+
+        response = self.client.post('/api/classified-transactions/batch/', groups, format='json')
+
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(
+            [result['status'] for result in response.data['results']],
+            ['classified', 'failed', 'failed', 'failed']
+        )
+        self.assertEqual(len(response.data['results'][0]['classification_ids']), 2)
+        self.assertEqual(ClassifiedTransaction.objects.filter(transaction=unclassified[0]).count(), 2)
+        self.assertFalse(ClassifiedTransaction.objects.filter(transaction=unclassified[1]).exists())
+
+    def test_batch_query_count_is_constant(self):
+        counts, forced = [], []
+        for size in (2, 30):
+            Transaction.objects.all().delete()
+            transactions = Transaction.objects.bulk_create([
+                Transaction(
+                    company=self.company, bank_account=self.bank, cost_centre=self.cost_centre,
+                    transaction_type=self.transaction_type, direction='DEBIT',
+                    amount=Decimal('100.00'), date=datetime.date(2025, 4, 1)
+                )
+                for _ in range(size)
+            ])
+            groups = [{'transaction': txn.id, 'splits': self.splits(txn, ['50.00', '50.00'])} for txn in transactions]
+
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.post('/api/classified-transactions/batch/', groups, format='json')
+
+            self.assertEqual(response.data['classified'], size)
+            counts.append(len(context.captured_queries))
+
+            # Overwriting replaces every split without a query per deleted row.
+            with CaptureQueriesContext(connection) as context:
+                response = self.client.post('/api/classified-transactions/batch/?force=true', groups, format='json')
+
+            self.assertEqual(response.data['classified'], size)
+            forced.append(len(context.captured_queries))
+            self.assertEqual(ClassifiedTransaction.objects.count(), 2 * size)
+            self.assertEqual(Transaction.objects.filter(is_classified=True).count(), size)
+
+        self.assertEqual(counts[0], counts[1])
+        self.assertEqual(forced[0], forced[1])
+
+
+class AutoClassificationTests(TransactionAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.other_entity = Entity.objects.create(company=self.company, name='Landlord', entity_type='External')
+
+    def transaction(self, notes, amount='100.00', direction='DEBIT'):
+        return Transaction.objects.create(
+            company=self.company, bank_account=self.bank, cost_centre=self.cost_centre,
+            transaction_type=self.transaction_type, direction=direction,
+            amount=Decimal(amount), date=datetime.date(2025, 4, 1), notes=notes
+        )
+
+    def rule(self, name, entity, **conditions):
+        return ClassificationRule.objects.create(
+            company=self.company, name=name, cost_centre=self.cost_centre, entity=entity, **conditions
+        )
+
+    def test_first_matching_rule_by_priority_wins(self):
+        self.rule('Rent keyword', self.other_entity, keyword='office rent', priority=10)
+        self.rule('Any NEFT', self.entity, pattern=r'neft/\d+', priority=20)
+        self.rule('Large credits', self.entity, direction='CREDIT', min_amount=Decimal('1000'), priority=5)
+
+        rent = self.transaction('NEFT/123 OFFICE RENT APRIL')
+        neft = self.transaction('NEFT/456 SUPPLIER')
+        small_credit = self.transaction('cash deposit', amount='10.00', direction='CREDIT')
+        large_credit = self.transaction('NEFT/789 CLIENT', amount='5000.00', direction='CREDIT')
+
+        response = self.client.post('/api/transactions/auto-classify/')
+
+        self.assertEqual(response.data['classified'], 3)
+        self.assertEqual(rent.classifications.get().entity, self.other_entity)
+        self.assertEqual(neft.classifications.get().entity, self.entity)
+        self.assertFalse(small_credit.classifications.exists())
+        self.assertEqual(large_credit.classifications.get().remarks, 'Auto-classified by rule: Large credits')
+
+    def test_dry_run_and_existing_classifications_are_left_alone(self):
+        self.rule('Rent', self.other_entity, keyword='rent')
+        classified = self.create_transactions(1)[0]
+        Transaction.objects.filter(pk=classified.pk).update(notes='rent')
+        self.transaction('rent for may')
+
+        response = self.client.post('/api/transactions/auto-classify/?dry_run=true')
+        self.assertEqual((response.data['matched'], response.data['classified']), (1, 0))
+
+        self.client.post('/api/transactions/auto-classify/')
+        self.assertEqual(ClassifiedTransaction.objects.filter(transaction=classified).get().entity, self.entity)
+        self.assertEqual(ClassifiedTransaction.objects.count(), 2)
+
+    def test_patterns_that_cannot_be_combined(self):
+        for pattern in ['(?i)neft', '(?P<ref>\\d+)', '(a)\\1']:
+            response = self.client.post('/api/classification-rules/', {
+                'company': self.company.pk, 'name': 'Bad', 'pattern': pattern,
+                'cost_centre': self.cost_centre.pk, 'entity': self.entity.pk,
+            })
+            self.assertEqual(response.status_code, 400, pattern)
+            self.assertIn('pattern', response.data)
+
+        # Rules saved before the check still match, one pattern at a time.
+        self.rule('Flags', self.entity, pattern='(?i)neft', priority=1)
+        self.rule('Ref', self.other_entity, pattern='(?P<ref>imps)/(?P=ref)', priority=2)
+        self.rule('Same group', self.other_entity, pattern='(?P<ref>upi)', priority=3)
+        neft = self.transaction('NEFT/123')
+        imps = self.transaction('imps/imps')
+
+        response = self.client.post('/api/transactions/auto-classify/')
+
+        self.assertEqual(response.data['classified'], 2)
+        self.assertEqual(neft.classifications.get().entity, self.entity)
+        self.assertEqual(imps.classifications.get().entity, self.other_entity)
+
+    def test_runs_are_limited_to_the_users_companies(self):
+        other_company = Company.objects.create(name='Globex', pan='BBBBB0000B')
+        ClassificationRule.objects.create(
+            company=other_company, name='Rent', keyword='rent', cost_centre=self.cost_centre, entity=self.entity
+        )
+        foreign = self.transaction('rent')
+        Transaction.objects.filter(pk=foreign.pk).update(company=other_company)
+
+        accountant = User.objects.create_user(user_id='accountant', password='x', role='ACCOUNTANT', full_name='A')
+        accountant.companies.add(self.company)
+        self.client.force_authenticate(accountant)
+        response = self.client.post(f'/api/transactions/auto-classify/?company={other_company.pk}')
+        self.assertEqual((response.status_code, response.data['scanned']), (200, 0))
+        self.assertFalse(foreign.classifications.exists())
+
+        manager = User.objects.create_user(user_id='manager', password='x', role='PROPERTY_MANAGER', full_name='M')
+        self.client.force_authenticate(manager)
+        self.assertEqual(self.client.post('/api/transactions/auto-classify/').status_code, 403)
+
+    def test_rules_can_only_be_written_for_the_users_companies(self):
+        other_company = Company.objects.create(name='Globex', pan='BBBBB0000B')
+        other_cost_centre = CostCentre.objects.create(company=other_company, name='Admin')
+        other_entity = Entity.objects.create(company=other_company, name='Landlord', entity_type='External')
+        rule = {'name': 'Rent', 'keyword': 'rent', 'cost_centre': other_cost_centre.pk, 'entity': other_entity.pk}
+
+        manager = User.objects.create_user(user_id='manager', password='x', role='PROPERTY_MANAGER', full_name='M')
+        manager.companies.add(self.company)
+        self.client.force_authenticate(manager)
+        response = self.client.post('/api/classification-rules/', {**rule, 'company': other_company.pk}, format='json')
+        self.assertEqual(response.status_code, 403)
+
+        accountant = User.objects.create_user(user_id='accountant', password='x', role='ACCOUNTANT', full_name='A')
+        accountant.companies.add(self.company)
+        self.client.force_authenticate(accountant)
+        response = self.client.post('/api/classification-rules/', {**rule, 'company': other_company.pk}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('company', response.data)
+
+        response = self.client.post('/api/classification-rules/', {**rule, 'company': self.company.pk}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.data), {'cost_centre', 'entity'})
+        self.assertFalse(ClassificationRule.objects.exists())
+
+        own = self.rule('Rent', self.entity)
+        response = self.client.patch(
+            f'/api/classification-rules/{own.pk}/', {'bank_account': BankAccount.objects.create(
+                company=other_company, account_name='Globex', account_number='0002', bank_name='SBI', ifsc='SBIN0000001'
+            ).pk}, format='json'
+        )
+        self.assertEqual((response.status_code, set(response.data)), (400, {'bank_account'}))
+
+    def upload(self, rows):
+        lines = ['company,bank_account,cost_centre,transaction_type,direction,amount,date,notes']
+        lines += [f'Acme,Main,Admin,Rent,DEBIT,100.00,2025-04-01,{notes}' for notes in rows]
+        csv_file = io.BytesIO('\n'.join(lines).encode())
+        csv_file.name = 'statement.csv'
+        return self.client.post('/api/bulk-upload/?auto_classify=true', {'file': csv_file}, format='multipart')
+
+    def test_upload_classifies_only_its_own_rows(self):
+        self.rule('Rent', self.other_entity, keyword='rent')
+        earlier = self.transaction('rent for march')
+
+        response = self.upload(['rent for april', 'electricity'])
+
+        self.assertEqual((response.status_code, response.data['auto_classified']), (201, 1))
+        self.assertFalse(earlier.classifications.exists())
+
+        with mock.patch('transactions.importers.rules.auto_classify', side_effect=RuntimeError('rules broke')):
+            response = self.upload(['rent for may'])
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['auto_classify_error'], 'rules broke')
+        self.assertTrue(Transaction.objects.filter(notes='rent for may').exists())
+
+
+class BulkUploadTests(TransactionAPITestCase):
+
+    def upload(self, lines):
+        csv_file = io.BytesIO(('company,bank_account,cost_centre,transaction_type,direction,amount,date,notes\n'
+                               + ''.join(line + '\n' for line in lines)).encode())
+        csv_file.name = 'statement.csv'
+        return self.client.post('/api/bulk-upload/', {'file': csv_file}, format='multipart')
+
+    def test_references_are_case_folded_and_prefer_the_rows_company(self):
+        other_company = Company.objects.create(name='Globex', pan='BBBBB0000B')
+        CostCentre.objects.create(company=other_company, name='Admin')
+
+        response = self.upload(['  ACME ,main,admin,RENT,DEBIT,100.00,2025-04-01,ok'])
+
+        self.assertEqual(response.status_code, 201, response.data)
+        txn = Transaction.objects.get()
+        self.assertEqual(
+            (txn.company, txn.bank_account, txn.cost_centre, txn.transaction_type),
+            (self.company, self.bank, self.cost_centre, self.transaction_type),
+        )
+
+    def test_a_late_bad_row_rolls_back_the_whole_file(self):
+        sent = mock.Mock()
+        post_bulk_create.connect(sent, sender=Transaction, dispatch_uid='test_upload')
+        self.addCleanup(post_bulk_create.disconnect, sender=Transaction, dispatch_uid='test_upload')
+        lines = ['Acme,Main,Admin,Rent,DEBIT,100.00,2025-04-01,ok'] * 5
+
+        with mock.patch.object(TransactionImporter, 'BATCH_SIZE', 2):
+            response = self.upload(lines + ['Acme,Nowhere,Admin,Rent,DEBIT,abc,2025-04-01,bad'])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['message'], 'Validation failed for some rows.')
+        [error] = response.data['errors']
+        self.assertEqual((error['row'], error['data']['notes']), (6, 'bad'))
+        self.assertEqual(set(error['errors']), {'bank_account'})
+        self.assertFalse(Transaction.objects.exists())
+        sent.assert_not_called()
+
+        with mock.patch.object(TransactionImporter, 'BATCH_SIZE', 2):
+            response = self.upload(lines)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(sum(len(call.kwargs['instances']) for call in sent.call_args_list), 5)
+
+
+class StreamUploadTests(TransactionAPITestCase):
+
+    def stream(self, data, **params):
+        csv_file = io.BytesIO(b'company,bank_account,cost_centre,transaction_type,direction,amount,date,notes\n' + data)
+        csv_file.name = 'statement.csv'
+        response = self.client.post(
+            '/api/bulk-upload/?' + urlencode({'stream': 'true', **params}), {'file': csv_file}, format='multipart'
+        )
+        self.assertEqual(response.status_code, 200)
+        return [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+
+    def test_max_errors_zero_keeps_no_error_details(self):
+        rows = b'Acme,Main,Admin,Rent,DEBIT,100.00,2025-04-01,ok\nAcme,Nowhere,Admin,Rent,DEBIT,1,2025-04-01,bad\n'
+
+        summary = self.stream(rows, max_errors=0)[-1]
+
+        self.assertEqual((summary['created'], summary['error_count'], summary['errors']), (1, 1, []))
+        self.assertTrue(summary['errors_truncated'])
+
+    def test_failure_mid_file_ends_with_an_error_line(self):
+        rows = b''.join(b'Acme,Main,Admin,Rent,DEBIT,100.00,2025-04-01,row %d\n' % n for n in range(400))
+
+        with mock.patch.object(TransactionImporter, 'BATCH_SIZE', 50), self.assertLogs('transactions.views'):
+            lines = self.stream(rows + b'Acme,Main,Admin,Rent,DEBIT,1,2025-04-01,\xff\n')
+
+        self.assertIn('utf-8', lines[-1]['error'])
+        self.assertGreater(lines[-1]['created'], 0)
+        self.assertEqual(lines[-1]['created'], Transaction.objects.count())
+
+
+class SuggestionTests(TransactionAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.model_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.model_dir.cleanup)
+        self.settings_override = override_settings(CLASSIFIER_MODEL_DIR=self.model_dir.name)
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+
+        self.landlord = Entity.objects.create(company=self.company, name='Landlord', entity_type='External')
+        history = [('office rent april', self.landlord)] * 3 + [('electricity bill kseb', self.entity)] * 3
+        for notes, entity in history:
+            txn = Transaction.objects.create(
+                company=self.company, bank_account=self.bank, cost_centre=self.cost_centre,
+                transaction_type=self.transaction_type, direction='DEBIT',
+                amount=Decimal('100.00'), date=datetime.date(2025, 4, 1), notes=notes
+            )
+            ClassifiedTransaction.objects.create(
+                transaction=txn, cost_centre=self.cost_centre, entity=entity,
+                transaction_type=self.transaction_type, amount=txn.amount, value_date=txn.date
+            )
+
+    def test_suggestions_rank_the_matching_entity_first(self):
+        call_command('train_classifier', stdout=io.StringIO())
+        rent = Transaction.objects.create(
+            company=self.company, bank_account=self.bank, cost_centre=self.cost_centre,
+            transaction_type=self.transaction_type, direction='DEBIT',
+            amount=Decimal('120.00'), date=datetime.date(2025, 5, 1), notes='RENT FOR MAY'
+        )
+
+        response = self.client.get('/api/transactions/suggestions/', {'ids': str(rent.id), 'k': 2})
+
+        suggestions = response.data[0]['suggestions']
+        self.assertEqual(len(suggestions), 2)
+        self.assertEqual(suggestions[0]['entity_name'], 'Landlord')
+        self.assertGreater(suggestions[0]['probability'], suggestions[1]['probability'])
+
+    def test_untrained_company_gets_no_suggestions(self):
+        response = self.client.get('/api/transactions/suggestions/', {'show_all': 'true'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 6)
+        self.assertTrue(all(row['suggestions'] == [] for row in response.data['results']))
+
+
+class WorkQueueTests(TransactionAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.colleague = User.objects.create_user(user_id='acct', password='x', role='SUPER_USER', full_name='Acct')
+        self.colleague_client = APIClient()
+        self.colleague_client.force_authenticate(self.colleague)
+
+    def test_claimers_receive_disjoint_rows(self):
+        self.create_transactions(10)
+
+        mine = self.client.post('/api/transactions/claim/', {'count': 3}, format='json').data
+        theirs = self.colleague_client.post('/api/transactions/claim/', {'count': 3}, format='json').data
+
+        self.assertEqual(len(mine), 3)
+        self.assertEqual(len(theirs), 2)
+        self.assertFalse({row['id'] for row in mine} & {row['id'] for row in theirs})
+        self.assertTrue(all(row['claimed_by'] == self.user.pk for row in mine))
+
+    def test_expired_and_released_claims_are_handed_out_again(self):
+        unclassified = {txn.id for txn in self.create_transactions(4)[1::2]}
+        claimed = self.client.post('/api/transactions/claim/', {'count': 1}, format='json').data[0]['id']
+        Transaction.objects.filter(pk=claimed).update(claim_expires_at=timezone.now() - datetime.timedelta(minutes=1))
+
+        theirs = self.colleague_client.post('/api/transactions/claim/', {'count': 5}, format='json').data
+        self.assertEqual({row['id'] for row in theirs}, unclassified)
+
+        self.colleague_client.post('/api/transactions/release/', {'ids': [claimed]}, format='json')
+        mine = self.client.post('/api/transactions/claim/', {'count': 5}, format='json').data
+        self.assertEqual([row['id'] for row in mine], [claimed])
+
+    def test_claims_are_limited_to_the_users_companies(self):
+        self.create_transactions(4)
+        other_company = Company.objects.create(name='Globex', pan='BBBBB0000B')
+        foreign = Transaction.objects.filter(is_classified=False).first()
+        Transaction.objects.filter(pk=foreign.pk).update(company=other_company)
+
+        accountant = User.objects.create_user(user_id='accountant', password='x', role='ACCOUNTANT', full_name='A')
+        accountant.companies.add(self.company)
+        self.client.force_authenticate(accountant)
+
+        def claim(**data):
+            return self.client.post('/api/transactions/claim/', {'count': 5, **data}, format='json')
+
+        self.assertEqual(claim(company=other_company.pk).data, [])
+        self.assertEqual(claim(company='abc').status_code, 400)
+        self.assertNotIn(foreign.pk, {row['id'] for row in claim().data})
+        self.assertEqual(len(claim(company=self.company.pk).data), 1)
+
+        response = self.client.post('/api/transactions/release/', {'ids': ['x']}, format='json')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post('/api/transactions/release/', {'ids': ['1', 2]}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+    def test_is_classified_follows_splits(self):
+        txn = self.create_transactions(2)[1]
+        self.client.post('/api/transactions/claim/', {'count': 1}, format='json')
+        split = ClassifiedTransaction.objects.create(
+            transaction=txn, cost_centre=self.cost_centre, entity=self.entity,
+            transaction_type=self.transaction_type, amount=txn.amount, value_date=txn.date
+        )
+
+        txn.refresh_from_db()
+        self.assertTrue(txn.is_classified)
+        self.assertIsNone(txn.claimed_by)
+
+        split.delete()
+        txn.refresh_from_db()
+        self.assertFalse(txn.is_classified)
+
+
+class TenantScopeTests(TransactionAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.other_company = Company.objects.create(name='Globex', pan='BBBBB0000B')
+        for company in (self.company, self.other_company):
+            ClassificationRule.objects.create(
+                company=company, name=company.name, keyword='rent',
+                cost_centre=self.cost_centre, entity=self.entity
+            )
+        self.accountant = User.objects.create_user(
+            user_id='accountant', password='Secret#123', role='ACCOUNTANT', full_name='Accountant'
+        )
+        self.accountant.companies.add(self.company)
+
+    def login(self):
+        tokens = self.client.post(
+            '/api/users/token/', {'user_id': 'accountant', 'password': 'Secret#123'}, format='json'
+        ).data
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+        return client, tokens
+
+    def test_repeat_requests_skip_membership_queries(self):
+        client, _ = self.login()
+        client.get('/api/classification-rules/')
+        with CaptureQueriesContext(connection) as ctx:
+            rules = client.get('/api/classification-rules/').data['results']
+        self.assertEqual([rule['name'] for rule in rules], ['Acme'])
+        self.assertFalse([q for q in ctx.captured_queries if 'users_user_companies' in q['sql']])
+
+    def test_refresh_picks_up_membership_changes(self):
+        _, tokens = self.login()
+        self.accountant.companies.add(self.other_company)
+
+        access = self.client.post('/api/users/token/refresh/', {'refresh': tokens['refresh']}, format='json').data['access']
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        rules = client.get('/api/classification-rules/').data['results']
+        self.assertEqual(sorted(rule['name'] for rule in rules), ['Acme', 'Globex'])
@@ -2,35 +2,54 @@ from rest_framework import viewsets, status
 from rest_framework.response import Response
 from rest_framework.decorators import action, api_view
 from rest_framework.permissions import IsAuthenticated
-from .models import Transaction, ClassifiedTransaction
-from companies.models import Company
-from banks.models import BankAccount
+from .models import Transaction, ClassifiedTransaction, ClassificationRule
+from .serializers import TransactionSerializer, ClassifiedTransactionSerializer, ClassificationRuleSerializer
+from .importers import TransactionImporter, classify_uploaded
+from . import classification, queue, rules, suggestions
 from cost_centres.models import CostCentre
-from transaction_types.models import TransactionType
-from .serializers import TransactionSerializer, ClassifiedTransactionSerializer
+from entities.models import Entity
+from import_jobs.views import queue_import
+from igen import tenancy
+from igen.tenancy import TenantScopedMixin
+from reports import rollups
+from reports.models import SpendRollup
+from monitoring.metrics import record_import
+from users.permissions import IsSuperUserOrAccountant
 import csv
+import json
+import logging
+import time
+from collections import defaultdict
+from decimal import Decimal
 from io import TextIOWrapper
-from django.db.models import Sum, DecimalField, Exists, OuterRef
-from django.db.models.functions import Coalesce
+from django.http import StreamingHttpResponse
+from django.utils.dateparse import parse_date
+from django.db.models import Sum
+
+logger = logging.getLogger(__name__)
 
 
 class TransactionViewSet(viewsets.ModelViewSet):
     serializer_class = TransactionSerializer
+    cursor_ordering = ('-date', '-id')
 
     def get_queryset(self):
         """
         By default, return only unclassified transactions.
         If ?show_all=true, return all.
+
+        Classification status is the maintained is_classified column (served
+        by a partial index) and the related names are joined, so listing costs
+        one query regardless of size.
         """
-        queryset = Transaction.objects.all()
+        queryset = Transaction.objects.select_related(
+            'company', 'bank_account', 'cost_centre', 'transaction_type'
+        )
 
         if self.request.query_params.get('show_all') == 'true':
             return queryset
 
-        classified_subquery = ClassifiedTransaction.objects.filter(transaction=OuterRef('pk'))
-        return queryset.annotate(
-            has_classification=Exists(classified_subquery)
-        ).filter(has_classification=False)
+        return queryset.filter(is_classified=False)
 
     @action(detail=True, methods=["get"])
     def classified_entries(self, request, pk=None):
@@ -63,9 +82,115 @@ class TransactionViewSet(viewsets.ModelViewSet):
             "original_amount": transaction.amount
         })
 
+    @action(detail=False, methods=["post"])
+    def claim(self, request):
+        """
+        Work queue: claims the next `count` (default 20) unclassified
+        transactions for the current user and returns them. Rows claimed by
+        other users are skipped until their claim expires. Only the user's
+        companies are queued; optional: company, to narrow that to one.
+        """
+        try:
+            count = int(request.data.get('count', request.query_params.get('count', 20)))
+        except (TypeError, ValueError):
+            return Response({"error": "count must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+
+        company = request.data.get('company') or request.query_params.get('company')
+        company_ids = tenancy.company_ids(request)
+        if company:
+            try:
+                company = int(company)
+            except (TypeError, ValueError):
+                return Response({"error": "company must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+            company_ids = [company] if company_ids is None or company in company_ids else []
+        ids = queue.claim_next(request.user, max(count, 0), company_ids=company_ids)
+
+        claimed = self.get_queryset().filter(pk__in=ids).order_by('-date', '-id')
+        return Response(self.get_serializer(claimed, many=True).data, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=["post"])
+    def release(self, request):
+        """
+        Releases the current user's claims: all of them, or only `ids`.
+        """
+        ids = request.data.get('ids')
+        if ids is not None:
+            try:
+                ids = [int(i) for i in ids]
+            except (TypeError, ValueError):
+                return Response({"error": "ids must be a list of integers."}, status=status.HTTP_400_BAD_REQUEST)
+        released = queue.release(request.user, ids)
+        return Response({"released": released}, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=["get"])
+    def suggestions(self, request):
+        """
+        Top-k (entity, cost centre) guesses for a page of transactions, from
+        the models trained by `manage.py train_classifier`.
+        Optional: ?ids=1,2,3 instead of the listing page, ?k=<n> (default 3).
+        """
+        try:
+            k = max(1, min(int(request.query_params.get('k', 3)), 10))
+        except ValueError:
+            return Response({"error": "k must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        ids = request.query_params.get('ids')
+        page = None
+        if ids:
+            try:
+                queryset = queryset.filter(id__in=[int(i) for i in ids.split(',') if i])
+            except ValueError:
+                return Response({"error": "ids must be a comma-separated list of integers."},
+                                status=status.HTTP_400_BAD_REQUEST)
+        else:
+            page = self.paginate_queryset(queryset)
+        transactions = page if page is not None else list(queryset)
+
+        guesses = suggestions.suggest(transactions, k=k)
+        entities = Entity.objects.in_bulk({g[0] for row in guesses.values() for g in row})
+        cost_centres = CostCentre.objects.in_bulk({g[1] for row in guesses.values() for g in row})
+
+        results = [
+            {
+                "transaction": transaction.id,
+                "suggestions": [
+                    {
+                        "entity": entity_id,
+                        "entity_name": getattr(entities.get(entity_id), 'name', None),
+                        "cost_centre": cost_centre_id,
+                        "cost_centre_name": getattr(cost_centres.get(cost_centre_id), 'name', None),
+                        "probability": round(probability, 4),
+                    }
+                    for entity_id, cost_centre_id, probability in guesses[transaction.id]
+                ],
+            }
+            for transaction in transactions
+        ]
+        if page is not None:
+            return self.get_paginated_response(results)
+        return Response(results)
+
+    @action(detail=False, methods=["post"], url_path="auto-classify",
+            permission_classes=[IsAuthenticated, IsSuperUserOrAccountant])
+    def auto_classify(self, request):
+        """
+        Applies the active classification rules to the requesting user's
+        unclassified transactions. Accountants and super users only.
+        Optional: ?company=<id> to limit the run, ?dry_run=true to only count matches.
+        """
+        queryset = tenancy.scope(Transaction.objects.all(), request)
+        company = request.query_params.get('company')
+        if company:
+            queryset = queryset.filter(company_id=company)
+
+        summary = rules.auto_classify(queryset, dry_run=request.query_params.get('dry_run') == 'true')
+        return Response(summary, status=status.HTTP_200_OK)
+
 
 class ClassifiedTransactionViewSet(viewsets.ModelViewSet):
     serializer_class = ClassifiedTransactionSerializer
+    cursor_ordering = ('-created_at',)
     http_method_names = ['get', 'post', 'put', 'patch', 'delete']
 
     def get_queryset(self):
@@ -82,38 +207,58 @@ class ClassifiedTransactionViewSet(viewsets.ModelViewSet):
             return Response({"error": "Expected a non-empty list of split entries."},
                             status=status.HTTP_400_BAD_REQUEST)
 
-        transaction_id = data[0].get("transaction")
         try:
-            transaction = Transaction.objects.get(id=transaction_id)
-        except Transaction.DoesNotExist:
-            return Response({"error": "Transaction not found."}, status=status.HTTP_404_NOT_FOUND)
+            splits = classification.classify(
+                data[0].get("transaction"), data,
+                force=request.query_params.get('force') == 'true'
+            )
+        except classification.ClassificationError as exc:
+            return Response({"error": exc.message}, status=exc.status_code)
 
-        if ClassifiedTransaction.objects.filter(transaction=transaction).exists():
-            if request.query_params.get('force') != 'true':
-                return Response({"error": "Transaction already classified. Use ?force=true to overwrite."},
-                                status=status.HTTP_400_BAD_REQUEST)
-            # Overwrite mode
-            ClassifiedTransaction.objects.filter(transaction=transaction).delete()
+        serializer = self.get_serializer(splits, many=True)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
 
-        total_split_amount = 0
-        for entry in data:
-            try:
-                total_split_amount += float(entry.get("amount", 0))
-            except Exception:
-                return Response({"error": "Invalid amount in one of the split entries."},
-                                status=status.HTTP_400_BAD_REQUEST)
+    @action(detail=False, methods=['post'], url_path='batch')
+    def batch(self, request):
+        """
+        Classifies many transactions per call. Body: a list of
+        {"transaction": id, "splits": [...]} groups; ?force=true overwrites.
+        Valid groups are written even if others fail; each gets a result.
+        """
+        groups = request.data
+        if not isinstance(groups, list) or len(groups) == 0:
+            return Response({"error": "Expected a non-empty list of classification groups."},
+                            status=status.HTTP_400_BAD_REQUEST)
 
-        if float(transaction.amount) != total_split_amount:
-            return Response(
-                {"error": f"Split amount ({total_split_amount}) must equal the transaction amount ({transaction.amount})."},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+        results = classification.classify_batch(groups, force=request.query_params.get('force') == 'true')
+        classified = sum(result["status"] == "classified" for result in results)
+        return Response({
+            "classified": classified,
+            "failed": len(results) - classified,
+            "results": results,
+        }, status=status.HTTP_200_OK)
 
-        serializer = self.get_serializer(data=data, many=True)
-        serializer.is_valid(raise_exception=True)
-        self.perform_create(serializer)
 
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+class ClassificationRuleViewSet(TenantScopedMixin, viewsets.ModelViewSet):
+    serializer_class = ClassificationRuleSerializer
+    permission_classes = [IsAuthenticated]
+    cursor_ordering = ('priority', 'id')
+
+    def get_permissions(self):
+        # Rules are applied by auto_classify, so only its users may change them.
+        if self.action in ('list', 'retrieve'):
+            return super().get_permissions()
+        return [IsAuthenticated(), IsSuperUserOrAccountant()]
+
+    def get_queryset(self):
+        queryset = self.scope_to_tenant(
+            ClassificationRule.objects.select_related('cost_centre', 'entity', 'transaction_type')
+        )
+
+        company = self.request.query_params.get('company')
+        if company:
+            queryset = queryset.filter(company_id=company)
+        return queryset
 
 
 @api_view(["POST", "OPTIONS"])
@@ -123,99 +268,136 @@ def bulk_upload_transactions(request):
 
     csv_file = request.FILES["file"]
 
+    # ?auto_classify=true runs the classification rules over the uploaded rows.
+    auto_classify = request.query_params.get("auto_classify") == "true"
+
+    # ?async=true and ?stream=true commit batch by batch and skip invalid rows;
+    # the default path is all-or-nothing.
+    if request.query_params.get("async") == "true":
+        return queue_import(request, "transactions", csv_file, options={"auto_classify": auto_classify})
+
     try:
         decoded_file = TextIOWrapper(csv_file.file, encoding="utf-8")
         reader = csv.DictReader(decoded_file)
 
-        transactions = []
-        errors = []
+        if request.query_params.get("stream") == "true":
+            return _stream_upload(reader, request.query_params.get("max_errors"), auto_classify)
 
-        for row_number, row in enumerate(reader, start=1):
-            row_errors = {}
-
-            try:
-                company = Company.objects.get(name__iexact=row["company"])
-                row["company"] = company.pk
-            except Company.DoesNotExist:
-                row_errors["company"] = f"Company '{row['company']}' not found."
-
-            try:
-                bank = BankAccount.objects.get(account_name__iexact=row["bank_account"])
-                row["bank_account"] = bank.pk
-            except BankAccount.DoesNotExist:
-                row_errors["bank_account"] = f"BankAccount '{row['bank_account']}' not found."
+        clock = time.perf_counter()
+        importer = TransactionImporter(keep_ids=auto_classify)
+        result = importer.run(reader)
+        record_import("transactions", "sync", result.rows_processed, time.perf_counter() - clock)
 
-            try:
-                cost_centre = CostCentre.objects.get(name__iexact=row["cost_centre"])
-                row["cost_centre"] = cost_centre.pk
-            except CostCentre.DoesNotExist:
-                row_errors["cost_centre"] = f"CostCentre '{row['cost_centre']}' not found."
-
-            try:
-                transaction_type = TransactionType.objects.get(name__iexact=row["transaction_type"])
-                row["transaction_type"] = transaction_type.pk
-            except TransactionType.DoesNotExist:
-                row_errors["transaction_type"] = f"TransactionType '{row['transaction_type']}' not found."
-
-            if row_errors:
-                errors.append({
-                    "row": row_number,
-                    "data": row,
-                    "errors": row_errors
-                })
-                continue
-
-            serializer = TransactionSerializer(data=row)
-            if serializer.is_valid():
-                transactions.append(serializer)
-            else:
-                errors.append({
-                    "row": row_number,
-                    "data": row,
-                    "errors": serializer.errors
-                })
-
-        if errors:
+        if result.errors:
             return Response({
                 "message": "Validation failed for some rows.",
-                "errors": errors
+                "errors": result.errors
             }, status=status.HTTP_400_BAD_REQUEST)
 
-        for serializer in transactions:
-            serializer.save()
-
-        return Response({
-            "message": f"{len(transactions)} transactions uploaded successfully."
-        }, status=status.HTTP_201_CREATED)
+        response = {"message": f"{result.created} transactions uploaded successfully."}
+        if auto_classify:
+            response.update(_classify_uploaded(importer.created_ids))
+        return Response(response, status=status.HTTP_201_CREATED)
 
     except Exception as e:
         return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+def _stream_upload(reader, max_errors=None, auto_classify=False):
+    """
+    Streaming mode for large statements: rows are committed batch by batch and
+    progress is reported as one JSON line per batch, ending with a summary.
+    Invalid rows are skipped and only the first `max_errors` are detailed.
+    A failure mid-file (bad encoding, database error) ends the stream with an
+    {"error": ...} line; the batches reported before it stay committed.
+    """
+    try:
+        max_errors = int(max_errors) if max_errors else None
+    except ValueError:
+        max_errors = None
+
+    def progress():
+        result = None
+        clock = time.perf_counter()
+        importer = TransactionImporter(keep_ids=auto_classify)
+        try:
+            for result in importer.stream(reader, max_errors=max_errors):
+                yield json.dumps({
+                    "rows_processed": result.rows_processed,
+                    "created": result.created,
+                    "error_count": result.error_count,
+                }) + "\n"
+        except Exception as e:
+            logger.exception("Streaming transaction upload failed")
+            yield json.dumps({
+                "error": str(e),
+                "created": result.created if result else 0,
+            }) + "\n"
+            return
+        record_import("transactions", "stream", result.rows_processed, time.perf_counter() - clock)
+        summary = result.summary()
+        summary["message"] = f"{result.created} transactions uploaded successfully."
+        if auto_classify:
+            summary.update(_classify_uploaded(importer.created_ids))
+        yield json.dumps(summary, default=str) + "\n"
+
+    return StreamingHttpResponse(progress(), content_type="application/x-ndjson")
+
+
+def _classify_uploaded(ids):
+    """
+    Response fields for ?auto_classify=true. The upload is already committed,
+    so a failure here is reported next to it rather than as a 500.
+    """
+    try:
+        return {"auto_classified": classify_uploaded(ids)["classified"]}
+    except Exception as e:
+        logger.exception("Auto-classification of %s uploaded transactions failed", len(ids))
+        return {"auto_classified": 0, "auto_classify_error": str(e)}
+
+
 @api_view(["GET"])
 def spend_by_cost_centre(request):
-    start = request.query_params.get("start")
-    end = request.query_params.get("end")
-
-    filters = {}
-    if start:
-        filters["date__gte"] = start
-    if end:
-        filters["date__lte"] = end
-
-    data = (
-        Transaction.objects
-        .filter(**filters)
-        .values("cost_centre__name")
-        .annotate(
-            total_spent=Coalesce(Sum("amount"), 0, output_field=DecimalField())
+    """
+    Statement totals per cost centre name. Whole months come from the spend
+    rollups; only the days of a partial first or last month are summed from
+    the transactions table.
+    """
+    dates = {}
+    for name in ("start", "end"):
+        value = request.query_params.get(name)
+        try:
+            dates[name] = parse_date(value) if value else None
+        except ValueError:
+            dates[name] = None
+        if value and dates[name] is None:
+            return Response({"error": f"{name} must be a date (YYYY-MM-DD)."}, status=status.HTTP_400_BAD_REQUEST)
+
+    totals = defaultdict(Decimal)
+    whole, partial = rollups.split_range(dates["start"], dates["end"])
+    if whole is not None:
+        rows = (
+            SpendRollup.objects.filter(source="STATEMENT", **whole)
+            .order_by()
+            .values("cost_centre__name")
+            .annotate(total_spent=Sum("total"))
         )
-        .order_by("-total_spent")
-    )
+        for item in rows:
+            totals[item["cost_centre__name"]] += item["total_spent"] or 0
+    for first, last in partial:
+        rows = (
+            Transaction.objects.filter(date__gte=first, date__lte=last)
+            .order_by()
+            .values("cost_centre__name")
+            .annotate(total_spent=Sum("amount"))
+        )
+        for item in rows:
+            totals[item["cost_centre__name"]] += item["total_spent"] or 0
+
     result = [
-        {"cost_centre": item["cost_centre__name"], "total": item["total_spent"]}
-        for item in data if item["cost_centre__name"]
+        {"cost_centre": name, "total": total}
+        for name, total in sorted(totals.items(), key=lambda item: -item[1])
+        if name
     ]
-
     return Response(result)
 
@@ -0,0 +1,129 @@
+"""
+JWT authentication backed by an in-process principal cache.
+
+simplejwt's JWTAuthentication loads the user row on every request. Here the
+row and the user's company ids are kept in a bounded LRU keyed by the
+token's user_id claim, so repeat requests authenticate without queries.
+Each request still gets its own User instance built from the cached values.
+
+Entries are evicted by users.signals when a user is saved, deleted or their
+companies change, and expire after AUTH_PRINCIPAL_CACHE_SECONDS so changes
+made by other processes (e.g. a deactivation handled by another worker)
+take effect within that window.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from .models import User
+
+DEFAULT_CACHE_SIZE = 1024
+DEFAULT_CACHE_SECONDS = 60
+
+
+class PrincipalCache:
+    """
+    Thread-safe LRU of {user_id: (expires_at, field values, company ids)}.
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped on every eviction so a load that raced with one is not cached.
+        self._generation = 0
+
+    @property
+    def max_size(self):
+        return getattr(settings, 'AUTH_PRINCIPAL_CACHE_SIZE', DEFAULT_CACHE_SIZE)
+
+    @property
+    def ttl(self):
+        return getattr(settings, 'AUTH_PRINCIPAL_CACHE_SECONDS', DEFAULT_CACHE_SECONDS)
+
+    def get(self, user_id):
+        """
+        A fresh User for `user_id`, or None if no such user exists.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(user_id)
+            else:
+                entry = None
+            generation = self._generation
+
+        if entry is None:
+            entry = self._load(user_id, now)
+            if entry is None:
+                return None
+            with self._lock:
+                if generation == self._generation:
+                    self._entries[user_id] = entry
+                    self._entries.move_to_end(user_id)
+                    while len(self._entries) > self.max_size:
+                        self._entries.popitem(last=False)
+
+        _, values, company_ids = entry
+        user = User.from_db(DEFAULT_DB_ALIAS, self.attnames(), values)
+        user._company_ids = company_ids
+        return user
+
+    def _load(self, user_id, now):
+        values = User.objects.filter(**{api_settings.USER_ID_FIELD: user_id}).values_list(*self.attnames()).first()
+        if values is None:
+            return None
+        pk = values[self.attnames().index(User._meta.pk.attname)]
+        company_ids = tuple(sorted(User.companies.through.objects.filter(user_id=pk).values_list('company_id', flat=True)))
+        return now + self.ttl, values, company_ids
+
+    @staticmethod
+    def attnames():
+        return [field.attname for field in User._meta.concrete_fields]
+
+    def evict(self, *user_ids):
+        with self._lock:
+            self._generation += 1
+            for user_id in user_ids:
+                self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+
+principals = PrincipalCache()
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that resolves users through the principal cache.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        user = principals.get(user_id)
+        if user is None:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN and \
+                validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        return user
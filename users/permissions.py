@@ -33,3 +33,10 @@ class IsSuperUserOrCenterHead(BasePermission):
     """
     def has_permission(self, request, view):
         return request.user and request.user.role in ['SUPER_USER', 'CENTER_HEAD']
+
+class IsSuperUserOrAccountant(BasePermission):
+    """
+    Grants access if the user is either SUPER_USER or ACCOUNTANT.
+    """
+    def has_permission(self, request, view):
+        return request.user and request.user.role in ['SUPER_USER', 'ACCOUNTANT']
@@ -1,7 +1,9 @@
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.tokens import AccessToken
 from rest_framework import serializers
 from .models import User
 from companies.models import Company
+from igen.tenancy import COMPANY_IDS_CLAIM, membership_ids
 
 
 class CompanySerializer(serializers.ModelSerializer):
@@ -65,12 +67,15 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
         token['role'] = user.role
         token['user_id'] = user.user_id
 
+        # Memberships travel with the token so requests need not look them up.
+        company_ids = membership_ids(user)
+        token[COMPANY_IDS_CLAIM] = company_ids
+
         # 🔐 If SUPER_USER, skip company enforcement
         if user.role == 'SUPER_USER':
             token['company_id'] = None
         else:
-            companies = user.companies.all()
-            token['company_id'] = companies[0].id if companies.exists() else None
+            token['company_id'] = company_ids[0] if company_ids else None
 
         return token
 
@@ -83,7 +88,23 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
         if self.user.role == 'SUPER_USER':
             data['company_id'] = None
         else:
-            companies = self.user.companies.all()
-            data['company_id'] = companies[0].id if companies.exists() else None
+            company_ids = membership_ids(self.user)
+            data['company_id'] = company_ids[0] if company_ids else None
+
+        return data
+
 
+class CustomTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Re-reads the user's memberships on refresh so a company_ids claim is
+    never older than one access token lifetime.
+    """
+
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        access = AccessToken(data['access'])
+        user = User.objects.filter(user_id=access['user_id']).first()
+        if user is not None:
+            access[COMPANY_IDS_CLAIM] = membership_ids(user)
+            data['access'] = str(access)
         return data
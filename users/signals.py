@@ -0,0 +1,33 @@
+from django.db import transaction as db_transaction
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from .authentication import principals
+from .models import User
+
+
+def evict(*user_ids):
+    # Again after commit, in case a request cached the old row in between.
+    principals.evict(*user_ids)
+    db_transaction.on_commit(lambda: principals.evict(*user_ids))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, **kwargs):
+    evict(instance.user_id)
+
+
+@receiver(m2m_changed, sender=User.companies.through)
+def user_companies_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear', 'pre_clear'):
+        return
+    if not reverse:
+        evict(instance.user_id)
+    elif pk_set:
+        # company.user_set.add/remove(...)
+        evict(*User.objects.filter(pk__in=pk_set).values_list('user_id', flat=True))
+    else:
+        # company.user_set.clear(): the links are gone by post_clear.
+        if action == 'pre_clear':
+            evict(*User.objects.filter(companies=instance).values_list('user_id', flat=True))
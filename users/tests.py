@@ -1,3 +1,55 @@
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from companies.models import Company
+from .authentication import principals
+from .models import User
+
+
+class CachedJWTAuthenticationTests(TestCase):
+
+    def setUp(self):
+        principals.clear()
+        self.acme = Company.objects.create(name='Acme', pan='AAAAA0000A')
+        self.globex = Company.objects.create(name='Globex', pan='BBBBB0000B')
+        self.admin = User.objects.create_user(user_id='admin', password='Secret#123', role='SUPER_USER', full_name='Admin')
+        self.accountant = User.objects.create_user(
+            user_id='accountant', password='Secret#123', role='ACCOUNTANT', full_name='Accountant'
+        )
+        self.accountant.companies.add(self.acme)
+
+    def client_for(self, user_id):
+        access = APIClient().post(
+            '/api/users/token/', {'user_id': user_id, 'password': 'Secret#123'}, format='json'
+        ).data['access']
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        return client
+
+    def user_queries(self, client, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return [q['sql'] for q in ctx.captured_queries if '"users_user' in q['sql']]
+
+    def test_repeat_requests_need_no_auth_queries(self):
+        client = self.client_for('accountant')
+        self.assertTrue(self.user_queries(client, '/api/companies/'))
+        self.assertEqual(self.user_queries(client, '/api/companies/'), [])
+
+    def test_company_changes_apply_immediately(self):
+        client = self.client_for('accountant')
+        self.assertEqual([c['name'] for c in client.get('/api/companies/').data['results']], ['Acme'])
+
+        self.globex.user_set.add(self.accountant)
+        names = sorted(c['name'] for c in client.get('/api/companies/').data['results'])
+        self.assertEqual(names, ['Acme', 'Globex'])
+
+    def test_deactivation_revokes_access(self):
+        client = self.client_for('accountant')
+        client.get('/api/companies/')
+
+        self.client_for('admin').post(f'/api/users/{self.accountant.pk}/deactivate/')
+        self.assertEqual(client.get('/api/companies/').status_code, 401)
@@ -5,14 +5,15 @@ from django_filters.rest_framework import DjangoFilterBackend
 from .models import Vendor
 from .serializers import VendorSerializer
 from users.permissions import IsSuperUserOrPropertyManager
+from igen.tenancy import TenantScopedMixin
 
 
-class VendorViewSet(viewsets.ModelViewSet):
+class VendorViewSet(TenantScopedMixin, viewsets.ModelViewSet):
     """
     ViewSet for managing Vendor data with filtering, searching, and ordering.
     Access:
       - SUPER_USER: All vendors
-      - PROPERTY_MANAGER: Vendors of their assigned company
+      - Others: Vendors of their assigned companies
     """
     serializer_class = VendorSerializer
     permission_classes = [IsAuthenticated, IsSuperUserOrPropertyManager]
@@ -34,27 +35,16 @@ class VendorViewSet(viewsets.ModelViewSet):
     ordering_fields = ['created_on', 'vendor_name']
 
     def get_queryset(self):
-        user = self.request.user
-
-        if user.role == 'SUPER_USER':
-            return Vendor.objects.all().order_by('-created_on')
-        elif user.role == 'PROPERTY_MANAGER':
-            company = user.companies.first()  # handle ManyToMany
-            if company:
-                return Vendor.objects.filter(company=company).order_by('-created_on')
-            return Vendor.objects.none()
-
-        # Fallback: user with multiple companies (future roles)
-        return Vendor.objects.filter(company__in=user.companies.all()).order_by('-created_on')
+        return self.scope_to_tenant(Vendor.objects.all()).order_by('-created_on')
 
     def perform_create(self, serializer):
         user = self.request.user
 
         if user.role == 'PROPERTY_MANAGER':
-            company = user.companies.first()
-            if not company:
+            company_id = self.default_company_id
+            if not company_id:
                 raise ValueError("No company associated with PROPERTY_MANAGER user.")
-            serializer.save(created_by=user, company=company)
+            serializer.save(created_by=user, company_id=company_id)
         else:
             # SUPER_USER must send `company` from frontend
             serializer.save(created_by=user)